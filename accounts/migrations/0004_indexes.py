@@ -0,0 +1,19 @@
+# Generated by Django 5.1.15 on 2026-10-19 06:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_address_email_alter_address_line2_alter_address_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(fields=['user', 'is_default'], name='address_user_default_idx'),
+        ),
+    ]
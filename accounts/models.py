@@ -14,5 +14,8 @@ class Address(models.Model):
     country = models.CharField(max_length=120, default="India")
     is_default = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [models.Index(fields=["user", "is_default"], name="address_user_default_idx")]
+
     def __str__(self):
         return f"{self.full_name} - {self.city}"
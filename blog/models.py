@@ -39,6 +39,7 @@ class Post(models.Model):
     content      = models.TextField()
     is_published = models.BooleanField(default=True)
     created_at   = models.DateTimeField(auto_now_add=True)
+    updated_at   = models.DateTimeField(auto_now=True)
 
     # Main blog image (upload via admin)
     image = models.ImageField(
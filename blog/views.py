@@ -1,10 +1,19 @@
 from django.shortcuts import render, get_object_or_404
+
+from core.utils import versions
+from core.utils.conditional import conditional_page
 from .models import Post
 
+
+@conditional_page(lambda request: f"blog:{versions.get_version('blog')}")
 def post_list(request):
     posts = Post.objects.filter(is_published=True).order_by("-created_at")
     return render(request, "blog/post_list.html", {"posts": posts})
 
+@conditional_page(
+    lambda request, slug: Post.objects.filter(slug=slug, is_published=True)
+    .values_list("updated_at", flat=True).first()
+)
 def post_detail(request, slug):
     post = get_object_or_404(Post, slug=slug, is_published=True)
     return render(request, "blog/post_detail.html", {"post": post})
@@ -2,18 +2,40 @@
 from __future__ import annotations
 
 from django.conf import settings
+from django.utils.crypto import get_random_string
 
 SESSION_KEY = getattr(settings, "CART_SESSION_KEY", "cart")
+OWNER_SESSION_KEY = "cart_owner"
+
+
+def cart_owner(request, create: bool = False) -> str | None:
+    """
+    Stable key of an anonymous visitor's CartItem rows (CartItem.session_key).
+
+    Kept in the session rather than using session.session_key: it survives
+    the key rotation on login (cart merge) and works with signed_cookies
+    sessions, whose "key" changes with every write. Only created (create=True)
+    on the first cart mutation, so browsing never writes a session.
+    """
+    session = request.session
+    owner = session.get(OWNER_SESSION_KEY)
+    if owner is None and SESSION_KEY in session:
+        owner = session.session_key  # cart started before owner keys: rows are keyed by session
+    if owner is None and create:
+        owner = get_random_string(32)
+    if create and session.get(OWNER_SESSION_KEY) != owner:
+        session[OWNER_SESSION_KEY] = owner
+    return owner
+
 
 class Cart:
     """
     Session-backed cart.
-    Session structure:
-        request.session['cart'] = {
-            "<product_id_as_str>": {"qty": int},
-            ...
-        }
-    No magic keys like "__count" or "__total".
+    Session structure (compact, JSON- and signed-cookie-friendly):
+        request.session['cart'] = {"<product_id_as_str>": qty, ...}
+    The key is absent until something is added: reading a cart never
+    modifies the session. Older sessions holding {"<id>": {"qty": n}} and
+    "__" magic keys are read transparently and rewritten on the next change.
     """
 
     SESSION_KEY = getattr(settings, "CART_SESSION_KEY", "cart")
@@ -21,82 +43,63 @@ class Cart:
     def __init__(self, request):
         self.request = request
         self.session = request.session
-        # Ensure dict exists
-        cart = self.session.get(self.SESSION_KEY)
-        if not isinstance(cart, dict):
-            cart = {}
-            self.session[self.SESSION_KEY] = cart
-            self.session.modified = True
-        # Remove any legacy/magic keys that start with "__"
-        self._sanitize()
 
     # ---------- internal helpers ----------
 
     def _get_store(self) -> dict:
-        store = self.session.get(self.SESSION_KEY, {})
-        if not isinstance(store, dict):
-            store = {}
-            self.session[self.SESSION_KEY] = store
+        raw = self.session.get(self.SESSION_KEY)
+        if not isinstance(raw, dict):
+            return {}
+        store = {}
+        for pid, qty in raw.items():
+            if isinstance(qty, dict):  # legacy {"qty": n}
+                qty = qty.get("qty", 0)
+            if not isinstance(pid, str) or not pid.isdigit():
+                continue
+            try:
+                qty = int(qty)
+            except (TypeError, ValueError):
+                continue
+            if qty > 0:
+                store[pid] = qty
         return store
 
     def _save_store(self, store: dict) -> None:
-        self.session[self.SESSION_KEY] = store
-        self.session.modified = True
-
-    def _sanitize(self) -> None:
-        store = self._get_store()
-        changed = False
-        for k in list(store.keys()):
-            if isinstance(k, str) and k.startswith("__"):
-                store.pop(k, None)
-                changed = True
-        if changed:
-            self._save_store(store)
+        if store:
+            self.session[self.SESSION_KEY] = store
+        else:
+            self.session.pop(self.SESSION_KEY, None)  # only marks the session modified if it had a cart
 
     # ---------- public API ----------
 
     def add(self, product_id: int | str, qty: int = 1, update: bool = False) -> None:
         store = self._get_store()
         pid = str(product_id)
-
-        if pid not in store or not isinstance(store[pid], dict):
-            store[pid] = {"qty": 0}
-
-        current = int(store[pid].get("qty", 0))
         if update:
-            store[pid]["qty"] = max(1, int(qty))
+            store[pid] = max(1, int(qty))
         else:
-            store[pid]["qty"] = max(1, current + int(qty))
-
+            store[pid] = max(1, store.get(pid, 0) + int(qty))
         self._save_store(store)
 
     def remove(self, product_id: int | str) -> None:
         store = self._get_store()
-        pid = str(product_id)
-        if pid in store:
-            del store[pid]
+        if store.pop(str(product_id), None) is not None:
             self._save_store(store)
 
     def clear(self) -> None:
         self._save_store({})
 
+    def quantity(self, product_id: int | str) -> int:
+        return self._get_store().get(str(product_id), 0)
+
     @property
     def count(self) -> int:
         """Total quantity of items."""
-        store = self._get_store()
-        total = 0
-        for v in store.values():
-            if isinstance(v, dict):
-                try:
-                    total += int(v.get("qty", 0))
-                except Exception:
-                    continue
-        return total
+        return sum(self._get_store().values())
 
     def __len__(self) -> int:
         """Number of distinct lines."""
-        store = self._get_store()
-        return sum(1 for v in store.values() if isinstance(v, dict))
+        return len(self._get_store())
 
     def __iter__(self):
         """
@@ -112,29 +115,26 @@ class Cart:
         from catalog.models import Product  # local import to avoid circulars
 
         store = self._get_store()
-        product_ids = [int(k) for k in store.keys() if isinstance(k, str) and k.isdigit()]
+        product_ids = [int(k) for k in store]
         if not product_ids:
             return
-        products = Product.objects.filter(id__in=product_ids)
-        prod_map = {p.id: p for p in products}
 
-        for pid_str, data in store.items():
-            if not isinstance(pid_str, str) or not pid_str.isdigit():
-                continue
-            if not isinstance(data, dict):
-                continue
+        # One query per distinct set of ids: totals + template iterate the cart
+        # more than once per request. Thumbnails come from Product.cover_image.
+        key = tuple(sorted(product_ids))
+        if getattr(self, "_prod_map_key", None) != key:
+            products = Product.objects.filter(id__in=product_ids)
+            self._prod_map = {p.id: p for p in products}
+            self._prod_map_key = key
+        prod_map = self._prod_map
 
+        for pid_str, qty in store.items():
             pid = int(pid_str)
             product = prod_map.get(pid)
             if not product:
                 # silently skip products that no longer exist
                 continue
 
-            try:
-                qty = max(1, int(data.get("qty", 0)))
-            except Exception:
-                qty = 1
-
             price = product.price
             subtotal = price * qty
 
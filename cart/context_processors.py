@@ -1,17 +1,19 @@
 from django.db.models import Sum
+from .cart import cart_owner
 from .models import CartItem
 
-def cart_summary(request):
+
+def cart_count(request) -> int:
+    """Header badge count; 0 until the visitor first adds something (never writes the session)."""
     if request.user.is_authenticated:
-        count = (CartItem.objects
-                 .filter(user=request.user)
-                 .aggregate(n=Sum("quantity"))["n"] or 0)
+        qs = CartItem.objects.filter(user=request.user)
     else:
-        sk = request.session.session_key
+        sk = cart_owner(request)
         if not sk:
-            request.session.create()
-            sk = request.session.session_key
-        count = (CartItem.objects
-                 .filter(session_key=sk)
-                 .aggregate(n=Sum("quantity"))["n"] or 0)
-    return {"cart_count": count}
+            return 0
+        qs = CartItem.objects.filter(session_key=sk)
+    return qs.aggregate(n=Sum("quantity"))["n"] or 0
+
+
+def cart_summary(request):
+    return {"cart_count": cart_count(request)}
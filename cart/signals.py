@@ -1,28 +1,45 @@
 from django.dispatch import receiver
 from django.contrib.auth.signals import user_logged_in
+from .cart import cart_owner
 from .models import CartItem
 
 @receiver(user_logged_in)
 def merge_cart_on_login(sender, user, request, **kwargs):
-    # Ensure session key exists
-    sk = request.session.session_key
+    # The owner key is session data, so it survives login()'s session key rotation
+    sk = cart_owner(request)
     if not sk:
-        request.session.create()
-        sk = request.session.session_key
+        return
 
     anon_items = list(CartItem.objects.filter(session_key=sk))
 
     if not anon_items:
         return
 
+    # One lookup for all of the user's existing rows instead of one per item
+    existing = {
+        row.product_id: row
+        for row in CartItem.objects.filter(
+            user=user, product_id__in=[i.product_id for i in anon_items]
+        )
+    }
+
+    merged, adopted, dropped = [], [], []
     for item in anon_items:
         # If the user already has the same product, sum quantities
-        existing = CartItem.objects.filter(user=user, product=item.product).first()
-        if existing:
-            existing.quantity += item.quantity
-            existing.save()
-            item.delete()
+        row = existing.get(item.product_id)
+        if row:
+            row.quantity += item.quantity
+            merged.append(row)
+            dropped.append(item.pk)
         else:
             item.user = user
             item.session_key = None
-            item.save()
+            adopted.append(item)
+            existing[item.product_id] = item
+
+    if merged:
+        CartItem.objects.bulk_update(merged, ["quantity"])
+    if adopted:
+        CartItem.objects.bulk_update(adopted, ["user", "session_key"])
+    if dropped:
+        CartItem.objects.filter(pk__in=dropped).delete()
@@ -1,3 +1,44 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
 from django.test import TestCase
+from django.urls import reverse
+
+from catalog.models import Product
+from core.utils.queries import QueryBudgetMixin
+
+
+class CartQueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = [
+            Product.objects.create(name=f"Part {i}", price=Decimal("5.00"), stock=3)
+            for i in range(5)
+        ]
+
+    def test_view_cart_budget(self):
+        for p in self.products:
+            self.client.post(reverse("cart:add", args=[p.id]), {"quantity": 2})
+        self.assertViewQueryBudget(reverse("cart:view"), 3, status_code=200)
+
+
+class LazySessionTests(TestCase):
+    def test_browsing_writes_no_session_until_cart_changes(self):
+        product = Product.objects.create(name="Rotor", price=Decimal("5.00"), stock=3)
+        for url in (reverse("core:home"), reverse("catalog:product_list"), reverse("cart:view")):
+            self.client.get(url)
+        self.assertFalse(Session.objects.exists())
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, self.client.cookies)
+
+        self.client.post(reverse("cart:add", args=[product.pk]), {"quantity": 2})
+        self.assertEqual(self.client.session["cart"], {str(product.pk): 2})
+        self.assertContains(self.client.get(reverse("cart:view")), "Rotor")
 
-# Create your tests here.
+    def test_legacy_cart_format_is_read_and_rewritten(self):
+        product = Product.objects.create(name="Rotor", price=Decimal("5.00"), stock=3)
+        session = self.client.session
+        session["cart"] = {str(product.pk): {"qty": 3}, "__count": 3}
+        session.save()
+        self.client.post(reverse("cart:update", args=[product.pk]), {"delta": 1})
+        self.assertEqual(self.client.session["cart"], {str(product.pk): 4})
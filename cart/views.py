@@ -1,12 +1,14 @@
 # cart/views.py
 from decimal import Decimal
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.shortcuts import redirect, render, get_object_or_404
+from django.shortcuts import redirect, get_object_or_404
 from django.views.decorators.http import require_POST
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 
-from .cart import Cart
+from core.utils.offload import arender
+from .cart import Cart, cart_owner
 from .models import CartItem
 from catalog.models import Product
 
@@ -24,19 +26,13 @@ def _next_url(request, fallback="core:home"):
     )
 
 
-def _ensure_session_key(request):
-    if not request.session.session_key:
-        request.session.create()
-    return request.session.session_key
-
-
 def _save_db_cart_row(request, product, qty, update=False):
     if request.user.is_authenticated:
         row, created = CartItem.objects.get_or_create(
             user=request.user, product=product, defaults={"quantity": qty}
         )
     else:
-        sk = _ensure_session_key(request)
+        sk = cart_owner(request, create=True)
         row, created = CartItem.objects.get_or_create(
             session_key=sk, product=product, defaults={"quantity": qty}
         )
@@ -51,7 +47,7 @@ def _delete_db_cart_row(request, product):
     if request.user.is_authenticated:
         CartItem.objects.filter(user=request.user, product=product).delete()
     else:
-        sk = request.session.session_key
+        sk = cart_owner(request)
         if sk:
             CartItem.objects.filter(session_key=sk, product=product).delete()
 
@@ -87,9 +83,7 @@ def update_qty(request, product_id):
     product = get_object_or_404(Product, pk=product_id)
     cart = Cart(request)
 
-    store = request.session.get("cart", {})
-    key = str(product_id)
-    current_qty = int(store.get(key, {}).get("qty", 0))
+    current_qty = cart.quantity(product_id)
 
     try:
         delta = int(request.POST.get("delta", 0))
@@ -114,30 +108,25 @@ def update_qty(request, product_id):
 @login_required
 @require_POST
 def clear_cart(request):
-    request.session["cart"] = {}
-    request.session.modified = True
+    Cart(request).clear()
     CartItem.objects.filter(user=request.user).delete()
     return redirect(_next_url(request, fallback="cart:view"))
 
 
-def view_cart(request):
-    """Render the cart with subtotal, tax, shipping, and grand total."""
+def _cart_page_context(request) -> dict:
+    """Cart lines with subtotal, tax, shipping and grand total (sync: session + ORM)."""
     cart = Cart(request)
 
-    # hydrate from DB if session empty
+    # hydrate from DB if session empty (an anonymous visitor without a cart has no rows)
     if request.user.is_authenticated:
-        qs = CartItem.objects.filter(user=request.user).select_related("product")
+        qs = CartItem.objects.filter(user=request.user)
     else:
-        sk = request.session.session_key
-        if not sk:
-            request.session.create()
-            sk = request.session.session_key
-        qs = CartItem.objects.filter(session_key=sk).select_related("product")
+        sk = cart_owner(request)
+        qs = CartItem.objects.filter(session_key=sk) if sk else CartItem.objects.none()
 
-    if not request.session.get("cart") and qs.exists():
-        for row in qs:
-            cart.add(row.product_id, qty=row.quantity, update=True)
-        request.session.modified = True
+    if not len(cart):
+        for product_id, quantity in qs.values_list("product_id", "quantity"):
+            cart.add(product_id, qty=quantity, update=True)
 
     # totals
     subtotal = Decimal("0.00")
@@ -154,17 +143,19 @@ def view_cart(request):
 
     grand_total = (subtotal + tax_amount + shipping_amount).quantize(Decimal("0.01"))
 
-    return render(
-        request,
-        "cart/view.html",
-        {
-            "cart": cart,
-            "cart_total": subtotal,            # legacy
-            "cart_subtotal": subtotal,
-            "tax_rate_pct": (TAX_RATE * 100).quantize(Decimal("0.01")),
-            "tax_amount": tax_amount,
-            "shipping_amount": shipping_amount,
-            "shipping_free_note": shipping_free_note,
-            "grand_total": grand_total,
-        },
-    )
+    return {
+        "cart": cart,
+        "cart_total": subtotal,            # legacy
+        "cart_subtotal": subtotal,
+        "tax_rate_pct": (TAX_RATE * 100).quantize(Decimal("0.01")),
+        "tax_amount": tax_amount,
+        "shipping_amount": shipping_amount,
+        "shipping_free_note": shipping_free_note,
+        "grand_total": grand_total,
+    }
+
+
+async def view_cart(request):
+    """Render the cart with subtotal, tax, shipping, and grand total."""
+    context = await sync_to_async(_cart_page_context)(request)
+    return await arender(request, "cart/view.html", context)
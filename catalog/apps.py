@@ -5,3 +5,5 @@ class CatalogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'catalog'
 
+    def ready(self):
+        from . import signals  # noqa
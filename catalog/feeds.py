@@ -0,0 +1,398 @@
+# catalog/feeds.py
+"""
+Streaming catalog import/export and stock/price sync (CSV or JSON Lines).
+
+One record per product:
+
+    sku, name, category, description, price, stock, is_active, is_featured, images
+
+`category` is a category name (created if missing) and `images` a list of
+media-relative paths ("a.jpg|b.jpg" in CSV). Rows are matched on `sku`;
+rows without one are new products and get a SKU derived from a pre-allocated
+pk, so every product is written by a single bulk INSERT. Slugs are
+de-duplicated against the database and the file before anything is written.
+"""
+import csv
+import hashlib
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from core.utils.bulk import allocate_ids, allocate_slug, chunked, update_rows
+from .models import Category, Product, ProductImage
+from .signals import catalog_changed
+
+FIELDS = ["sku", "name", "category", "description", "price", "stock", "is_active", "is_featured", "images"]
+UPDATABLE = ["name", "category_id", "description", "price", "stock", "is_active", "is_featured"]
+
+_TRUE = {"1", "true", "yes", "y", "t"}
+
+
+class RowError(ValueError):
+    pass
+
+
+# ----------------------- reading / writing -----------------------
+
+def guess_format(path: str) -> str:
+    return "jsonl" if path.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def iter_records(fh, fmt: str):
+    """Yield (line_no, dict) from an open text file, one record at a time."""
+    if fmt == "jsonl":
+        for line_no, line in enumerate(fh, start=1):
+            if line.strip():
+                yield line_no, json.loads(line)
+    else:
+        reader = csv.DictReader(fh)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def export_records(queryset=None, chunk_size: int = 2000):
+    """Yield one dict per product in FIELDS order, streaming from the database."""
+    qs = queryset if queryset is not None else Product.objects.all()
+    qs = qs.select_related("category").prefetch_related("images").order_by("id")
+    for p in qs.iterator(chunk_size=chunk_size):
+        yield {
+            "sku": p.sku,
+            "name": p.name,
+            "category": p.category.name if p.category else "",
+            "description": p.description,
+            "price": str(p.price),
+            "stock": p.stock,
+            "is_active": p.is_active,
+            "is_featured": p.is_featured,
+            "images": [img.image.name for img in p.images.all()],
+        }
+
+
+def write_records(records, fh, fmt: str) -> int:
+    n = 0
+    if fmt == "jsonl":
+        for rec in records:
+            fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            n += 1
+        return n
+    writer = csv.DictWriter(fh, fieldnames=FIELDS)
+    writer.writeheader()
+    for rec in records:
+        writer.writerow({**rec, "images": "|".join(rec["images"]),
+                         "is_active": int(rec["is_active"]), "is_featured": int(rec["is_featured"])})
+        n += 1
+    return n
+
+
+# ----------------------- import -----------------------
+
+def _bool(value, default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in _TRUE
+
+
+def _images(value):
+    if value is None or value == "":
+        return None  # column absent/empty: leave existing images alone
+    if isinstance(value, str):
+        value = value.split("|")
+    return [v.strip() for v in value if v and v.strip()]
+
+
+def clean_record(rec: dict) -> dict:
+    name = (rec.get("name") or "").strip()
+    if not name:
+        raise RowError("name is required")
+    try:
+        price = Decimal(str(rec.get("price")).strip())
+    except (InvalidOperation, TypeError):
+        raise RowError(f"bad price {rec.get('price')!r}")
+    try:
+        stock = int(rec.get("stock") or 0)
+    except (TypeError, ValueError):
+        raise RowError(f"bad stock {rec.get('stock')!r}")
+    if price < 0 or stock < 0:
+        raise RowError("price and stock must be >= 0")
+    return {
+        "sku": (rec.get("sku") or "").strip(),
+        "name": name,
+        "category": (rec.get("category") or "").strip(),
+        "description": rec.get("description") or "",
+        "price": price.quantize(Decimal("0.01")),
+        "stock": stock,
+        "is_active": _bool(rec.get("is_active"), True),
+        "is_featured": _bool(rec.get("is_featured"), False),
+        "images": _images(rec.get("images")),
+    }
+
+
+class CatalogImporter:
+    """
+    Batched upsert of catalog records. Per batch: one SELECT for existing SKUs,
+    one bulk_create for new products, one bulk_update for changed ones and
+    one bulk_create/delete for image rows.
+
+    With dry_run=True everything runs inside a transaction that is rolled
+    back, so the reported diff is exactly what a real run would write.
+    """
+
+    def __init__(self, batch_size: int = 2000, dry_run: bool = False, diff=None):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.diff = diff or (lambda line: None)
+        self.stats = {"created": 0, "updated": 0, "unchanged": 0, "categories": 0, "images": 0, "errors": 0}
+        self.errors = []
+        self._categories = None
+        self._cat_slugs = None
+        self._slugs = None
+        self._seen_skus = set()
+
+    # ---------- helpers ----------
+
+    def _error(self, line_no, msg):
+        self.stats["errors"] += 1
+        self.errors.append(f"line {line_no}: {msg}")
+
+    def _category_ids(self, names) -> dict:
+        if self._categories is None:
+            self._categories = dict(Category.objects.values_list("name", "id"))
+            self._cat_slugs = set(Category.objects.values_list("slug", flat=True))
+        missing = sorted({n for n in names if n and n not in self._categories})
+        if missing:
+            max_length = Category._meta.get_field("slug").max_length
+            objs = [
+                Category(pk=pk, name=name, slug=allocate_slug(slugify(name), self._cat_slugs, max_length))
+                for pk, name in zip(allocate_ids(Category, len(missing)), missing)
+            ]
+            Category.objects.bulk_create(objs)
+            for obj in objs:
+                self._categories[obj.name] = obj.pk
+                self.diff(f"+ category {obj.name}")
+            self.stats["categories"] += len(objs)
+        return self._categories
+
+    def _slug(self, name: str) -> str:
+        if self._slugs is None:
+            self._slugs = set(Product.objects.values_list("slug", flat=True))
+        return allocate_slug(slugify(name), self._slugs, Product._meta.get_field("slug").max_length)
+
+    # ---------- batches ----------
+
+    def _import_batch(self, batch):
+        cats = self._category_ids(rec["category"] for _, rec in batch)
+        skus = [rec["sku"] for _, rec in batch if rec["sku"]]
+        existing = {p.sku: p for p in Product.objects.filter(sku__in=skus)}
+
+        new, changed, image_sets = [], [], {}
+        for line_no, rec in batch:
+            category_id = cats.get(rec["category"]) if rec["category"] else None
+            values = {k: rec[k] for k in UPDATABLE if k != "category_id"}
+            values["category_id"] = category_id
+            product = existing.get(rec["sku"])
+            if product is None:
+                new.append((rec, values))
+                continue
+            fields = [f for f in UPDATABLE if getattr(product, f) != values[f]]
+            if fields:
+                for f in fields:
+                    self.diff(f"~ {product.sku} {f}: {getattr(product, f)} -> {values[f]}")
+                    setattr(product, f, values[f])
+                changed.append(product)
+            else:
+                self.stats["unchanged"] += 1
+            if rec["images"] is not None:
+                image_sets[product.pk] = rec["images"]
+
+        created = []
+        for pk, (rec, values) in zip(allocate_ids(Product, len(new)), new):
+            category_name = rec["category"] or None
+            product = Product(
+                pk=pk, slug=self._slug(rec["name"]),
+                sku=rec["sku"] or Product.sku_for(pk, category_name, rec["name"]),
+                **values,
+            )
+            self.diff(f"+ {product.sku} {product.name}")
+            created.append(product)
+            if rec["images"]:
+                image_sets[pk] = rec["images"]
+
+        now = timezone.now()
+        for product in changed:
+            product.updated_at = now  # bulk_update skips auto_now
+        Product.objects.bulk_create(created, batch_size=self.batch_size)
+        Product.objects.bulk_update(changed, UPDATABLE + ["updated_at"], batch_size=self.batch_size)
+        self._sync_images(image_sets, created_ids={p.pk for p in created})
+        self.stats["created"] += len(created)
+        self.stats["updated"] += len(changed)
+
+    def _sync_images(self, image_sets: dict, created_ids=()):
+        """Make each product's image rows match the listed paths (order preserved)."""
+        if not image_sets:
+            return
+        current = {}
+        for pid, name in ProductImage.objects.filter(product_id__in=image_sets).values_list("product_id", "image"):
+            current.setdefault(pid, []).append(name)
+        replace = [pid for pid, paths in image_sets.items() if current.get(pid, []) != paths]
+        if not replace:
+            return
+        ProductImage.objects.filter(product_id__in=replace).delete()
+        rows = [
+            ProductImage(product_id=pid, image=path, sort_order=i)
+            for pid in replace for i, path in enumerate(image_sets[pid])
+        ]
+        ProductImage.objects.bulk_create(rows, batch_size=self.batch_size)
+        Product.refresh_covers(replace)  # bulk_create skips the ProductImage signals
+        self.stats["images"] += len(rows)
+        for pid in replace:
+            if pid not in created_ids:
+                self.diff(f"~ product {pid} images: {len(current.get(pid, []))} -> {len(image_sets[pid])}")
+
+    def run(self, records) -> dict:
+        """records: iterable of (line_no, raw dict)."""
+        def cleaned():
+            for line_no, raw in records:
+                try:
+                    rec = clean_record(raw)
+                except RowError as e:
+                    self._error(line_no, e)
+                    continue
+                if rec["sku"]:
+                    if rec["sku"] in self._seen_skus:
+                        self._error(line_no, f"duplicate sku {rec['sku']!r} in file")
+                        continue
+                    self._seen_skus.add(rec["sku"])
+                yield line_no, rec
+
+        with transaction.atomic():
+            for batch in chunked(cleaned(), self.batch_size):
+                self._import_batch(batch)
+            if self.dry_run:
+                transaction.set_rollback(True)
+        if not self.dry_run and (self.stats["created"] or self.stats["updated"] or self.stats["images"]):
+            catalog_changed.send(sender=CatalogImporter, product_ids=None)
+        return self.stats
+
+
+# ----------------------- stock / price sync -----------------------
+
+def feed_hash(stock: int, price) -> str:
+    """Stable hash of the feed values for one SKU (price None = not in the feed)."""
+    raw = f"{stock}|{'' if price is None else price}"
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def clean_stock_record(rec: dict) -> tuple:
+    sku = (rec.get("sku") or "").strip()
+    if not sku:
+        raise RowError("sku is required")
+    try:
+        stock = int(rec.get("stock"))
+    except (TypeError, ValueError):
+        raise RowError(f"bad stock {rec.get('stock')!r}")
+    price = rec.get("price")
+    if price is None or price == "":
+        price = None
+    else:
+        try:
+            price = Decimal(str(price).strip()).quantize(Decimal("0.01"))
+        except InvalidOperation:
+            raise RowError(f"bad price {rec.get('price')!r}")
+    if stock < 0 or (price is not None and price < 0):
+        raise RowError("price and stock must be >= 0")
+    return sku, stock, price
+
+
+class StockSync:
+    """
+    Apply an ERP stock/price feed, writing only rows whose feed hash changed.
+
+    Per batch: one SELECT (sku -> id, feed_hash). Changed rows sharing the same
+    new values become one `UPDATE ... WHERE id IN (...)`; the remaining
+    one-off values go out as a single executemany() of per-row UPDATEs.
+
+    The hash records the last *feed* values applied, so a manual admin edit is
+    kept until the feed itself changes for that SKU; use force=True for a full
+    re-apply.
+    """
+
+    def __init__(self, batch_size: int = 5000, dry_run: bool = False, force: bool = False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.force = force
+        self.stats = {"rows": 0, "changed": 0, "unchanged": 0, "unknown": 0, "errors": 0,
+                      "grouped_updates": 0, "row_updates": 0}
+        self.errors = []
+        self.changed_ids = []
+
+    def _sync_batch(self, batch):
+        current = {
+            sku: (pk, h) for sku, pk, h in
+            Product.objects.filter(sku__in=[r[0] for r in batch]).values_list("sku", "id", "feed_hash")
+        }
+        groups = {}
+        for sku, stock, price in batch:
+            row = current.get(sku)
+            if row is None:
+                self.stats["unknown"] += 1
+                continue
+            pk, old_hash = row
+            new_hash = feed_hash(stock, price)
+            if new_hash == old_hash and not self.force:
+                self.stats["unchanged"] += 1
+                continue
+            groups.setdefault((stock, price, new_hash), []).append(pk)
+
+        now = timezone.now()
+        with_price, stock_only = [], []
+        for (stock, price, new_hash), ids in groups.items():
+            self.changed_ids.extend(ids)
+            self.stats["changed"] += len(ids)
+            if len(ids) == 1:
+                if price is None:
+                    stock_only.append((ids[0], stock, new_hash, now))
+                else:
+                    with_price.append((ids[0], stock, price, new_hash, now))
+                continue
+            values = {"stock": stock, "feed_hash": new_hash, "updated_at": now}
+            if price is not None:
+                values["price"] = price
+            if not self.dry_run:
+                Product.objects.filter(pk__in=ids).update(**values)
+            self.stats["grouped_updates"] += 1
+
+        if not self.dry_run:
+            update_rows(Product, ["stock", "price", "feed_hash", "updated_at"], with_price)
+            update_rows(Product, ["stock", "feed_hash", "updated_at"], stock_only)
+        self.stats["row_updates"] += len(with_price) + len(stock_only)
+
+    def run(self, records) -> dict:
+        """records: iterable of (line_no, raw dict)."""
+        def cleaned():
+            seen = set()
+            for line_no, raw in records:
+                self.stats["rows"] += 1
+                try:
+                    sku, stock, price = clean_stock_record(raw)
+                except RowError as e:
+                    self.stats["errors"] += 1
+                    self.errors.append(f"line {line_no}: {e}")
+                    continue
+                if sku in seen:
+                    self.stats["errors"] += 1
+                    self.errors.append(f"line {line_no}: duplicate sku {sku!r} in file")
+                    continue
+                seen.add(sku)
+                yield sku, stock, price
+
+        with transaction.atomic():
+            for batch in chunked(cleaned(), self.batch_size):
+                self._sync_batch(batch)
+        if self.changed_ids and not self.dry_run:
+            catalog_changed.send(sender=StockSync, product_ids=self.changed_ids)
+        return self.stats
@@ -0,0 +1,34 @@
+# catalog/management/commands/export_catalog.py
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.feeds import export_records, guess_format, write_records
+from catalog.models import Product
+
+
+class Command(BaseCommand):
+    help = "Stream products (with category names and image paths) to CSV or JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default="-", help="Output file, or - for stdout (default).")
+        parser.add_argument("--format", choices=["csv", "jsonl"], default=None,
+                            help="Defaults to the file extension (csv otherwise).")
+        parser.add_argument("--active-only", action="store_true")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **opts):
+        path = opts["path"]
+        fmt = opts["format"] or ("csv" if path == "-" else guess_format(path))
+        qs = Product.objects.all()
+        if opts["active_only"]:
+            qs = qs.filter(is_active=True)
+
+        records = export_records(qs, chunk_size=opts["chunk_size"])
+        if path == "-":
+            write_records(records, self.stdout, fmt)
+            return
+        try:
+            with open(path, "w", newline="", encoding="utf-8") as fh:
+                n = write_records(records, fh, fmt)
+        except OSError as e:
+            raise CommandError(e)
+        self.stderr.write(f"exported {n} products to {path}")
@@ -0,0 +1,48 @@
+# catalog/management/commands/import_catalog.py
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.feeds import CatalogImporter, guess_format, iter_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert products, categories and image references from a CSV or JSONL file "
+        "(matched on SKU). Use --dry-run to print the diff without writing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to read, or - for stdin.")
+        parser.add_argument("--format", choices=["csv", "jsonl"], default=None,
+                            help="Defaults to the file extension (csv otherwise).")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Roll everything back and print what would change.")
+
+    def handle(self, *args, **opts):
+        path = opts["path"]
+        fmt = opts["format"] or ("csv" if path == "-" else guess_format(path))
+        show_diff = opts["dry_run"] or opts["verbosity"] > 1
+        importer = CatalogImporter(
+            batch_size=opts["batch_size"],
+            dry_run=opts["dry_run"],
+            diff=self.stdout.write if show_diff else None,
+        )
+
+        started = time.perf_counter()
+        try:
+            fh = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        except OSError as e:
+            raise CommandError(e)
+        with fh:
+            stats = importer.run(iter_records(fh, fmt))
+        elapsed = time.perf_counter() - started
+
+        for line in importer.errors[:50]:
+            self.stderr.write(line)
+        if len(importer.errors) > 50:
+            self.stderr.write(f"... {len(importer.errors) - 50} more errors")
+        label = "dry run (rolled back)" if opts["dry_run"] else "imported"
+        self.stdout.write(self.style.SUCCESS(f"{label} in {elapsed:.2f}s: {stats}"))
@@ -0,0 +1,44 @@
+# catalog/management/commands/sync_stock.py
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.feeds import StockSync, guess_format, iter_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply an ERP stock/price feed (columns: sku, stock[, price]) in CSV or JSONL. "
+        "Only rows whose values changed since the last sync are written."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Feed file, or - for stdin.")
+        parser.add_argument("--format", choices=["csv", "jsonl"], default=None,
+                            help="Defaults to the file extension (csv otherwise).")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--dry-run", action="store_true", help="Report counts without writing.")
+        parser.add_argument("--force", action="store_true",
+                            help="Ignore stored hashes and re-apply every row.")
+
+    def handle(self, *args, **opts):
+        path = opts["path"]
+        fmt = opts["format"] or ("csv" if path == "-" else guess_format(path))
+        sync = StockSync(batch_size=opts["batch_size"], dry_run=opts["dry_run"], force=opts["force"])
+
+        started = time.perf_counter()
+        try:
+            fh = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        except OSError as e:
+            raise CommandError(e)
+        with fh:
+            stats = sync.run(iter_records(fh, fmt))
+        elapsed = time.perf_counter() - started
+
+        for line in sync.errors[:50]:
+            self.stderr.write(line)
+        if len(sync.errors) > 50:
+            self.stderr.write(f"... {len(sync.errors) - 50} more errors")
+        label = "dry run" if opts["dry_run"] else "synced"
+        self.stdout.write(self.style.SUCCESS(f"{label} in {elapsed:.2f}s: {stats}"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-19 06:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_productattachment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='feed_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.15 on 2026-10-19 06:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_product_feed_hash'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='productimage',
+            options={'ordering': ('sort_order', 'id')},
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='cover_alt',
+            field=models.CharField(blank=True, editable=False, max_length=140),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='cover_image',
+            field=models.ImageField(blank=True, editable=False, upload_to='products/%Y/%m/'),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='sort_order',
+            field=models.PositiveIntegerField(default=0, help_text='Lowest first; the first image is the cover.'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def backfill_covers(apps, schema_editor):
+    Product = apps.get_model("catalog", "Product")
+    ProductImage = apps.get_model("catalog", "ProductImage")
+
+    covers = {}
+    for pid, image, alt in (
+        ProductImage.objects.order_by("product_id", "sort_order", "id")
+        .values_list("product_id", "image", "alt")
+    ):
+        covers.setdefault(pid, (image, alt))
+
+    batch = []
+    for product in Product.objects.filter(pk__in=covers).only("id"):
+        product.cover_image, product.cover_alt = covers[product.pk]
+        batch.append(product)
+    Product.objects.bulk_update(batch, ["cover_image", "cover_alt"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_product_cover_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_covers, migrations.RunPython.noop),
+    ]
@@ -1,19 +1,35 @@
-from django.db import models
+from django.db import connections, models, router
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import slugify
 from pathlib import Path
 
+from core.utils.bulk import allocate_ids, allocate_slug, update_rows
+
+
+def _unique_slug(model, instance, source) -> str:
+    """slugify(source), suffixed -2, -3, ... if another row already uses it."""
+    # A name of only symbols / non-Latin text slugifies to "": never filter on startswith("")
+    base = slugify(source) or model._meta.model_name
+    max_length = model._meta.get_field("slug").max_length
+    taken = set(
+        model.objects.filter(slug__startswith=base[:max_length - 4])
+        .exclude(pk=instance.pk).values_list("slug", flat=True)
+    )
+    return allocate_slug(base, taken, max_length)
+
 
 class Category(models.Model):
     name = models.CharField(max_length=120, unique=True)
     slug = models.SlugField(max_length=140, unique=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Categories"
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
+            self.slug = _unique_slug(Category, self, self.name)
         return super().save(*args, **kwargs)
 
     def __str__(self):
@@ -39,32 +55,102 @@ class Product(models.Model):
     is_active = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Hash of the stock/price last applied by sync_stock; unchanged feed rows are skipped
+    feed_hash = models.CharField(max_length=32, blank=True, editable=False)
+
+    # Copy of the first ProductImage (by sort_order), kept in sync by catalog.signals,
+    # so listings can show a thumbnail without prefetching every image.
+    cover_image = models.ImageField(upload_to="products/%Y/%m/", blank=True, editable=False)
+    cover_alt = models.CharField(max_length=140, blank=True, editable=False)
+
+    class Meta:
+        # Partial: filter(is_active=True) compiles to a bare `WHERE "is_active"`,
+        # which a plain (is_active, ...) index can't serve on SQLite.
+        indexes = [
+            models.Index(fields=["-created_at"], condition=models.Q(is_active=True),
+                         name="product_active_created_idx"),
+            models.Index(fields=["-created_at"], condition=models.Q(is_active=True, is_featured=True),
+                         name="product_featured_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # stock as loaded, so a stock-only save can tell whether availability flipped
+        instance._loaded_stock = instance.__dict__.get("stock")
+        return instance
 
     # ---------- helpers ----------
-    def _gen_sku_base(self) -> str:
-        base = (self.category.name if self.category else self.name or "SKU")
+    @staticmethod
+    def sku_base_for(category_name, name) -> str:
+        base = (category_name or name or "SKU")
         base = "".join(ch for ch in base.upper() if ch.isalnum())
         return (base[:3] or "SKU")
 
+    @classmethod
+    def sku_for(cls, pk: int, category_name, name) -> str:
+        """SKU for a known pk, e.g. CAT-000123 (used by bulk loaders with pre-allocated ids)."""
+        return f"{cls.sku_base_for(category_name, name)}-{pk:06d}"
+
+    def _gen_sku_base(self) -> str:
+        return self.sku_base_for(self.category.name if self.category else None, self.name)
+
     def _ensure_slug(self):
         if not self.slug:
-            self.slug = slugify(self.name)
+            self.slug = _unique_slug(Product, self, self.name)
 
     def _ensure_sku(self):
         if not self.sku and self.pk:
-            self.sku = f"{self._gen_sku_base()}-{self.pk:06d}"
+            self.sku = self.sku_for(self.pk, self.category.name if self.category else None, self.name)
 
     # ---------- save ----------
     def save(self, *args, **kwargs):
         creating = self.pk is None
         self._ensure_slug()
+        using = kwargs.get("using") or router.db_for_write(Product, instance=self)
+        if creating and not self.sku and connections[using].vendor == "postgresql":
+            # reserve the pk from the sequence so the SKU goes in with the INSERT
+            self.pk = allocate_ids(Product, 1, using=using)[0]
+            self._ensure_sku()
+            kwargs["force_insert"] = True
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "updated_at" not in update_fields:
+            # auto_now only applies to listed fields; a partial save (checkout's stock)
+            # still changes the page, so its ETag/Last-Modified must move too
+            kwargs["update_fields"] = [*update_fields, "updated_at"]
         result = super().save(*args, **kwargs)
         if creating and not self.sku:
             self._ensure_sku()
             super(Product, self).save(update_fields=["sku"])
         return result
 
+    # ---------- cover image ----------
+    @classmethod
+    def refresh_covers(cls, product_ids) -> int:
+        """Recompute cover_image/cover_alt for the given products (2 queries per call); touches updated_at."""
+        product_ids = set(product_ids)
+        if not product_ids:
+            return 0
+        covers = {}
+        rows = (
+            ProductImage.objects.filter(product_id__in=product_ids)
+            .order_by("product_id", "sort_order", "id")
+            .values_list("product_id", "image", "alt")
+        )
+        for pid, image, alt in rows:
+            covers.setdefault(pid, (image, alt))
+        now = timezone.now()
+        return update_rows(cls, ["cover_image", "cover_alt", "updated_at"], [
+            (pid, *covers.get(pid, ("", "")), now) for pid in product_ids
+        ])
+
     # ---------- misc ----------
+    @property
+    def in_stock(self) -> bool:
+        return (self.stock or 0) > 0
+
     def get_absolute_url(self):
         return reverse("catalog:product_detail", args=[self.slug])
 
@@ -76,6 +162,10 @@ class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="products/%Y/%m/")
     alt = models.CharField(max_length=140, blank=True)
+    sort_order = models.PositiveIntegerField(default=0, help_text="Lowest first; the first image is the cover.")
+
+    class Meta:
+        ordering = ("sort_order", "id")
 
     def __str__(self):
         return f"Image for {self.product.name}"
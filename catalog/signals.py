@@ -0,0 +1,53 @@
+# catalog/signals.py
+"""
+catalog_changed is sent after bulk writes that bypass Product.save()
+(import_catalog, sync_stock), with product_ids=[...] or None for "anything".
+It bumps the "catalog" content version (core.utils.versions) that cached
+catalog fragments are keyed on; per-row saves bump it through post_save.
+Stock-only saves (checkout) bump "stock" instead, and only when the product
+goes in or out of stock: that's all the markup shows.
+
+ProductImage saves/deletes keep Product.cover_image in step with the first image;
+image and attachment changes also touch Product.updated_at (page Last-Modified).
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from core.utils import versions
+
+catalog_changed = Signal()
+
+
+@receiver(catalog_changed)
+def invalidate_catalog_cache(sender, product_ids=None, **kwargs):
+    versions.bump("catalog")
+
+
+@receiver(post_save, sender="catalog.Product")
+def bump_stock_version(sender, instance, update_fields=None, **kwargs):
+    if not update_fields or not versions.UNVERSIONED_FIELDS["catalog.Product"].issuperset(update_fields):
+        return  # a full save bumps "catalog", which every stock-dependent page depends on too
+    was = getattr(instance, "_loaded_stock", None)
+    if was is None or (was > 0) != ((instance.stock or 0) > 0):
+        versions.bump("stock")
+    instance._loaded_stock = instance.stock
+
+
+# ---------- cover image ----------
+
+@receiver(post_save, sender="catalog.ProductImage")
+@receiver(post_delete, sender="catalog.ProductImage")
+def sync_cover_image(sender, instance, **kwargs):
+    from .models import Product
+
+    # Also fires for cascade deletes of a whole product; the UPDATE then matches no row.
+    Product.refresh_covers([instance.product_id])
+
+
+@receiver(post_save, sender="catalog.ProductAttachment")
+@receiver(post_delete, sender="catalog.ProductAttachment")
+def touch_product(sender, instance, **kwargs):
+    from .models import Product
+
+    Product.objects.filter(pk=instance.product_id).update(updated_at=timezone.now())
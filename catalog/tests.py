@@ -1,3 +1,258 @@
+import ast
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.utils import versions
+from core.utils.queries import QueryBudgetMixin
+from .feeds import CatalogImporter, iter_records
+from .models import Category, Product, ProductImage
+
+
+class ProductListQueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cat = Category.objects.create(name="Drones")
+        for i in range(12):
+            Product.objects.create(category=cat, name=f"Drone {i}", price=Decimal("10.00"), stock=1)
+
+    # Anonymous browsing touches no session: only the page's own queries.
+    def test_product_list_budget(self):
+        self.assertViewQueryBudget(reverse("catalog:product_list"), 1, status_code=200)
+
+    def test_home_budget(self):
+        self.assertViewQueryBudget(reverse("core:home"), 3, status_code=200)
+
+    def test_category_page_lists_only_its_products(self):
+        other = Category.objects.create(name="Sensors")
+        Product.objects.create(category=other, name="Lidar", price=Decimal("10.00"), stock=1)
+        response = self.client.get(reverse("catalog:category", args=[other.slug]))
+        self.assertEqual([p.name for p in response.context["products"]], ["Lidar"])
+        self.assertEqual(self.client.get(reverse("catalog:category", args=["nope"])).status_code, 404)
+
+
+class CoverImageSyncTests(TestCase):
+    def test_cover_follows_first_image(self):
+        product = Product.objects.create(name="Gimbal", price=Decimal("5.00"))
+        second = ProductImage.objects.create(product=product, image="products/b.jpg", sort_order=2)
+        first = ProductImage.objects.create(product=product, image="products/a.jpg", alt="Front", sort_order=1)
+        product.refresh_from_db()
+        self.assertEqual((product.cover_image.name, product.cover_alt), ("products/a.jpg", "Front"))
+
+        first.delete()
+        product.refresh_from_db()
+        self.assertEqual(product.cover_image.name, second.image.name)
+
+        second.delete()
+        product.refresh_from_db()
+        self.assertFalse(product.cover_image)
+
+
+class StockVersionTests(TestCase):
+    def test_purchases_keep_product_cards_cached_until_sold_out(self):
+        cache.clear()
+        Product.objects.create(name="Rotor", price=Decimal("5.00"), stock=2)
+        url = reverse("catalog:product_list")
+        self.assertContains(self.client.get(url), "Add to Cart")
+        before = versions.get_versions("catalog", "stock")
+
+        product = Product.objects.get(name="Rotor")  # as checkout loads it
+        product.stock = 1
+        product.save(update_fields=["stock"])
+        self.assertEqual(versions.get_versions("catalog", "stock"), before)  # still in stock
+        catalog, stock = before["catalog"], before["stock"]
+
+        product.stock = 0
+        product.save(update_fields=["stock"])
+        self.assertEqual(versions.get_version("catalog"), catalog)
+        self.assertNotEqual(versions.get_version("stock"), stock)
+        self.client.cookies.clear()
+        self.assertContains(self.client.get(url), "Out of Stock")
+
+
+class SlugTests(TestCase):
+    def test_unsluggable_names_fall_back_to_the_model_name(self):
+        with CaptureQueriesContext(connection) as queries:
+            first = Product.objects.create(name="★★★", price=Decimal("1.00"))
+        self.assertIn("LIKE 'product%'", queries[0]["sql"])  # not every slug in the table
+        second = Product.objects.create(name="ड्रोन", price=Decimal("1.00"))
+        self.assertEqual((first.slug, second.slug), ("product", "product-2"))
+
+
+class FeedFileMixin:
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+
+    def feed(self, name, text):
+        path = self.tmp / name
+        path.write_text(text, encoding="utf-8")
+        return str(path)
+
+
+class CatalogImportExportTests(FeedFileMixin, TestCase):
+    def _import(self, path, fmt):
+        importer = CatalogImporter()
+        with open(path, newline="", encoding="utf-8") as fh:
+            return importer, importer.run(iter_records(fh, fmt))
+
+    def test_export_then_import_changes_nothing(self):
+        drones = Category.objects.create(name="Drones")
+        rotor = Product.objects.create(category=drones, name="Rotor", price=Decimal("12.50"), stock=3)
+        ProductImage.objects.create(product=rotor, image="products/rotor.jpg")
+        Product.objects.create(name="Manual", description="a, \"quoted\"\nline", price=Decimal("1.00"),
+                               is_featured=True)
+        stamps = dict(Product.objects.values_list("sku", "updated_at"))
+        version = versions.get_version("catalog")
+
+        for fmt in ("csv", "jsonl"):
+            with self.subTest(fmt):
+                path = str(self.tmp / f"catalog.{fmt}")
+                call_command("export_catalog", path, stdout=StringIO(), stderr=StringIO())
+                _, stats = self._import(path, fmt)
+                self.assertEqual(stats, {"created": 0, "updated": 0, "unchanged": 2,
+                                         "categories": 0, "images": 0, "errors": 0})
+        self.assertEqual(dict(Product.objects.values_list("sku", "updated_at")), stamps)
+        self.assertEqual(versions.get_version("catalog"), version)
+
+    def test_dry_run_writes_nothing(self):
+        rotor = Product.objects.create(name="Rotor", price=Decimal("12.50"), stock=3)
+        path = self.feed("catalog.csv", (
+            "sku,name,category,price,stock\n"
+            f"{rotor.sku},Rotor,,14.00,3\n"
+            ",Gimbal,Cameras,99.00,1\n"
+        ))
+        version = versions.get_version("catalog")
+        out = StringIO()
+        call_command("import_catalog", path, "--dry-run", stdout=out)
+
+        self.assertIn(f"~ {rotor.sku} price: 12.50 -> 14.00", out.getvalue())
+        self.assertIn("Gimbal", out.getvalue())
+        self.assertEqual(list(Product.objects.values_list("name", "price")), [("Rotor", Decimal("12.50"))])
+        self.assertFalse(Category.objects.exists())
+        self.assertEqual(versions.get_version("catalog"), version)
+
+    def test_duplicate_names_get_numbered_slugs(self):
+        Product.objects.create(name="Drone Alpha", price=Decimal("1.00"))
+        path = self.feed("catalog.jsonl", (
+            '{"name": "Drone Alpha", "price": "2.00"}\n'
+            '{"name": "Drone  Alpha", "price": "3.00"}\n'
+        ))
+        _, stats = self._import(path, "jsonl")
+        self.assertEqual(stats["created"], 2)
+        self.assertEqual(
+            list(Product.objects.order_by("pk").values_list("slug", flat=True)),
+            ["drone-alpha", "drone-alpha-2", "drone-alpha-3"],
+        )
+
+    def test_bad_rows_are_counted_and_skipped(self):
+        path = self.feed("catalog.csv", (
+            "sku,name,price,stock\n"
+            "A-1,Rotor,1.00,1\n"
+            "A-2,,1.00,1\n"           # no name
+            "A-3,Frame,cheap,1\n"     # bad price
+            "A-4,Motor,1.00,-2\n"     # negative stock
+            "A-1,Rotor again,1.00,1\n"  # duplicate sku
+        ))
+        importer, stats = self._import(path, "csv")
+        self.assertEqual((stats["created"], stats["errors"]), (1, 4))
+        self.assertEqual([e.split(":")[0] for e in importer.errors], ["line 3", "line 4", "line 5", "line 6"])
+        self.assertEqual(list(Product.objects.values_list("sku", flat=True)), ["A-1"])
+
+
+class StockSyncTests(FeedFileMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for sku in ("S-1", "S-2", "S-3"):
+            Product.objects.create(sku=sku, name=f"Part {sku}", price=Decimal("10.00"), stock=5)
+        self.path = self.feed("stock.csv", "sku,stock,price\nS-1,7,\nS-2,0,12.00\nS-3,0,12.00\nNOPE,1,1.00\n")
+
+    def _sync(self, *flags):
+        out = StringIO()
+        call_command("sync_stock", self.path, *flags, stdout=out)
+        return ast.literal_eval(out.getvalue().split(": ", 1)[1])
+
+    def _state(self):
+        return list(Product.objects.order_by("sku").values_list("sku", "stock", "price", "updated_at"))
+
+    def test_applies_changes_and_skips_unchanged_rows(self):
+        before, version = self._state(), versions.get_version("catalog")
+        stats = self._sync()
+        self.assertEqual((stats["changed"], stats["unknown"], stats["grouped_updates"], stats["row_updates"]),
+                         (3, 1, 1, 1))
+        self.assertEqual([row[:3] for row in self._state()], [
+            ("S-1", 7, Decimal("10.00")), ("S-2", 0, Decimal("12.00")), ("S-3", 0, Decimal("12.00")),
+        ])
+        self.assertFalse(Product.objects.filter(sku="NOPE").exists())
+        for old, new in zip(before, self._state()):
+            self.assertGreater(new[3], old[3])
+        self.assertNotEqual(versions.get_version("catalog"), version)
+
+        state, version = self._state(), versions.get_version("catalog")
+        stats = self._sync()
+        self.assertEqual((stats["changed"], stats["unchanged"], stats["unknown"]), (0, 3, 1))
+        self.assertEqual(self._state(), state)  # updated_at included
+        self.assertEqual(versions.get_version("catalog"), version)
+
+    def test_force_reapplies_over_manual_edits(self):
+        self._sync()
+        Product.objects.filter(sku="S-1").update(stock=99)  # admin edit: kept by a normal sync
+        self.assertEqual(self._sync()["changed"], 0)
+        self.assertEqual(Product.objects.get(sku="S-1").stock, 99)
+
+        version = versions.get_version("catalog")
+        self.assertEqual(self._sync("--force")["changed"], 3)
+        self.assertEqual(Product.objects.get(sku="S-1").stock, 7)
+        self.assertNotEqual(versions.get_version("catalog"), version)
+
+    def test_dry_run_writes_nothing(self):
+        state, version = self._state(), versions.get_version("catalog")
+        stats = self._sync("--dry-run")
+        self.assertEqual((stats["changed"], stats["unknown"]), (3, 1))
+        self.assertEqual(self._state(), state)
+        self.assertEqual(set(Product.objects.values_list("feed_hash", flat=True)), {""})
+        self.assertEqual(versions.get_version("catalog"), version)
+
+
+class ProductDetailConditionalGetTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name="Survey Drone", price=Decimal("99.00"), stock=3)
+        self.url = self.product.get_absolute_url()
+
+    def test_revalidation_returns_304_until_product_changes(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("Last-Modified", first)  # cookie-less first hit
+
+        etag = first["ETag"]
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.product.price = Decimal("89.00")
+        self.product.save()
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+
+    def test_stock_only_save_invalidates_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.product.stock = 0
+        self.product.save(update_fields=["stock"])  # as checkout does
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertContains(changed, "Out of Stock")
 
-# Create your tests here.
+    def test_cart_change_invalidates_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.client.post(reverse("cart:add", args=[self.product.pk]), {"quantity": 1})
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -1,18 +1,38 @@
-from django.shortcuts import render, get_object_or_404
-from .models import Product
+from django.shortcuts import aget_object_or_404
 
-def product_list(request):
+from core.utils.conditional import conditional_page
+from core.utils.offload import arender
+from core.utils.swr import cached_page
+from .models import Category, Product
+
+
+def _product_stamp(request, slug):
+    row = (
+        Product.objects.filter(slug=slug, is_active=True)
+        .values_list("updated_at", "category__updated_at").first()
+    )
+    return max(filter(None, row)) if row else None
+
+
+@cached_page(depends=("catalog", "stock"))
+async def product_list(request, category_slug=None):
     qs = (
         Product.objects.select_related("category")
-        .prefetch_related("images")
         .filter(is_active=True)
         .order_by("-created_at")
     )
-    return render(request, "catalog/product_list.html", {"products": qs})
+    category = None
+    if category_slug:
+        category = await aget_object_or_404(Category, slug=category_slug)
+        qs = qs.filter(category=category)
+    products = [p async for p in qs]
+    return await arender(request, "catalog/product_list.html", {"products": products, "category": category})
 
-def product_detail(request, slug):
-    product = get_object_or_404(
+@conditional_page(_product_stamp)
+@cached_page(depends=("catalog", "stock"))
+async def product_detail(request, slug):
+    product = await aget_object_or_404(
         Product.objects.select_related("category").prefetch_related("images"),
         slug=slug, is_active=True
     )
-    return render(request, "catalog/product_detail.html", {"product": product})
\ No newline at end of file
+    return await arender(request, "catalog/product_detail.html", {"product": product})
\ No newline at end of file
@@ -1,5 +1,14 @@
+import json
+from collections import Counter
+
 from django.contrib import admin
-from .models import PromoVideo
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+
+from core.utils.profiling import to_collapsed_text, to_speedscope
+from .models import PromoVideo, OutboxEmail, RequestProfile
 
 @admin.register(PromoVideo)
 class PromoVideoAdmin(admin.ModelAdmin):
@@ -7,3 +16,70 @@ class PromoVideoAdmin(admin.ModelAdmin):
     list_editable = ("is_active", "sort_order")
     search_fields = ("title", "subtitle", "youtube_url")
     list_filter = ("is_active",)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "status", "attempts", "created_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("subject", "last_error")
+    readonly_fields = ("attempts", "last_error", "created_at", "sent_at")
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ("view_name", "method", "status_code", "duration_ms", "sample_count",
+                    "trigger", "created_at", "downloads")
+    list_filter = ("view_name", "trigger", "method")
+    search_fields = ("view_name", "path", "request_id")
+    date_hierarchy = "created_at"
+    exclude = ("stacks",)
+    readonly_fields = ("view_name", "path", "method", "status_code", "duration_ms", "interval_ms",
+                       "sample_count", "trigger", "request_id", "created_at", "downloads", "hot_frames")
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        return [
+            path("<int:pk>/collapsed/", self.admin_site.admin_view(self.download_collapsed),
+                 name="core_requestprofile_collapsed"),
+            path("<int:pk>/speedscope/", self.admin_site.admin_view(self.download_speedscope),
+                 name="core_requestprofile_speedscope"),
+        ] + super().get_urls()
+
+    @admin.display(description="Download")
+    def downloads(self, obj):
+        return format_html(
+            '<a href="{}">collapsed</a> · <a href="{}">speedscope</a>',
+            reverse("admin:core_requestprofile_collapsed", args=[obj.pk]),
+            reverse("admin:core_requestprofile_speedscope", args=[obj.pk]),
+        )
+
+    @admin.display(description="Hottest frames (self samples)")
+    def hot_frames(self, obj):
+        leaves = Counter()
+        for stack, count in obj.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        rows = format_html_join(
+            "", "<tr><td>{}</td><td>{}</td><td>{}%</td></tr>",
+            ((frame, count, round(100 * count / total, 1)) for frame, count in leaves.most_common(25)),
+        )
+        return format_html("<table><tr><th>Frame</th><th>Samples</th><th>Share</th></tr>{}</table>", rows)
+
+    def _download(self, request, pk, body, content_type, ext):
+        if not self.has_view_permission(request):
+            return HttpResponse(status=403)
+        response = HttpResponse(body, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="profile-{pk}.{ext}"'
+        return response
+
+    def download_collapsed(self, request, pk):
+        obj = get_object_or_404(RequestProfile, pk=pk)
+        return self._download(request, pk, to_collapsed_text(obj.stacks), "text/plain", "folded")
+
+    def download_speedscope(self, request, pk):
+        obj = get_object_or_404(RequestProfile, pk=pk)
+        doc = to_speedscope(obj.stacks, f"{obj.method} {obj.view_name} #{obj.pk}", obj.interval_ms)
+        return self._download(request, pk, json.dumps(doc), "application/json", "speedscope.json")
@@ -4,3 +4,23 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Load logo/fonts/CSS once per process instead of once per email.
+        from .utils import assets
+        assets.preload()
+
+        # Content versions for the fragment cache ({% fragment %})
+        from .utils import versions
+        versions.connect_signals()
+
+        # A span per DB query while a request/job is being traced
+        from django.db.backends.signals import connection_created
+        from .utils import tracing
+        connection_created.connect(tracing.install_db_tracing, dispatch_uid="core.tracing.db")
+
+        # Re-render published static pages after admin edits
+        from django.conf import settings
+        if getattr(settings, "PUBLISH_ON_SAVE", False):
+            from core import publish
+            publish.connect_signals()
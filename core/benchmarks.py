@@ -0,0 +1,419 @@
+# core/benchmarks.py
+"""
+Benchmarks for the storefront hot paths, driven by `manage.py bench`.
+
+- seed(scale, seed)      deterministic catalog / users / addresses
+- micro benchmarks       Cart.__iter__, calculate_totals, each PDF engine
+- HTTP load              browse -> product -> add to cart -> cart -> checkout
+                         -> pay -> verify, against an in-process threaded WSGI
+                         server with Razorpay stubbed and email kept in memory
+- write concurrency      mixed read / write transactions from 1..N threads, to
+                         see whether throughput scales past a single writer
+
+Everything returns plain dicts so runs can be saved as JSON and compared.
+"""
+import http.cookiejar
+import random
+import re
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import OperationalError, connections, transaction
+from django.db.models import F
+from django.test import RequestFactory
+
+from accounts.models import Address
+from catalog.models import Product
+from core.seeding import ScaleSeeder
+
+BENCH_PASSWORD = "bench-pass-123"
+
+
+# ----------------------- stats -----------------------
+
+def summarize(samples_ms, elapsed_s=None) -> dict:
+    """p50/p95/p99/mean/max in ms (+ throughput per second when elapsed_s is given)."""
+    if not samples_ms:
+        return {"n": 0}
+    ordered = sorted(samples_ms)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered))) - 1))]
+
+    out = {
+        "n": len(ordered),
+        "p50_ms": round(pct(50), 3),
+        "p95_ms": round(pct(95), 3),
+        "p99_ms": round(pct(99), 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+    if elapsed_s:
+        out["throughput_per_s"] = round(len(ordered) / elapsed_s, 2)
+    return out
+
+
+def timeit(fn, iterations: int) -> dict:
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return summarize(samples, time.perf_counter() - started)
+
+
+def compare(current: dict, baseline: dict, path=()):
+    """Yield (dotted.key, baseline, current, pct_change) for every p95 present in both runs."""
+    for key, value in current.items():
+        other = baseline.get(key) if isinstance(baseline, dict) else None
+        if isinstance(value, dict) and isinstance(other, dict):
+            yield from compare(value, other, path + (key,))
+        elif key == "p95_ms" and isinstance(other, (int, float)) and other:
+            yield ".".join(path + (key,)), other, value, round((value - other) / other * 100, 1)
+
+
+# ----------------------- seeding -----------------------
+
+def seed(scale: int = 1, seed: int = 42) -> dict:
+    """Deterministic catalog + shoppers via core.seeding (all users get BENCH_PASSWORD)."""
+    seeder = ScaleSeeder(seed=seed, password=BENCH_PASSWORD)
+    return seeder.run(
+        categories=10 * scale, products=200 * scale, images_per_product=2,
+        users=20 * scale, anon_carts=20 * scale, orders=100 * scale,
+    )
+
+
+# ----------------------- micro benchmarks -----------------------
+
+def _session_cart(n_items: int):
+    from cart.cart import Cart
+
+    request = RequestFactory().get("/")
+    request.session = SessionStore()
+    cart = Cart(request)
+    for pid in Product.objects.order_by("id").values_list("id", flat=True)[:n_items]:
+        cart.add(pid, qty=2)
+    return cart
+
+
+def bench_cart(iterations: int = 200, n_items: int = 10) -> dict:
+    from cart.cart import Cart
+    from orders.utils import calculate_totals
+
+    cart = _session_cart(n_items)
+
+    def iterate_fresh():
+        # new Cart each time: measures the product lookup, not the memoised map
+        list(Cart(cart.request))
+
+    rows = list(cart)
+    return {
+        "cart_iter": timeit(iterate_fresh, iterations),
+        "calculate_totals": timeit(lambda: calculate_totals(rows), iterations * 10),
+    }
+
+
+def _bench_order(n_items: int = 5):
+    from orders.models import Order, OrderItem
+
+    user = User.objects.filter(address__is_default=True).first()
+    order = Order.objects.create(
+        user=user, email=user.email, address=Address.objects.filter(user=user).first(),
+        subtotal=Decimal("100.00"), tax=Decimal("18.00"), shipping=Decimal("0.00"), total=Decimal("118.00"),
+    )
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product=p, price=p.price, quantity=1)
+        for p in Product.objects.order_by("id")[:n_items]
+    ])
+    return order
+
+
+def bench_pdf(iterations: int = 10) -> dict:
+    from core.utils import pdf
+    from orders.emails import build_invoice_context
+    from django.template.loader import get_template
+
+    ctx = build_invoice_context(_bench_order())
+    html = get_template("invoices/invoice_v2.html").render(ctx)
+
+    results = {"template_render": timeit(lambda: get_template("invoices/invoice_v2.html").render(ctx), iterations)}
+    for engine, render in pdf.HTML_ENGINES:
+        try:
+            render(html)
+        except Exception as e:
+            results[engine] = {"n": 0, "unavailable": f"{type(e).__name__}: {e}"[:200]}
+            continue
+        results[engine] = timeit(lambda: render(html), iterations)
+    results["reportlab"] = timeit(lambda: pdf._render_reportlab_invoice(ctx), iterations)
+    return results
+
+
+# ----------------------- HTTP load -----------------------
+
+class _FakeRazorpayClient:
+    """Stands in for razorpay.Client: instant order ids, signatures always valid."""
+
+    def __init__(self, *args, **kwargs):
+        self.order = self
+        self.utility = self
+
+    def create(self, data):
+        return {"id": f"order_bench_{uuid.uuid4().hex[:14]}", "amount": data.get("amount")}
+
+    def verify_payment_signature(self, params):
+        return True
+
+
+@contextmanager
+def stub_gateways():
+    """Razorpay -> fake client, email -> in-memory backend."""
+    from django.test.utils import override_settings
+
+    with mock.patch("razorpay.Client", _FakeRazorpayClient), \
+            override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+                              EMAIL_USE_OUTBOX=False):
+        from django.core import mail
+        mail.outbox = []
+        yield
+
+
+@contextmanager
+def live_server(host: str = "127.0.0.1", port: int = 0):
+    """Serve the project's WSGI app from a background thread; yields the base URL."""
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadedWSGIServer((host, port), QuietHandler, allow_reuse_address=True)
+    httpd.daemon_threads = True
+    httpd.set_app(WSGIHandler())
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://{host}:{httpd.server_address[1]}"
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+class _Browser:
+    """Cookie-keeping HTTP client that sends the CSRF header on POST."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.jar = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.jar))
+
+    def _csrf(self) -> str:
+        for cookie in self.jar:
+            if cookie.name == settings.CSRF_COOKIE_NAME:
+                return cookie.value
+        return ""
+
+    def request(self, path: str, data=None) -> str:
+        url = self.base_url + path
+        headers = {}
+        body = None
+        if data is not None:
+            token = self._csrf()
+            body = urllib.parse.urlencode({**data, "csrfmiddlewaretoken": token}).encode()
+            headers = {"X-CSRFToken": token, "Referer": url}
+        req = urllib.request.Request(url, data=body, headers=headers)
+        with self.opener.open(req, timeout=60) as resp:
+            return resp.read().decode("utf-8", "replace")
+
+
+_RZP_ORDER_RE = re.compile(r'order_id:\s*"(order_bench_[0-9a-f]+)"')
+
+
+def _scenario(base_url: str, username: str, product_slugs, rng, timings, errors):
+    """One shopper's journey; appends (step, ms) to timings."""
+    browser = _Browser(base_url)
+
+    def step(name, path, data=None):
+        t0 = time.perf_counter()
+        try:
+            body = browser.request(path, data)
+        except (urllib.error.URLError, OSError) as e:
+            errors.append(f"{name}: {e}")
+            raise
+        timings.append((name, (time.perf_counter() - t0) * 1000))
+        return body
+
+    step("browse", "/products/")
+    slug = rng.choice(product_slugs)
+    step("product_detail", f"/products/{slug}/")
+    step("login_page", "/accounts/login/")
+    step("login", "/accounts/login/", {"username": username, "password": BENCH_PASSWORD})
+    product_id = Product.objects.only("id").get(slug=slug).id
+    step("add_to_cart", f"/cart/add/{product_id}/", {"quantity": 1, "next": "/cart/"})
+    step("view_cart", "/cart/")
+    step("checkout_page", "/orders/checkout/")
+    pay_page = step("checkout", "/orders/checkout/", {})
+    match = _RZP_ORDER_RE.search(pay_page)
+    if not match:
+        errors.append("checkout: no razorpay order id on pay page")
+        return
+    step("verify", "/payments/verify/", {
+        "razorpay_order_id": match.group(1),
+        "razorpay_payment_id": f"pay_bench_{uuid.uuid4().hex[:14]}",
+        "razorpay_signature": "stub",
+    })
+
+
+def bench_http(concurrency: int = 4, rounds: int = 5, seed: int = 42) -> dict:
+    """Run `rounds` journeys per virtual user, `concurrency` users at a time."""
+    usernames = list(
+        User.objects.filter(address__is_default=True).order_by("id").values_list("username", flat=True)
+    )
+    product_slugs = list(
+        Product.objects.filter(is_active=True, stock__gt=0).values_list("slug", flat=True)
+    )
+    timings, errors = [], []
+
+    def worker(idx):
+        rng = random.Random(seed + idx)
+        try:
+            for _ in range(rounds):
+                try:
+                    _scenario(base_url, usernames[idx % len(usernames)], product_slugs, rng, timings, errors)
+                except Exception as e:  # keep the other journeys running
+                    errors.append(f"{type(e).__name__}: {e}")
+        finally:
+            connections.close_all()
+
+    with stub_gateways(), live_server() as base_url:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(worker, range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    by_step = {}
+    for name, ms in timings:
+        by_step.setdefault(name, []).append(ms)
+    return {
+        "concurrency": concurrency,
+        "rounds": rounds,
+        "elapsed_s": round(elapsed, 3),
+        "journeys_per_s": round(concurrency * rounds / elapsed, 3) if elapsed else None,
+        "steps": {name: summarize(samples, elapsed) for name, samples in by_step.items()},
+        "all_requests": summarize([ms for _, ms in timings], elapsed),
+        "errors": errors[:50],
+        "error_count": len(errors),
+    }
+
+
+# ----------------------- write concurrency -----------------------
+
+def db_profile() -> dict:
+    """Effective connection settings of the default database (SQLite pragmas as applied)."""
+    connection = connections["default"]
+    out = {
+        "vendor": connection.vendor,
+        "conn_max_age": connection.settings_dict.get("CONN_MAX_AGE"),
+        "pool": bool(connection.settings_dict.get("OPTIONS", {}).get("pool")),
+    }
+    if connection.vendor == "sqlite":
+        out["transaction_mode"] = connection.settings_dict.get("OPTIONS", {}).get("transaction_mode")
+        with connection.cursor() as cursor:
+            for pragma in ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size"):
+                cursor.execute(f"PRAGMA {pragma}")
+                row = cursor.fetchone()
+                out[pragma] = row[0] if row else None
+    return out
+
+
+def _write_op(product_id: int, session_key: str):
+    """A checkout-sized write: a few statements in one transaction."""
+    from cart.models import CartItem
+
+    with transaction.atomic():
+        item = CartItem.objects.create(session_key=session_key, product_id=product_id, quantity=1)
+        Product.objects.filter(pk=product_id).update(stock=F("stock"))
+        item.delete()
+
+
+def _read_op(product_id: int):
+    list(Product.objects.filter(is_active=True).order_by("-created_at")[:24])
+    Product.objects.filter(pk=product_id).values_list("stock", flat=True).first()
+
+
+def bench_writes(concurrency_levels=(1, 2, 4, 8), ops_per_worker: int = 50, write_ratio: float = 0.5,
+                 seed: int = 42) -> dict:
+    """
+    Each level runs `concurrency` threads doing `ops_per_worker` operations
+    (write_ratio of them writes). Lock errors are counted, not raised.
+    """
+    product_ids = list(Product.objects.order_by("id").values_list("id", flat=True)[:200])
+    levels = {}
+    for concurrency in concurrency_levels:
+        writes, reads, errors = [], [], []
+
+        def worker(idx):
+            rng = random.Random(seed + idx)
+            session_key = f"bench-{concurrency}-{idx}"
+            try:
+                for _ in range(ops_per_worker):
+                    pid = rng.choice(product_ids)
+                    is_write = rng.random() < write_ratio
+                    t0 = time.perf_counter()
+                    try:
+                        _write_op(pid, session_key) if is_write else _read_op(pid)
+                    except OperationalError as e:  # "database is locked" and friends
+                        errors.append(str(e))
+                        continue
+                    (writes if is_write else reads).append((time.perf_counter() - t0) * 1000)
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(worker, range(concurrency)))
+        elapsed = time.perf_counter() - started
+        levels[str(concurrency)] = {
+            "elapsed_s": round(elapsed, 3),
+            "ops_per_s": round((len(writes) + len(reads)) / elapsed, 1) if elapsed else None,
+            "writes": summarize(writes, elapsed),
+            "reads": summarize(reads, elapsed),
+            "error_count": len(errors),
+            "errors": sorted(set(errors))[:10],
+        }
+    return {"profile": db_profile(), "ops_per_worker": ops_per_worker, "write_ratio": write_ratio,
+            "levels": levels}
+
+
+# ----------------------- database -----------------------
+
+@contextmanager
+def bench_database(keepdb: bool = False):
+    """
+    Run against a throw-away test database (never the real one). SQLite gets a
+    file instead of :memory: so the load-test server threads share it.
+    """
+    connection = connections["default"]
+    if connection.vendor == "sqlite":
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        if not test_settings.get("NAME"):  # Django pre-fills TEST["NAME"] = None
+            test_settings["NAME"] = str(settings.BASE_DIR / "bench.sqlite3")
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb, serialize=False)
+    try:
+        yield connection.settings_dict["NAME"]
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
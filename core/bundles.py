@@ -0,0 +1,230 @@
+# core/bundles.py
+"""
+Static asset bundles for base.html (`manage.py build_assets`).
+
+ASSET_BUNDLES names the CSS and JS files a page needs, in load order, and the
+templates whose above-the-fold markup decides the critical CSS:
+
+    ASSET_BUNDLES = {"site": {"css": [...], "js": [...], "critical": ["base.html", "index.html"]}}
+
+build() writes, into ASSET_BUILD_DIR (static/build/):
+
+    <name>.css           every CSS file concatenated and minified; relative url()s
+                         rewritten to point from build/ at the original files
+    <name>.js            every JS file concatenated (the vendor files are already
+                         minified), source map comments dropped
+    <name>.critical.css  the rules of <name>.css that can match the critical
+                         templates' header and first section
+
+`collectstatic` then hashes them like any other file (manifest storage). The
+{% bundle_css %} / {% bundle_js %} tags (core.templatetags.bundles) inline the
+critical CSS, load the full stylesheet without blocking first paint and link
+the one script, or fall back to the source files when ASSET_BUNDLES_ENABLED is
+off (DEBUG) or nothing has been built.
+
+Critical CSS is chosen by matching selectors against the class names, ids,
+tags and attributes in the templates' source, so classes only added by
+JavaScript (.scrolled, .aos-animate) are left to the full stylesheet.
+"""
+import json
+import posixpath
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.template.loader import get_template
+
+PREFIX = "build"  # static path of ASSET_BUILD_DIR
+MANIFEST = "bundles.json"
+
+_URL_RE = re.compile(r"""url\(\s*(['"]?)(.*?)\1\s*\)""")
+_CHARSET_RE = re.compile(r"@charset\s+[^;]+;\s*", re.I)
+_SOURCE_MAP_RE = re.compile(r"^\s*//[#@] sourceMappingURL=.*$", re.M)
+_STRING_RE = re.compile(r""""(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'""")
+
+
+def build_dir() -> Path:
+    return Path(settings.ASSET_BUILD_DIR)
+
+
+def bundles() -> dict:
+    return getattr(settings, "ASSET_BUNDLES", {})
+
+
+def _source(path: str) -> str:
+    found = finders.find(path)
+    if not found:
+        raise FileNotFoundError(f"Static file {path!r} (listed in ASSET_BUNDLES) not found")
+    return Path(found).read_text(encoding="utf-8")
+
+
+# ---------- CSS ----------
+
+def rewrite_urls(css: str, source: str, target_dir: str = PREFIX) -> str:
+    """Make `source`'s relative url()s relative to `target_dir` (both static paths)."""
+    def repl(match):
+        url = match.group(2).strip()
+        if not url or url.startswith(("data:", "#", "/")) or "://" in url:
+            return match.group(0)
+        path, suffix = re.match(r"([^?#]*)(.*)", url).groups()  # keep ?v= / #iefix
+        resolved = posixpath.normpath(posixpath.join(posixpath.dirname(source), path))
+        return f'url("{posixpath.relpath(resolved, target_dir)}{suffix}")'
+    return _URL_RE.sub(repl, css)
+
+
+def minify_css(css: str) -> str:
+    """Drop comments and insignificant whitespace; strings are left untouched."""
+    strings = []
+
+    def keep(match):
+        strings.append(match.group(0))
+        return f"\x00{len(strings) - 1}\x00"
+
+    css = _STRING_RE.sub(keep, css)
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    css = css.replace(";}", "}")
+    return re.sub(r"\x00(\d+)\x00", lambda m: strings[int(m.group(1))], css).strip()
+
+
+def bundle_css(paths) -> str:
+    parts = [rewrite_urls(_CHARSET_RE.sub("", _source(path)), path) for path in paths]
+    return minify_css("\n".join(parts))
+
+
+# ---------- JS ----------
+
+def bundle_js(paths) -> str:
+    # ";" between files: one that ends without a semicolon mustn't run into the next
+    return "\n;".join(_SOURCE_MAP_RE.sub("", _source(path)).strip() for path in paths) + "\n"
+
+
+# ---------- critical CSS ----------
+
+def above_the_fold(source: str) -> str:
+    """Template markup up to the end of its first <section>, without <footer>s."""
+    source = re.sub(r"<footer\b.*?</footer>", "", source, flags=re.S | re.I)
+    end = source.find("</section>")
+    return source if end == -1 else source[:end]
+
+
+def markup_tokens(html: str) -> dict:
+    classes = set()
+    for value in re.findall(r"""\bclass\s*=\s*["']([^"']*)["']""", html, re.I):
+        classes.update(value.split())
+    return {
+        "classes": classes,
+        "ids": set(re.findall(r"""\bid\s*=\s*["']([\w-]+)["']""", html, re.I)),
+        "tags": {t.lower() for t in re.findall(r"<([a-zA-Z][\w-]*)", html)} | {"html", "body"},
+        "attrs": {a.lower() for a in re.findall(r"\s([a-zA-Z][\w-]*)\s*=", html)},
+    }
+
+
+def _selector_matches(selector: str, tokens: dict) -> bool:
+    attrs = {a.lower() for a in re.findall(r"\[\s*([\w-]+)", selector)}
+    bare = re.sub(r"\[[^\]]*\]", " ", selector)
+    bare = re.sub(r"::?[\w-]+(\([^)]*\))?", "", bare)
+    classes = set(re.findall(r"\.([\w-]+)", bare))
+    ids = set(re.findall(r"#([\w-]+)", bare))
+    tags = {t.lower() for t in re.findall(r"(?:^|[\s>+~])([a-zA-Z][\w-]*)", re.sub(r"[.#][\w-]+", " ", bare))}
+    return (classes <= tokens["classes"] and ids <= tokens["ids"]
+            and tags <= tokens["tags"] and attrs <= tokens["attrs"])
+
+
+def _blocks(css: str):
+    """Top-level (prelude, body) pairs of minified CSS; body is None for @-statements."""
+    i, n = 0, len(css)
+    while i < n:
+        brace, semi = css.find("{", i), css.find(";", i)
+        if brace == -1:
+            return
+        if semi != -1 and semi < brace:  # @charset / @import
+            yield css[i:semi].strip(), None
+            i = semi + 1
+            continue
+        depth, j = 1, brace + 1
+        while j < n and depth:
+            if css[j] in "\"'":
+                j = _STRING_RE.match(css, j).end()
+                continue
+            depth += {"{": 1, "}": -1}.get(css[j], 0)
+            j += 1
+        yield css[i:brace].strip(), css[brace + 1:j - 1]
+        i = j
+
+
+def critical_css(css: str, tokens: dict) -> str:
+    out, font_faces = [], []
+    for prelude, body in _blocks(css):
+        if body is None:
+            continue
+        if prelude.startswith("@"):
+            rule = prelude.split(None, 1)[0].split("(")[0].lower()
+            if rule in ("@media", "@supports", "@layer"):
+                inner = critical_css(body, tokens)
+                if inner:
+                    out.append(f"{prelude}{{{inner}}}")
+            elif rule == "@font-face":
+                font_faces.append(body)
+            continue  # keyframes etc.: only needed once something animates
+        kept = [s for s in prelude.split(",") if _selector_matches(s.strip(), tokens)]
+        if kept:
+            out.append(f"{','.join(kept)}{{{body}}}")
+    used = "".join(out)
+    for body in font_faces:  # only the fonts the kept rules use
+        family = re.search(r"font-family:\s*([^;]+)", body)
+        if family and family.group(1).strip("\"' ") in used:
+            out.insert(0, f"@font-face{{{body}}}")
+    return "".join(out)
+
+
+def _template_source(name: str) -> str:
+    return get_template(name).template.source
+
+
+# ---------- build ----------
+
+def build(names=None) -> dict:
+    """Write the bundles (all, or `names`); returns {name: {file: bytes written}}."""
+    target = build_dir()
+    target.mkdir(parents=True, exist_ok=True)
+    manifest_path = target / MANIFEST
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    report = {}
+    for name, spec in bundles().items():
+        if names and name not in names:
+            continue
+        files = {}
+        if spec.get("css"):
+            css = bundle_css(spec["css"])
+            files[f"{name}.css"] = css
+            if spec.get("critical"):
+                tokens = {"classes": set(), "ids": set(), "tags": set(), "attrs": set()}
+                for template_name in spec["critical"]:
+                    for key, values in markup_tokens(above_the_fold(_template_source(template_name))).items():
+                        tokens[key] |= values
+                files[f"{name}.critical.css"] = critical_css(css, tokens)
+        if spec.get("js"):
+            files[f"{name}.js"] = bundle_js(spec["js"])
+        for filename, content in files.items():
+            (target / filename).write_text(content, encoding="utf-8")
+        manifest[name] = {
+            "css": f"{name}.css" if spec.get("css") else None,
+            "critical": f"{name}.critical.css" if spec.get("critical") and spec.get("css") else None,
+            "js": f"{name}.js" if spec.get("js") else None,
+        }
+        report[name] = {filename: len(content.encode()) for filename, content in files.items()}
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+    return report
+
+
+def built(name: str):
+    """The manifest entry for a built bundle, or None."""
+    path = build_dir() / MANIFEST
+    try:
+        return json.loads(path.read_text()).get(name)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,294 @@
+# core/cache.py
+"""
+Two-tier cache backend: a bounded in-process LRU (L1) in front of a shared
+cache alias (L2: Redis, file-based or database cache).
+
+    CACHES = {
+        "default": {
+            "BACKEND": "core.cache.TwoTierCache",
+            "LOCATION": "shared",          # alias of the L2 cache
+            "OPTIONS": {"L1_MAX_ENTRIES": 5000, "L1_TIMEOUT": 60, "SYNC_INTERVAL": 1.0},
+        },
+        "shared": {...},
+    }
+
+Reads hit L1 first and fill it from L2. Writes go through to L2 and are
+recorded in an invalidation journal kept in L2: a generation counter plus one
+entry per generation listing the keys written. Every worker checks the
+counter at most once per SYNC_INTERVAL seconds and evicts exactly the keys
+written elsewhere since its last check (the whole L1 if it fell too far
+behind, or if L2 was cleared). So another worker's write is visible here
+after at most SYNC_INTERVAL; L1_TIMEOUT bounds staleness if L2 loses entries.
+
+stats() returns this process's hit/miss counters.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+GENERATION_KEY = "l1:generation"
+JOURNAL_KEY = "l1:journal:%d"
+
+_MISSING = object()
+
+
+class _Tier1:
+    """Process-wide L1 state (Django builds one cache backend object per thread)."""
+
+    def __init__(self):
+        self.entries = OrderedDict()  # key -> (expires_at monotonic, pickled value)
+        self.lock = threading.Lock()
+        self.generation = None
+        self.own_generations = set()
+        self.next_sync = 0.0
+        self.stats = dict.fromkeys(
+            ("l1_hits", "l2_hits", "misses", "sets", "deletes", "evictions",
+             "invalidations", "flushes", "syncs"), 0,
+        )
+
+
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class TwoTierCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._l2_alias = location or "shared"
+        self.l1_max_entries = int(options.get("L1_MAX_ENTRIES", 5000))
+        self.l1_timeout = float(options.get("L1_TIMEOUT", 60))
+        self.sync_interval = float(options.get("SYNC_INTERVAL", 1.0))
+        self.journal_size = int(options.get("JOURNAL_SIZE", 1000))
+        self.journal_timeout = int(options.get("JOURNAL_TIMEOUT", 300))
+        name = options.get("L1_NAME", self._l2_alias)
+        with _tiers_lock:
+            self._tier = _tiers.setdefault(name, _Tier1())
+
+    # ---------- helpers ----------
+
+    @property
+    def l2(self) -> BaseCache:
+        return caches[self._l2_alias]
+
+    def _version(self, version):
+        return self.version if version is None else version
+
+    def _count(self, name, n=1):
+        self._tier.stats[name] += n
+
+    def _l1_get(self, key):
+        tier = self._tier
+        with tier.lock:
+            entry = tier.entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, data = entry
+            if expires_at < time.monotonic():
+                del tier.entries[key]
+                return _MISSING
+            tier.entries.move_to_end(key)
+        return pickle.loads(data)
+
+    def _l1_put(self, key, value, timeout=DEFAULT_TIMEOUT):
+        ttl = self.l1_timeout
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            if timeout <= 0:
+                return self._l1_drop([key])
+            ttl = min(ttl, timeout)
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        tier = self._tier
+        with tier.lock:
+            tier.entries[key] = (time.monotonic() + ttl, data)
+            tier.entries.move_to_end(key)
+            while len(tier.entries) > self.l1_max_entries:
+                tier.entries.popitem(last=False)
+                self._count("evictions")
+
+    def _l1_drop(self, keys):
+        with self._tier.lock:
+            for key in keys:
+                self._tier.entries.pop(key, None)
+
+    def _l1_flush(self):
+        with self._tier.lock:
+            self._tier.entries.clear()
+        self._count("flushes")
+
+    # ---------- cross-process invalidation ----------
+
+    def _journal(self, keys):
+        """Record written keys so other workers drop them from their L1."""
+        l2 = self.l2
+        try:
+            generation = l2.incr(GENERATION_KEY)
+        except ValueError:
+            # Seeded from the clock so numbers are never reused after L2 is
+            # cleared/evicted: workers see a jump and flush instead of
+            # mistaking new journal entries for old ones.
+            l2.add(GENERATION_KEY, time.time_ns() // 1000, timeout=None)
+            generation = l2.incr(GENERATION_KEY)
+        l2.set(JOURNAL_KEY % generation, list(keys), timeout=self.journal_timeout)
+        with self._tier.lock:
+            self._tier.own_generations.add(generation)
+
+    def sync(self, force=False):
+        """Apply other workers' writes to L1; cheap no-op within SYNC_INTERVAL."""
+        tier = self._tier
+        now = time.monotonic()
+        if not force and now < tier.next_sync:
+            return
+        tier.next_sync = now + self.sync_interval
+        self._count("syncs")
+
+        l2 = self.l2
+        generation = l2.get(GENERATION_KEY)
+        with tier.lock:
+            previous, tier.generation = tier.generation, generation
+        if generation == previous:
+            return
+        if generation is None or previous is None or generation < previous \
+                or generation - previous > self.journal_size:
+            # L2 cleared/evicted, first sync, or too far behind: start over
+            self._l1_flush()
+            with tier.lock:
+                tier.own_generations.clear()
+            return
+
+        with tier.lock:
+            own = tier.own_generations
+            tier.own_generations = {g for g in own if g > generation}
+        wanted = [g for g in range(previous + 1, generation + 1) if g not in own]
+        if not wanted:
+            return
+        entries = l2.get_many([JOURNAL_KEY % g for g in wanted])
+        if len(entries) < len(wanted):
+            self._l1_flush()  # journal entries expired: can't tell what changed
+            return
+        stale = {key for keys in entries.values() for key in keys}
+        self._l1_drop(stale)
+        self._count("invalidations", len(stale))
+
+    # ---------- cache API ----------
+
+    def get(self, key, default=None, version=None):
+        self.sync()
+        full_key = self.make_and_validate_key(key, version=version)
+        value = self._l1_get(full_key)
+        if value is not _MISSING:
+            self._count("l1_hits")
+            return value
+        value = self.l2.get(key, _MISSING, version=self._version(version))
+        if value is _MISSING:
+            self._count("misses")
+            return default
+        self._count("l2_hits")
+        self._l1_put(full_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        self.sync()
+        found, remote = {}, []
+        for key in keys:
+            value = self._l1_get(self.make_and_validate_key(key, version=version))
+            if value is _MISSING:
+                remote.append(key)
+            else:
+                found[key] = value
+        self._count("l1_hits", len(found))
+        if remote:
+            fetched = self.l2.get_many(remote, version=self._version(version))
+            self._count("l2_hits", len(fetched))
+            self._count("misses", len(remote) - len(fetched))
+            for key, value in fetched.items():
+                self._l1_put(self.make_key(key, version=version), value)
+            found.update(fetched)
+        return found
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        self.l2.set(key, value, timeout=self._timeout(timeout), version=self._version(version))
+        self._l1_put(full_key, value, timeout)
+        self._journal([full_key])
+        self._count("sets")
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.l2.set_many(data, timeout=self._timeout(timeout), version=self._version(version))
+        full_keys = []
+        for key, value in data.items():
+            full_key = self.make_and_validate_key(key, version=version)
+            full_keys.append(full_key)
+            if key not in failed:
+                self._l1_put(full_key, value, timeout)
+        if full_keys:
+            self._journal(full_keys)
+        self._count("sets", len(data))
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        added = self.l2.add(key, value, timeout=self._timeout(timeout), version=self._version(version))
+        if added:
+            # Not journalled: the key was absent from L2, so other workers can only hold
+            # it if L2 dropped it early, and L1_TIMEOUT bounds that. Cache fills of
+            # versioned keys (fragments) should use add() to keep the journal small.
+            self._l1_put(full_key, value, timeout)
+            self._count("sets")
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout=self._timeout(timeout), version=self._version(version))
+
+    def delete(self, key, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        deleted = self.l2.delete(key, version=self._version(version))
+        self._l1_drop([full_key])
+        self._journal([full_key])
+        self._count("deletes")
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        full_keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        self.l2.delete_many(keys, version=self._version(version))
+        self._l1_drop(full_keys)
+        if full_keys:
+            self._journal(full_keys)
+        self._count("deletes", len(keys))
+
+    def incr(self, key, delta=1, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        value = self.l2.incr(key, delta, version=self._version(version))  # atomic on Redis
+        self._l1_drop([full_key])
+        self._journal([full_key])
+        return value
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version=version)
+
+    def clear(self):
+        self.l2.clear()  # also drops the journal: other workers flush on their next sync
+        self._l1_flush()
+
+    def _timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    # ---------- introspection ----------
+
+    def stats(self) -> dict:
+        out = dict(self._tier.stats)
+        out["l1_entries"] = len(self._tier.entries)
+        reads = out["l1_hits"] + out["l2_hits"] + out["misses"]
+        out["hit_ratio"] = round((out["l1_hits"] + out["l2_hits"]) / reads, 4) if reads else None
+        return out
+
+    def reset_stats(self) -> None:
+        for name in self._tier.stats:
+            self._tier.stats[name] = 0
@@ -0,0 +1,92 @@
+# core/cachewarm.py
+"""
+Post-deploy cache warming (`manage.py warm_caches`).
+
+hot_urls() lists the routes worth having in the shared cache before traffic
+cuts over: home, the product list and every category page, the most-ordered
+products of the last `days` days (topped up with the newest products when
+order history is thin) and the blog list. warm() renders them in-process
+through the full middleware stack, the way an anonymous visitor would, so
+the page cache (cached_page) and the {% fragment %} caches are filled under
+the same keys production requests will look up. Page keys include the host,
+so `base_url` must be the public address (SITE_URL).
+"""
+import queue
+import threading
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.db import connections
+from django.db.models import Sum
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+
+def hot_urls(top_products: int = 50, days: int = 30) -> list:
+    from catalog.models import Category, Product
+    from orders.models import OrderItem
+
+    urls = [reverse("core:home"), reverse("catalog:product_list")]
+    categories = (
+        Category.objects.filter(products__is_active=True).distinct()
+        .order_by("name").values_list("slug", flat=True)
+    )
+    urls += [reverse("catalog:category", args=[slug]) for slug in categories]
+
+    since = timezone.now() - timedelta(days=days)
+    slugs = list(
+        OrderItem.objects.filter(order__created_at__gte=since, product__is_active=True)
+        .values("product__slug").annotate(sold=Sum("quantity")).order_by("-sold")
+        .values_list("product__slug", flat=True)[:top_products]
+    )
+    if len(slugs) < top_products:
+        newest = (
+            Product.objects.filter(is_active=True).exclude(slug__in=slugs)
+            .order_by("-created_at").values_list("slug", flat=True)[:top_products - len(slugs)]
+        )
+        slugs += list(newest)
+    urls += [reverse("catalog:product_detail", args=[slug]) for slug in slugs]
+
+    urls.append(reverse("blog:list"))
+    return urls
+
+
+def _fetch(client, url, secure):
+    started = time.perf_counter()
+    try:
+        status = client.get(url, secure=secure).status_code
+    except Exception as e:
+        status = f"error: {type(e).__name__}: {e}"
+    finally:
+        client.cookies.clear()  # every page as a first-time, cookie-less visitor
+    return url, status, round((time.perf_counter() - started) * 1000, 1)
+
+
+def warm(urls, base_url: str, workers: int = 4) -> list:
+    """Render every URL (GET, no cookies); returns [(url, status, ms), ...] in input order."""
+    parts = urlsplit(base_url)
+    todo = queue.SimpleQueue()
+    for item in enumerate(urls):
+        todo.put(item)
+    results = [None] * len(urls)
+
+    def worker():
+        client = Client(HTTP_HOST=parts.netloc)
+        try:
+            while True:
+                try:
+                    index, url = todo.get_nowait()
+                except queue.Empty:
+                    return
+                results[index] = _fetch(client, url, secure=parts.scheme == "https")
+        finally:
+            connections.close_all()  # this thread's connections
+
+    threads = [threading.Thread(target=worker, name=f"warm-{n}") for n in range(max(1, min(workers, len(urls))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
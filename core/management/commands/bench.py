@@ -0,0 +1,79 @@
+# core/management/commands/bench.py
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark storefront hot paths (cart, totals, PDF engines, HTTP journeys, DB write "
+        "concurrency) against a throw-away database and write the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=1, help="Data scale multiplier.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--iterations", type=int, default=200, help="Micro-benchmark iterations.")
+        parser.add_argument("--pdf-iterations", type=int, default=10)
+        parser.add_argument("--concurrency", type=int, default=4, help="Concurrent virtual shoppers.")
+        parser.add_argument("--rounds", type=int, default=5, help="Journeys per shopper.")
+        parser.add_argument("--skip-micro", action="store_true")
+        parser.add_argument("--skip-http", action="store_true")
+        parser.add_argument("--skip-db", action="store_true")
+        parser.add_argument("--db-concurrency", default="1,2,4,8",
+                            help="Comma-separated thread counts for the write-concurrency run.")
+        parser.add_argument("--db-ops", type=int, default=50, help="Operations per thread and level.")
+        parser.add_argument("--keepdb", action="store_true", help="Reuse the benchmark database.")
+        parser.add_argument("--out", help="Write results JSON here.")
+        parser.add_argument("--compare", help="Previous results JSON to diff p95 latencies against.")
+
+    def handle(self, *args, **opts):
+        results = {
+            "meta": {
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "db_vendor": connection.vendor,
+                "options": {k: opts[k] for k in ("scale", "seed", "iterations", "pdf_iterations",
+                                                 "concurrency", "rounds")},
+            },
+        }
+
+        with benchmarks.bench_database(keepdb=opts["keepdb"]):
+            results["seed"] = benchmarks.seed(opts["scale"], opts["seed"])
+            self.stdout.write(f"seeded: {results['seed']}")
+
+            if not opts["skip_micro"]:
+                results["micro"] = {
+                    "cart": benchmarks.bench_cart(opts["iterations"]),
+                    "pdf": benchmarks.bench_pdf(opts["pdf_iterations"]),
+                }
+            if not opts["skip_http"]:
+                results["http"] = benchmarks.bench_http(opts["concurrency"], opts["rounds"], opts["seed"])
+            if not opts["skip_db"]:
+                levels = [int(n) for n in opts["db_concurrency"].split(",") if n.strip()]
+                results["db"] = benchmarks.bench_writes(levels, opts["db_ops"], seed=opts["seed"])
+
+        output = json.dumps(results, indent=2, default=str)
+        if opts["out"]:
+            with open(opts["out"], "w") as f:
+                f.write(output)
+            self.stdout.write(f"wrote {opts['out']}")
+        else:
+            self.stdout.write(output)
+
+        if opts["compare"]:
+            with open(opts["compare"]) as f:
+                baseline = json.load(f)
+            for key, before, after, change in benchmarks.compare(results, baseline):
+                self.stdout.write(f"{key:60s} {before:10.2f} -> {after:10.2f} ms ({change:+.1f}%)")
+
+        if results.get("http", {}).get("error_count"):
+            sys.stderr.write(f"{results['http']['error_count']} HTTP errors, see results['http']['errors']\n")
@@ -0,0 +1,66 @@
+# core/management/commands/import_profile.py
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+# What a worker imports before its first request: settings, apps, every view.
+_BOOT = (
+    "import django; django.setup(); "
+    "from django.urls import get_resolver; get_resolver().reverse_dict"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Start Django in a fresh interpreter under `python -X importtime` and report "
+        "where the import time goes (boot up to a resolved URLconf, no warmup)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=25)
+        parser.add_argument("--by", choices=("package", "module"), default="package",
+                            help="Group self time by top-level package (default) or list modules.")
+        parser.add_argument("--include-warmup", action="store_true",
+                            help="Also run core.utils.warmup (imports its heavy libraries).")
+
+    def handle(self, *args, **opts):
+        code = _BOOT + ("; from core.utils.warmup import warmup; warmup()" if opts["include_warmup"] else "")
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "shopsite.settings")}
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                              capture_output=True, text=True, env=env)
+        if proc.returncode:
+            raise CommandError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "boot failed")
+
+        modules = []  # (name, self_us, cumulative_us, depth)
+        for line in proc.stderr.splitlines():
+            match = _LINE_RE.match(line)
+            if match:
+                modules.append((match.group(4), int(match.group(1)), int(match.group(2)),
+                                len(match.group(3)) // 2))
+        if not modules:
+            raise CommandError("No -X importtime output")
+
+        total_ms = sum(m[1] for m in modules) / 1000
+        self.stdout.write(f"{len(modules)} modules, {total_ms:.0f} ms of import time")
+
+        if opts["by"] == "package":
+            groups = defaultdict(lambda: [0, 0])
+            for name, self_us, _, _ in modules:
+                groups[name.split(".")[0]][0] += self_us
+                groups[name.split(".")[0]][1] += 1
+            rows = sorted(groups.items(), key=lambda kv: kv[1][0], reverse=True)[:opts["top"]]
+            self.stdout.write(f"{'package':<32} {'self ms':>9} {'share':>6} {'modules':>8}")
+            for name, (self_us, count) in rows:
+                self.stdout.write(f"{name:<32} {self_us / 1000:9.1f} {100 * self_us / 1000 / total_ms:5.1f}% "
+                                  f"{count:8d}")
+        else:
+            rows = sorted(modules, key=lambda m: m[2], reverse=True)[:opts["top"]]
+            self.stdout.write(f"{'module':<48} {'self ms':>9} {'cumul. ms':>10}")
+            for name, self_us, cumulative_us, _ in rows:
+                self.stdout.write(f"{name:<48} {self_us / 1000:9.1f} {cumulative_us / 1000:10.1f}")
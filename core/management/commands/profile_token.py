@@ -0,0 +1,13 @@
+# core/management/commands/profile_token.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.utils.profiling import TOKEN_HEADER, make_token
+
+
+class Command(BaseCommand):
+    help = "Print a signed X-Profile-Token header value; requests sending it are profiled."
+
+    def handle(self, *args, **opts):
+        self.stdout.write(f"{TOKEN_HEADER}: {make_token()}")
+        self.stderr.write(f"valid for {getattr(settings, 'PROFILE_TOKEN_MAX_AGE', 3600)} s")
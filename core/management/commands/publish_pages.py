@@ -0,0 +1,30 @@
+# core/management/commands/publish_pages.py
+from django.core.management.base import BaseCommand
+
+from core import publish
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the mostly-static pages (PUBLISHED_PAGES, blog posts) to pre-compressed HTML "
+        "under PUBLISH_ROOT. Run after collectstatic so asset links use the new hashed names."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", action="append", default=None,
+                            help="Only this path, e.g. /team/ (repeatable).")
+        parser.add_argument("--base-url", default=None, help="Public scheme://host (default: SITE_URL).")
+        parser.add_argument("--clean", action="store_true",
+                            help="Remove every published file first (stale pages of removed routes).")
+
+    def handle(self, *args, **opts):
+        if opts["clean"]:
+            publish.clean()
+        results = publish.publish(opts["path"], base_url=opts["base_url"])
+        for path, outcome in results:
+            if outcome == "published":
+                self.stdout.write(f"  {path}")
+            else:
+                self.stderr.write(f"  {path}: not published, {outcome}")
+        done = sum(outcome == "published" for _, outcome in results)
+        self.stdout.write(f"{done}/{len(results)} pages published to {publish.publish_root()}")
@@ -0,0 +1,40 @@
+# core/management/commands/seed_scale.py
+from django.core.management.base import BaseCommand
+
+from core.seeding import DEFAULT_COUNTS, ScaleSeeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-generate categories, products (+images), users (+addresses, carts), "
+        "anonymous carts and orders. Deterministic for a given --seed on an empty database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=float, default=1.0,
+                            help="Multiplier for the baseline counts (e.g. 100 for 100x).")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--password", default="seed-pass-123", help="Password for every seeded user.")
+        for key, value in DEFAULT_COUNTS.items():
+            parser.add_argument(f"--{key.replace('_', '-')}", type=int, default=None,
+                                help=f"Override count (baseline {value} x scale).")
+
+    def handle(self, *args, **opts):
+        counts = {}
+        for key, value in DEFAULT_COUNTS.items():
+            explicit = opts[key]
+            if explicit is not None:
+                counts[key] = explicit
+            elif key == "images_per_product":
+                counts[key] = value
+            else:
+                counts[key] = int(value * opts["scale"])
+
+        self.stdout.write(f"seeding {counts} (seed={opts['seed']})")
+        seeder = ScaleSeeder(
+            seed=opts["seed"], batch_size=opts["batch_size"], password=opts["password"],
+            log=lambda msg: self.stdout.write(msg) if opts["verbosity"] > 1 else None,
+        )
+        summary = seeder.run(**counts)
+        self.stdout.write(self.style.SUCCESS(f"done: {summary}"))
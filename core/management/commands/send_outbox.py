@@ -0,0 +1,35 @@
+# core/management/commands/send_outbox.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.utils.mail import OutboxSender
+
+
+class Command(BaseCommand):
+    help = "Send queued OutboxEmail rows over a single SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--rate", type=int, default=None,
+                            help="Max messages per minute (default: EMAIL_OUTBOX_RATE_PER_MINUTE).")
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep running and poll for new messages.")
+        parser.add_argument("--interval", type=float, default=5.0,
+                            help="Seconds between polls in --loop mode.")
+
+    def handle(self, *args, **opts):
+        sender = OutboxSender(batch_size=opts["batch_size"], rate_per_minute=opts["rate"])
+        try:
+            while True:
+                stats = sender.drain()
+                if stats["sent"] or stats["failed"]:
+                    self.stdout.write(f"sent={stats['sent']} failed={stats['failed']}")
+                if not opts["loop"]:
+                    break
+                if not stats["sent"] and not stats["failed"]:
+                    time.sleep(opts["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sender.close()
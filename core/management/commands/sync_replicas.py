@@ -0,0 +1,32 @@
+# core/management/commands/sync_replicas.py
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the SQLite primary onto each DATABASE_REPLICAS file (online backup), "
+        "so the replica router can be exercised locally."
+    )
+
+    def handle(self, *args, **opts):
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        if not replicas:
+            raise CommandError("No replicas configured (set DB_REPLICAS).")
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != "sqlite":
+            raise CommandError("Only SQLite replicas are copied here; use the server's replication otherwise.")
+
+        primary.ensure_connection()
+        for alias in replicas:
+            target = connections[alias]
+            target.close()  # don't hold the file open while it is overwritten
+            dest = sqlite3.connect(target.settings_dict["NAME"])
+            try:
+                primary.connection.backup(dest)
+            finally:
+                dest.close()
+            self.stdout.write(f"{alias}: copied to {target.settings_dict['NAME']}")
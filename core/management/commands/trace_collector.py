@@ -0,0 +1,57 @@
+# core/management/commands/trace_collector.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.utils.tracing import from_otlp
+
+
+class Command(BaseCommand):
+    help = (
+        "Local stand-in for an OTLP collector: accept OTLP/HTTP JSON on /v1/traces "
+        "and append the spans to a JSON-lines file (read by `trace_report`)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=4318)
+        parser.add_argument("--out", default=None, help="Span file (default: TRACE_FILE).")
+
+    def handle(self, *args, **opts):
+        out = opts["out"] or settings.TRACE_FILE
+        lock = threading.Lock()
+        stdout = self.stdout
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path.rstrip("/") != "/v1/traces":
+                    self.send_error(404)
+                    return
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                    spans = from_otlp(body)
+                except (ValueError, KeyError, TypeError) as e:
+                    self.send_error(400, str(e))
+                    return
+                with lock, open(out, "a", encoding="utf-8") as fh:
+                    fh.writelines(json.dumps(s) + "\n" for s in spans)
+                stdout.write(f"{len(spans)} spans")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((opts["host"], opts["port"]), Handler)
+        self.stdout.write(f"OTLP/HTTP on http://{opts['host']}:{opts['port']}/v1/traces -> {out}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
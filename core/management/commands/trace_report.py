@@ -0,0 +1,65 @@
+# core/management/commands/trace_report.py
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _stage(span: dict) -> str:
+    """Group spans into stages: db, template, pdf, smtp, razorpay, email, or the view itself."""
+    if span["kind"] == "server":
+        return f"view {span['name']}"
+    return span["name"].split(".", 1)[0]
+
+
+def _self_ms(spans) -> dict:
+    """Time spent in each span minus its direct children, so stages add up to the total."""
+    children = defaultdict(float)
+    for s in spans:
+        if s["parent_span_id"]:
+            children[s["parent_span_id"]] += s["duration_ms"]
+    return {s["span_id"]: max(0.0, s["duration_ms"] - children[s["span_id"]]) for s in spans}
+
+
+class Command(BaseCommand):
+    help = "Show the slowest traces in a span file with their time split by stage."
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", nargs="?", default=None, help="Span file (default: TRACE_FILE).")
+        parser.add_argument("--top", type=int, default=10)
+        parser.add_argument("--name", default="", help="Only traces containing a span with this name.")
+
+    def handle(self, *args, **opts):
+        path = opts["file"] or settings.TRACE_FILE
+        traces = defaultdict(list)
+        try:
+            with open(path, encoding="utf-8") as fh:
+                for line in fh:
+                    if line.strip():
+                        span = json.loads(line)
+                        traces[span["trace_id"]].append(span)
+        except FileNotFoundError:
+            raise CommandError(f"No span file at {path}")
+
+        rows = []
+        for trace_id, spans in traces.items():
+            if opts["name"] and not any(s["name"] == opts["name"] for s in spans):
+                continue
+            wall = (max(s["end_ns"] for s in spans) - min(s["start_ns"] for s in spans)) / 1e6
+            rows.append((wall, trace_id, spans))
+        rows.sort(key=lambda r: r[0], reverse=True)
+
+        for wall, trace_id, spans in rows[:opts["top"]]:
+            roots = sorted((s for s in spans if s["kind"] == "server"), key=lambda s: s["start_ns"])
+            self.stdout.write(f"{trace_id}  {wall:.1f} ms wall  "
+                              f"{' -> '.join(s['name'] for s in roots) or spans[0]['name']}")
+            stages = defaultdict(float)
+            self_ms = _self_ms(spans)
+            for s in spans:
+                stages[_stage(s)] += self_ms[s["span_id"]]
+            for stage, ms in sorted(stages.items(), key=lambda kv: kv[1], reverse=True):
+                self.stdout.write(f"    {stage:<40} {ms:9.1f} ms")
+            errors = [s for s in spans if s["error"]]
+            for s in errors:
+                self.stdout.write(self.style.ERROR(f"    ! {s['name']}: {s['error']}"))
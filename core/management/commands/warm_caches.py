@@ -0,0 +1,45 @@
+# core/management/commands/warm_caches.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.cachewarm import hot_urls, warm
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the hot pages (home, category lists, top products, blog) in-process so the "
+        "shared page and fragment caches are full before traffic cuts over to a new deploy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default=None,
+                            help="Public scheme://host the cache keys are built for (default: SITE_URL).")
+        parser.add_argument("--top-products", type=int, default=50)
+        parser.add_argument("--days", type=int, default=30, help="Order history window for top products.")
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--url", action="append", default=[], help="Extra path to warm (repeatable).")
+
+    def handle(self, *args, **opts):
+        base_url = opts["base_url"] or settings.SITE_URL
+        urls = hot_urls(top_products=opts["top_products"], days=opts["days"]) + opts["url"]
+        self.stdout.write(f"warming {len(urls)} pages for {base_url} with {opts['workers']} workers")
+
+        started = time.perf_counter()
+        results = warm(urls, base_url, workers=opts["workers"])
+        elapsed = time.perf_counter() - started
+
+        failed = [(url, status) for url, status, _ in results if status != 200]
+        for url, status in failed:
+            self.stderr.write(f"  {url}: {status}")
+        if opts["verbosity"] > 1:
+            for url, status, ms in sorted(results, key=lambda r: r[2], reverse=True):
+                self.stdout.write(f"  {ms:8.1f} ms  {status}  {url}")
+        slowest = max(results, key=lambda r: r[2]) if results else None
+        self.stdout.write(
+            f"{len(results) - len(failed)}/{len(results)} pages warm in {elapsed:.1f} s"
+            + (f" (slowest {slowest[0]}: {slowest[2]:.0f} ms)" if slowest else "")
+        )
+        if failed and len(failed) == len(results):
+            raise CommandError("No page could be rendered; check ALLOWED_HOSTS against --base-url.")
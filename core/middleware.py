@@ -0,0 +1,338 @@
+# core/middleware.py
+import logging
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from core.utils import profiling, tracing
+from core.utils.log import bind, unbind
+from core.utils.metrics import histogram
+from core.utils.swr import shared_visitor
+from core.utils.queries import record_queries
+
+logger = logging.getLogger(__name__)
+
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+REQUEST_SECONDS = histogram(
+    "http_request_duration_seconds", "Time from first middleware to response, per view",
+    ["view", "method", "status"],
+)
+
+
+class HybridMiddleware:
+    """
+    Base for middleware that runs natively in both modes. Under ASGI a single
+    sync-only middleware puts every request back on a thread that blocks while
+    async views await, so ours implement call() and acall().
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.acall(request)
+        return self.call(request)
+
+    def call(self, request):
+        raise NotImplementedError
+
+    async def acall(self, request):
+        raise NotImplementedError
+
+
+class RequestContextMiddleware(HybridMiddleware):
+    """
+    Give every request an ID (taken from X-Request-ID when sane) and attach it
+    to all log records emitted while the request is handled.
+    """
+
+    def _start(self, request):
+        incoming = request.headers.get("X-Request-ID", "")
+        request.request_id = incoming if _REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+        return bind(request_id=request.request_id, path=request.path)
+
+    def call(self, request):
+        token = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            unbind(token)
+        response["X-Request-ID"] = request.request_id
+        return response
+
+    async def acall(self, request):
+        token = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            unbind(token)
+        response["X-Request-ID"] = request.request_id
+        return response
+
+
+class QueryCountMiddleware(HybridMiddleware):
+    """
+    Count queries and DB time per view, and log SQL shapes repeated at least
+    QUERY_NPLUSONE_THRESHOLD times (a likely N+1). Enabled by
+    QUERY_INSTRUMENTATION (defaults to DEBUG); adds a Server-Timing header.
+
+    Sync requests only: under ASGI the ORM runs on executor threads whose
+    connections this can't wrap, so async requests pass straight through.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.enabled = getattr(settings, "QUERY_INSTRUMENTATION", settings.DEBUG)
+        self.threshold = getattr(settings, "QUERY_NPLUSONE_THRESHOLD", 5)
+
+    async def acall(self, request):
+        return await self.get_response(request)
+
+    def call(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        with record_queries() as rec:
+            response = self.get_response(request)
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else request.path
+        logger.debug(
+            "%s: %d queries in %.1f ms", view, rec.count, rec.total_ms,
+            extra={"view": view, "queries": rec.count, "db_ms": round(rec.total_ms, 1)},
+        )
+        for shape, times in rec.repeated(self.threshold):
+            logger.warning(
+                "Possible N+1 in %s: %d x %s", view, times, shape,
+                extra={"view": view, "repeats": times},
+            )
+        response["Server-Timing"] = f'db;dur={rec.total_ms:.1f};desc="{rec.count} queries"'
+        return response
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """
+    Record request latency per view name (http_request_duration_seconds).
+    Unresolved paths share one "<unresolved>" label so 404 probes can't
+    blow up the number of series.
+    """
+
+    def _observe(self, request, response, started):
+        match = getattr(request, "resolver_match", None)
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            view=match.view_name if match else "<unresolved>",
+            method=request.method if request.method in ("GET", "HEAD", "POST") else "other",
+            status=f"{response.status_code // 100}xx",
+        )
+        return response
+
+    def call(self, request):
+        started = time.perf_counter()
+        return self._observe(request, self.get_response(request), started)
+
+    async def acall(self, request):
+        started = time.perf_counter()
+        return self._observe(request, await self.get_response(request), started)
+
+
+class ProfilingMiddleware(HybridMiddleware):
+    """
+    Sample the stacks of requests picked by core.utils.profiling.trigger_for()
+    (signed X-Profile-Token header or PROFILE_SAMPLE_RATE) and store them as a
+    RequestProfile, viewable in the admin.
+
+    Sync requests sample only their own thread. An async request's work hops
+    between the event loop and executor threads, so every thread is sampled:
+    concurrent requests show up in its profile too.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.interval = getattr(settings, "PROFILE_INTERVAL_MS", 5) / 1000
+
+    def call(self, request):
+        trigger = profiling.trigger_for(request)
+        if trigger is None:
+            return self.get_response(request)
+        started = time.perf_counter()
+        with profiling.StackSampler(self.interval, threads={threading.get_ident()}) as sampler:
+            response = self.get_response(request)
+        self._store(request, response, trigger, sampler, time.perf_counter() - started)
+        return response
+
+    async def acall(self, request):
+        trigger = profiling.trigger_for(request)
+        if trigger is None:
+            return await self.get_response(request)
+        started = time.perf_counter()
+        with profiling.StackSampler(self.interval) as sampler:
+            response = await self.get_response(request)
+        await sync_to_async(self._store)(request, response, trigger, sampler, time.perf_counter() - started)
+        return response
+
+    def _store(self, request, response, trigger, sampler, elapsed):
+        from core.models import RequestProfile
+
+        match = getattr(request, "resolver_match", None)
+        stacks = sampler.collapsed()
+        try:
+            RequestProfile.objects.create(
+                view_name=match.view_name if match else "",
+                path=request.path[:500],
+                method=request.method,
+                status_code=response.status_code,
+                duration_ms=round(elapsed * 1000, 1),
+                interval_ms=self.interval * 1000,
+                sample_count=sum(stacks.values()),
+                stacks=stacks,
+                trigger=trigger,
+                request_id=getattr(request, "request_id", ""),
+            )
+        except Exception:
+            logger.exception("Could not store request profile for %s", request.path)
+
+
+class TracingMiddleware(HybridMiddleware):
+    """
+    One server span per request (core.utils.tracing), continuing an incoming
+    traceparent header or the purchase stored in the session. Goes after
+    SessionMiddleware; the session is only read when the visitor has one.
+    """
+
+    @contextmanager
+    def _span(self, request, stored):
+        incoming = request.headers.get("traceparent", "")
+        parent = incoming if tracing.parse_traceparent(incoming) else tracing.journey_parent(stored)
+        with tracing.span(f"{request.method} {request.path}", kind="server", traceparent=parent, root=True,
+                          **{"http.method": request.method, "http.target": request.path}) as active:
+            token = bind(trace_id=active.trace_id) if active else None
+            try:
+                yield active
+            finally:
+                if token is not None:
+                    unbind(token)
+
+    def _finish(self, request, response, active):
+        if active is not None:
+            match = getattr(request, "resolver_match", None)
+            if match:
+                active.name = match.view_name
+            active.set("http.status_code", response.status_code)
+            response["traceresponse"] = active.traceparent
+        return response
+
+    def call(self, request):
+        if not tracing.enabled():
+            return self.get_response(request)
+        stored = None
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            stored = request.session.get(tracing.JOURNEY_SESSION_KEY)
+        with self._span(request, stored) as active:
+            return self._finish(request, self.get_response(request), active)
+
+    async def acall(self, request):
+        if not tracing.enabled():
+            return await self.get_response(request)
+        stored = None
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            stored = await request.session.aget(tracing.JOURNEY_SESSION_KEY)
+        with self._span(request, stored) as active:
+            return self._finish(request, await self.get_response(request), active)
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise, async-capable (6.x is sync-only); a file lookup is a dict hit or a stat."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self._acall(request)
+        return super().__call__(request)
+
+    async def _acall(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class PublishedPageMiddleware(HybridMiddleware):
+    """
+    Serve pages pre-rendered by core.publish to cookie-less GET/HEAD requests
+    (gzip when accepted), before sessions, auth or the ORM run. Visitors with
+    a session and pages without a published file fall through to the view.
+
+    It runs before CommonMiddleware, so it validates the Host header itself
+    (get_host() raises DisallowedHost: a 400, as for any other page).
+    """
+
+    def _serve(self, request):
+        from core.publish import RENDER_MARKER, page_dir
+
+        if request.method not in ("GET", "HEAD") or request.GET or not shared_visitor(request):
+            return None
+        if request.META.get(RENDER_MARKER):
+            return None
+        request.get_host()
+
+        directory = page_dir(request.path_info)
+        if directory is None:
+            return None
+        gzipped = "gzip" in request.headers.get("Accept-Encoding", "")
+        path = directory / ("index.html.gz" if gzipped else "index.html")
+        try:
+            stat = path.stat()
+            if not path.is_file():
+                return None
+        except (OSError, ValueError):  # ValueError: a path the filesystem can't represent
+            return None
+
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{"-gz" if gzipped else ""}"'
+        response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+        if response is None:
+            response = HttpResponse(b"" if request.method == "HEAD" else path.read_bytes(),
+                                    content_type="text/html; charset=utf-8")
+            response["Content-Length"] = str(stat.st_size)
+            if gzipped:
+                response["Content-Encoding"] = "gzip"
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(stat.st_mtime)
+        response["Cache-Control"] = "public, max-age=0, must-revalidate"
+        response["X-Published"] = "1"
+        patch_vary_headers(response, ("Accept-Encoding", "Cookie"))
+        return response
+
+    def call(self, request):
+        return self._serve(request) or self.get_response(request)
+
+    async def acall(self, request):
+        return self._serve(request) or await self.get_response(request)
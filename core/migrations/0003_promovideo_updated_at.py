@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-19 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_outboxemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='promovideo',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-19 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_requestprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxemail',
+            name='traceparent',
+            field=models.CharField(blank=True, max_length=55),
+        ),
+    ]
@@ -1,5 +1,6 @@
 # core/models.py
 from django.db import models
+from django.utils import timezone
 from urllib.parse import urlparse, parse_qs
 
 class PromoVideo(models.Model):
@@ -11,6 +12,7 @@ class PromoVideo(models.Model):
     is_active = models.BooleanField(default=True)
     sort_order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ("sort_order", "-created_at")
@@ -33,3 +35,70 @@ class PromoVideo(models.Model):
     def youtube_embed_url(self):
         vid = self.youtube_id()
         return f"https://www.youtube.com/embed/{vid}" if vid else None
+
+
+class OutboxEmail(models.Model):
+    """
+    Queued outgoing email. Rows are written by core.utils.mail.enqueue() and
+    drained by `manage.py send_outbox` over a single SMTP connection.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+    cc = models.JSONField(default=list, blank=True)
+    bcc = models.JSONField(default=list, blank=True)
+    body = models.TextField(blank=True)
+    html_body = models.TextField(blank=True)
+    # [[filename, base64 content, mimetype], ...]
+    attachments = models.JSONField(default=list, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    # W3C traceparent of the request that queued it (core.utils.tracing)
+    traceparent = models.CharField(max_length=55, blank=True)
+
+    class Meta:
+        ordering = ("created_at",)
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} [{self.status}]"
+
+
+class RequestProfile(models.Model):
+    """
+    Stack samples of one profiled request (core.middleware.ProfilingMiddleware),
+    stored in collapsed form: {"root;...;leaf": samples}.
+    """
+    TRIGGER_CHOICES = [
+        ("header", "Signed header"),
+        ("sample", "Random sample"),
+    ]
+
+    view_name = models.CharField(max_length=200, db_index=True)
+    path = models.CharField(max_length=500)
+    method = models.CharField(max_length=10)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    interval_ms = models.FloatField()
+    sample_count = models.PositiveIntegerField(default=0)
+    stacks = models.JSONField(default=dict)
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    request_id = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return f"{self.method} {self.view_name} {self.duration_ms:.0f} ms"
@@ -0,0 +1,176 @@
+# core/publish.py
+"""
+Publish mostly-static pages as pre-rendered, pre-compressed HTML files.
+
+    publish()                      render every page in published_pages()
+    publish(["/blog/my-post/"])    just these paths
+
+Pages are rendered in-process as a cookie-less visitor would see them (like
+`warm_caches`) and written atomically to PUBLISH_ROOT/<path>/index.html plus
+an index.html.gz. Their asset links are whatever {% static %} gives, i.e.
+hashed names under the manifest storage, so publish after `collectstatic`.
+A page that no longer renders with 200 (an unpublished post) has its files
+removed; one that sets cookies or carries a CSRF token is not published,
+as it isn't the same for every visitor.
+
+core.middleware.PublishedPageMiddleware serves the files to cookie-less
+GET/HEAD requests before sessions, auth or the ORM are touched; anyone else,
+and any page without a file, falls through to the view. A front proxy can do
+the same without Python, e.g. nginx:
+
+    if ($http_cookie !~ "sessionid|messages") { rewrite ^(.*/)$ /published$1index.html break; }
+
+Pages are republished after admin edits (PUBLISH_ON_SAVE), on a background
+thread once the transaction commits, and by `manage.py publish_pages`.
+"""
+import gzip
+import logging
+import os
+import shutil
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.test import Client
+from django.urls import reverse
+
+from core.utils import versions
+
+logger = logging.getLogger(__name__)
+
+GZIP_LEVEL = 9  # compressed once per publish, served many times
+
+# WSGI environ key on publish renders (no HTTP header can set it): they must
+# reach the view, not the file being replaced.
+RENDER_MARKER = "core.publish.render"
+
+
+def publish_root() -> Path:
+    return Path(settings.PUBLISH_ROOT)
+
+
+def _route_pages() -> dict:
+    return {reverse(name): tuple(depends) for name, depends in getattr(settings, "PUBLISHED_PAGES", {}).items()}
+
+
+def published_pages() -> dict:
+    """{path: content namespaces it depends on} for every page to publish."""
+    from blog.models import Post
+
+    pages = _route_pages()
+    if getattr(settings, "PUBLISH_BLOG_POSTS", True):
+        for slug in Post.objects.filter(is_published=True).values_list("slug", flat=True):
+            pages[reverse("blog:detail", args=[slug])] = ("blog",)
+    return pages
+
+
+def page_dir(path: str):
+    """Directory holding `path`'s files, or None if the path can't be a published page."""
+    if (not path.endswith("/") or "\\" in path or "\x00" in path
+            or any(part in (".", "..") for part in path.split("/"))):
+        return None
+    return publish_root().joinpath(*[part for part in path.split("/") if part])
+
+
+def _write_atomic(target: Path, data: bytes) -> None:
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, target)
+
+
+def _unpublish(directory: Path) -> None:
+    for name in ("index.html", "index.html.gz"):
+        (directory / name).unlink(missing_ok=True)
+
+
+def _publishable(response) -> str:
+    """Why the response can't be a static file ("" if it can)."""
+    if response.status_code != 200:
+        return f"status {response.status_code}"
+    if response.cookies:
+        return f"sets cookies ({', '.join(response.cookies)})"
+    if b"csrfmiddlewaretoken" in response.content:
+        return "contains a CSRF token"
+    return ""
+
+
+def publish(paths=None, base_url: str = None) -> list:
+    """Render and write pages; returns [(path, "published" | reason it wasn't), ...]."""
+    paths = list(published_pages()) if paths is None else list(paths)
+    parts = urlsplit(base_url or settings.SITE_URL)
+    client = Client(HTTP_HOST=parts.netloc, **{RENDER_MARKER: True})
+    results = []
+    for path in paths:
+        directory = page_dir(path)
+        if directory is None:
+            results.append((path, "not a publishable path"))
+            continue
+        response = client.get(path, secure=parts.scheme == "https")
+        client.cookies.clear()
+        reason = _publishable(response)
+        if reason:
+            _unpublish(directory)
+            results.append((path, reason))
+            continue
+        directory.mkdir(parents=True, exist_ok=True)
+        _write_atomic(directory / "index.html.gz", gzip.compress(response.content, GZIP_LEVEL, mtime=0))
+        _write_atomic(directory / "index.html", response.content)
+        results.append((path, "published"))
+    return results
+
+
+def clean() -> None:
+    """Remove every published file (the views serve everything again)."""
+    shutil.rmtree(publish_root(), ignore_errors=True)
+
+
+# ---------- republish after admin edits ----------
+
+def _run(paths):
+    for path, outcome in publish(paths):
+        if outcome != "published":
+            logger.info("Not published %s: %s", path, outcome)
+
+
+def _submit(paths):
+    from core.utils.offload import Saturated, bulkhead
+
+    try:
+        bulkhead("publish").submit(_run, paths)
+    except Saturated:  # after commit: must not fail the admin save
+        logger.warning("Publish bulkhead full; not republished: %s (run `publish_pages`)", ", ".join(paths))
+
+
+def _remember_post_slug(sender, instance, **kwargs):
+    """pre_save: the slug the post is published under now, to unpublish it if it changes."""
+    if instance.pk:
+        instance._published_slug = sender.objects.filter(pk=instance.pk).values_list("slug", flat=True).first()
+
+
+def _republish(namespace):
+    def receiver(sender, instance, **kwargs):
+        paths = [path for path, depends in _route_pages().items() if namespace in depends]
+        if sender._meta.label == "blog.Post" and getattr(settings, "PUBLISH_BLOG_POSTS", True):
+            paths.append(reverse("blog:detail", args=[instance.slug]))  # unpublished/deleted: files removed
+            old_slug = getattr(instance, "_published_slug", None)
+            if old_slug and old_slug != instance.slug:
+                paths.append(reverse("blog:detail", args=[old_slug]))  # now a 404: files removed
+        transaction.on_commit(lambda: _submit(paths))
+    return receiver
+
+
+def connect_signals() -> None:
+    """Republish dependent pages when a versioned model is saved/deleted (PUBLISH_ON_SAVE)."""
+    namespaces = {ns for depends in getattr(settings, "PUBLISHED_PAGES", {}).values() for ns in depends}
+    if getattr(settings, "PUBLISH_BLOG_POSTS", True):
+        namespaces.add("blog")
+    for label, namespace in versions.VERSIONED_MODELS.items():
+        if namespace not in namespaces:
+            continue
+        handler = _republish(namespace)
+        for name, signal in (("save", post_save), ("delete", post_delete)):
+            signal.connect(handler, sender=label, weak=False, dispatch_uid=f"publish:{name}:{label}")
+    if "blog" in namespaces:
+        pre_save.connect(_remember_post_slug, sender="blog.Post", dispatch_uid="publish:slug:blog.Post")
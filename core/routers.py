@@ -0,0 +1,137 @@
+# core/routers.py
+"""
+Read-replica routing for browse traffic.
+
+ReplicaRouter sends reads of the REPLICA_READ_APPS models to one of the
+DATABASE_REPLICAS aliases (chosen at random per query) and everything else,
+including every write, to "default". PRIMARY_ONLY_MODELS (work queues and
+bookkeeping rows, e.g. the email outbox: a lagging replica would hand out
+already-sent emails again) are always read from the primary. Reads also stay
+on the primary when:
+
+- this request/thread already wrote something (read-your-writes), or
+- they run inside a transaction.atomic() block on the primary, or
+- the visitor wrote within the last REPLICA_STICKY_SECONDS: ReplicaPinMiddleware
+  carries that across requests in a short-lived cookie (not the session, so
+  browsing still never writes one), or
+- the view is decorated with @read_from_primary (checkout and payments: prices
+  and stock must not come from a lagging copy).
+
+Replicas are never migrated; they are copies of the primary (see
+`manage.py sync_replicas` for a local SQLite stand-in).
+"""
+import contextvars
+import random
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.middleware import HybridMiddleware
+
+PIN_COOKIE = "pin_primary"
+
+PRIMARY_ONLY_MODELS = {"core.outboxemail", "core.requestprofile"}
+
+_pinned = contextvars.ContextVar("db_pinned_to_primary", default=False)
+_wrote = contextvars.ContextVar("db_wrote", default=False)
+
+
+def pin_primary(value: bool = True):
+    """Route this context's reads to the primary; returns a token for reset_pin()."""
+    return _pinned.set(value), _wrote.set(False)
+
+
+def reset_pin(token) -> None:
+    pinned, wrote = token
+    _pinned.reset(pinned)
+    _wrote.reset(wrote)
+
+
+def is_pinned() -> bool:
+    return _pinned.get()
+
+
+def read_from_primary(view):
+    """View decorator: every read of the request goes to the primary."""
+    # Only the pin is reset afterwards: ReplicaPinMiddleware still sees the writes
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def ainner(request, *args, **kwargs):
+            token = _pinned.set(True)
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _pinned.reset(token)
+        return ainner
+
+    @wraps(view)
+    def inner(request, *args, **kwargs):
+        token = _pinned.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _pinned.reset(token)
+    return inner
+
+
+class ReplicaRouter:
+    def _replicas(self) -> list:
+        return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+    def db_for_read(self, model, **hints):
+        replicas = self._replicas()
+        if not replicas or model._meta.app_label not in getattr(settings, "REPLICA_READ_APPS", ()):
+            return None
+        if model._meta.label_lower in PRIMARY_ONLY_MODELS:
+            return DEFAULT_DB_ALIAS
+        if _pinned.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _pinned.set(True)
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *self._replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in self._replicas():
+            return False
+        return None
+
+
+class ReplicaPinMiddleware(HybridMiddleware):
+    """Keep a visitor on the primary for REPLICA_STICKY_SECONDS after they write."""
+
+    def _finish(self, request, response, wrote):
+        if wrote:
+            response.set_cookie(
+                PIN_COOKIE, "1", max_age=getattr(settings, "REPLICA_STICKY_SECONDS", 5),
+                httponly=True, samesite="Lax",
+            )
+        return response
+
+    def call(self, request):
+        token = pin_primary(PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+            wrote = _wrote.get()
+        finally:
+            reset_pin(token)
+        return self._finish(request, response, wrote)
+
+    async def acall(self, request):
+        token = pin_primary(PIN_COOKIE in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+            wrote = _wrote.get()
+        finally:
+            reset_pin(token)
+        return self._finish(request, response, wrote)
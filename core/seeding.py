@@ -0,0 +1,218 @@
+# core/seeding.py
+"""
+Deterministic, batched generator for production-sized test data.
+
+Used by `manage.py seed_scale` and the benchmark suite. Primary keys are
+pre-allocated (core.utils.bulk.allocate_ids) so SKUs, slugs and child rows
+are written by a single bulk INSERT per batch, with no follow-up UPDATEs.
+Names embed the pk, so repeated runs never collide on unique columns.
+"""
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils.text import slugify
+
+from accounts.models import Address
+from cart.models import CartItem
+from catalog.models import Category, Product, ProductImage
+from core.utils.bulk import allocate_ids, chunked, explicit_timestamps
+from orders.models import Order, OrderItem
+from orders.utils import calculate_totals_from_items
+
+# Baseline sizes for --scale 1
+DEFAULT_COUNTS = {
+    "categories": 20,
+    "products": 500,
+    "images_per_product": 3,
+    "users": 1000,
+    "anon_carts": 200,
+    "orders": 5000,
+}
+
+# (status, weight)
+ORDER_STATUS_MIX = (("paid", 75), ("created", 15), ("cancelled", 10))
+
+CATEGORY_WORDS = [
+    "Drones", "Propulsion", "Avionics", "Power", "Frames", "Cameras",
+    "Sensors", "Radio", "Tools", "Kits", "Parachutes", "Payloads",
+]
+PRODUCT_ADJECTIVES = ["Pro", "Lite", "Max", "Mini", "Ultra", "Racing", "Survey", "Heavy-Lift", "Agri", "FPV"]
+PRODUCT_NOUNS = [
+    "Quadcopter", "Propeller Set", "Flight Controller", "ESC", "LiPo Battery", "Carbon Frame",
+    "Gimbal", "Camera", "Brushless Motor", "Receiver", "GPS Module", "Telemetry Radio",
+]
+CITIES = [
+    ("Bengaluru", "Karnataka", "560001"), ("Pune", "Maharashtra", "411001"),
+    ("Hyderabad", "Telangana", "500001"), ("Chennai", "Tamil Nadu", "600001"),
+    ("New Delhi", "Delhi", "110001"), ("Kolkata", "West Bengal", "700001"),
+]
+
+
+class ScaleSeeder:
+    def __init__(self, seed: int = 42, batch_size: int = 5000, password: str = "seed-pass-123",
+                 start: datetime = None, days: int = 365, log=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.password = password
+        self.start = start or datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        self.days = days
+        self.log = log or (lambda msg: None)
+        self._statuses = [s for s, _ in ORDER_STATUS_MIX]
+        self._weights = [w for _, w in ORDER_STATUS_MIX]
+
+    # ---------- internal helpers ----------
+
+    def _when(self) -> datetime:
+        return self.start + timedelta(seconds=self.rng.randrange(self.days * 86400))
+
+    def _bulk(self, model, objs) -> None:
+        for batch in chunked(objs, self.batch_size):
+            model.objects.bulk_create(batch, batch_size=self.batch_size)
+
+    # ---------- generators ----------
+
+    def categories(self, n: int) -> list:
+        ids = allocate_ids(Category, n)
+        objs = []
+        for pk in ids:
+            name = f"{self.rng.choice(CATEGORY_WORDS)} {pk}"
+            objs.append(Category(pk=pk, name=name, slug=slugify(name)))
+        self._bulk(Category, objs)
+        return objs
+
+    def products(self, n: int, categories: list, images_per_product: int = 0) -> list:
+        """Products with SKUs/slugs derived from pre-allocated pks, plus image rows."""
+        created = []
+        for ids in chunked(allocate_ids(Product, n), self.batch_size):
+            objs, images = [], []
+            for pk in ids:
+                category = self.rng.choice(categories) if categories else None
+                name = f"{self.rng.choice(PRODUCT_ADJECTIVES)} {self.rng.choice(PRODUCT_NOUNS)} {pk}"
+                objs.append(Product(
+                    pk=pk,
+                    category=category,
+                    name=name,
+                    slug=slugify(name),
+                    sku=Product.sku_for(pk, category.name if category else None, name),
+                    description=" ".join(self.rng.choices(PRODUCT_NOUNS, k=self.rng.randint(5, 40))),
+                    price=Decimal(self.rng.randint(199, 250000)) / 100,
+                    stock=self.rng.choice([0, 1, 5, 20, 100, 500]),
+                    is_active=self.rng.random() > 0.05,
+                    is_featured=self.rng.random() < 0.03,
+                    created_at=self._when(),
+                    cover_image=f"products/seed/{pk % 50:02d}-0.jpg" if images_per_product else "",
+                    cover_alt=name if images_per_product else "",
+                ))
+                for i in range(images_per_product):
+                    images.append(ProductImage(
+                        product_id=pk,
+                        image=f"products/seed/{pk % 50:02d}-{i}.jpg",
+                        alt=name,
+                        sort_order=i,
+                    ))
+            with transaction.atomic(), explicit_timestamps(Product, "created_at"):
+                Product.objects.bulk_create(objs, batch_size=self.batch_size)
+                ProductImage.objects.bulk_create(images, batch_size=self.batch_size)
+            created.extend(objs)
+            self.log(f"products: {len(created)}/{n}")
+        return created
+
+    def users(self, n: int, products: list, cart_ratio: float = 0.2) -> list:
+        """Users (one shared password hash) with 1-3 addresses each and some saved carts."""
+        password = make_password(self.password)  # hash once
+        created = []
+        for ids in chunked(allocate_ids(User, n), self.batch_size):
+            users, addresses, cart_rows = [], [], []
+            for pk in ids:
+                username = f"user{pk}"
+                email = f"{username}@example.com"
+                users.append(User(
+                    pk=pk, username=username, email=email, password=password,
+                    first_name="Seed", last_name=str(pk), date_joined=self._when(),
+                ))
+                for i in range(self.rng.randint(1, 3)):
+                    city, state, pincode = self.rng.choice(CITIES)
+                    addresses.append(Address(
+                        user_id=pk, full_name=f"Seed User {pk}", phone=f"9{pk % 10**9:09d}",
+                        email=email, line1=f"{self.rng.randint(1, 999)} Seed Road", city=city,
+                        state=state, pincode=pincode, is_default=(i == 0),
+                    ))
+                if products and self.rng.random() < cart_ratio:
+                    for product in self.rng.sample(products, k=min(len(products), self.rng.randint(1, 4))):
+                        cart_rows.append(CartItem(user_id=pk, product_id=product.pk,
+                                                  quantity=self.rng.randint(1, 3)))
+            with transaction.atomic():
+                User.objects.bulk_create(users, batch_size=self.batch_size)
+                Address.objects.bulk_create(addresses, batch_size=self.batch_size)
+                CartItem.objects.bulk_create(cart_rows, batch_size=self.batch_size)
+            created.extend(users)
+            self.log(f"users: {len(created)}/{n}")
+        return created
+
+    def anon_carts(self, n: int, products: list) -> int:
+        rows = []
+        for _ in range(n):
+            session_key = uuid.UUID(int=self.rng.getrandbits(128)).hex
+            for product in self.rng.sample(products, k=min(len(products), self.rng.randint(1, 5))):
+                rows.append(CartItem(session_key=session_key, product_id=product.pk,
+                                     quantity=self.rng.randint(1, 3)))
+        self._bulk(CartItem, rows)
+        return len(rows)
+
+    def orders(self, n: int, users: list, products: list) -> int:
+        """Orders with 1-4 items each, totals computed like checkout, realistic status mix."""
+        addresses = dict(
+            Address.objects.filter(user_id__in=[u.pk for u in users], is_default=True)
+            .values_list("user_id", "id")
+        )
+        done = 0
+        for ids in chunked(allocate_ids(Order, n), self.batch_size):
+            orders, items = [], []
+            for pk in ids:
+                user = self.rng.choice(users)
+                status = self.rng.choices(self._statuses, self._weights)[0]
+                lines = [
+                    OrderItem(order_id=pk, product_id=p.pk, price=p.price, quantity=self.rng.randint(1, 3))
+                    for p in self.rng.sample(products, k=min(len(products), self.rng.randint(1, 4)))
+                ]
+                totals = calculate_totals_from_items(lines)
+                orders.append(Order(
+                    pk=pk, user_id=user.pk, email=user.email, address_id=addresses.get(user.pk),
+                    subtotal=totals["subtotal"], shipping=totals["shipping"],
+                    tax=totals["tax"], total=totals["total"],
+                    razorpay_order_id=f"order_seed{pk:010d}" if status != "created" else "",
+                    payment_id=f"pay_seed{pk:010d}" if status == "paid" else "",
+                    status=status, created_at=self._when(),
+                ))
+                items.extend(lines)
+            with transaction.atomic(), explicit_timestamps(Order, "created_at"):
+                Order.objects.bulk_create(orders, batch_size=self.batch_size)
+                OrderItem.objects.bulk_create(items, batch_size=self.batch_size)
+            done += len(orders)
+            self.log(f"orders: {done}/{n}")
+        return done
+
+    # ---------- entry point ----------
+
+    def run(self, categories=0, products=0, images_per_product=0, users=0, anon_carts=0, orders=0) -> dict:
+        started = time.perf_counter()
+        cats = self.categories(categories) if categories else list(Category.objects.all())
+        prods = (self.products(products, cats, images_per_product) if products
+                 else list(Product.objects.only("id", "price")))
+        people = self.users(users, prods) if users else list(User.objects.only("id", "email"))
+        summary = {
+            "categories": len(cats) if categories else 0,
+            "products": len(prods) if products else 0,
+            "images": (len(prods) * images_per_product) if products else 0,
+            "users": len(people) if users else 0,
+            "anon_cart_rows": self.anon_carts(anon_carts, prods) if anon_carts and prods else 0,
+            "orders": self.orders(orders, people, prods) if orders and people and prods else 0,
+        }
+        summary["seconds"] = round(time.perf_counter() - started, 2)
+        return summary
@@ -0,0 +1,85 @@
+# core/templatetags/bundles.py
+"""
+{% bundle_css %} / {% bundle_js %}: the assets of an ASSET_BUNDLES entry.
+
+    {% load bundles %}
+    {% bundle_css "site" %}   in <head>
+    {% bundle_js "site" %}    before </body>
+
+Once `build_assets` has run (and ASSET_BUNDLES_ENABLED): the critical CSS
+inline, the full bundle loaded without blocking render (rel=preload, swapped
+to a stylesheet on load; <noscript> fallback) and one script tag. Without
+critical CSS the bundle is an ordinary, render-blocking stylesheet. Otherwise
+a <link>/<script> per source file, as before bundling.
+"""
+import posixpath
+import re
+
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from core import bundles
+
+register = template.Library()
+
+_loaded = {}  # path -> (mtime, critical CSS with absolute urls)
+
+
+def _entry(name):
+    if not getattr(settings, "ASSET_BUNDLES_ENABLED", False):
+        return None
+    return bundles.built(name)
+
+
+def _static_url(path):
+    try:
+        return static(path)
+    except ValueError:  # not collected yet (manifest storage)
+        return settings.STATIC_URL + path
+
+
+def _critical(filename):
+    """The critical CSS file, with url()s absolute (it's inlined into every page)."""
+    path = bundles.build_dir() / filename
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return ""
+    cached = _loaded.get(path)
+    if cached is None or cached[0] != mtime:
+        css = re.sub(
+            r'url\("(?!data:|/|[a-z]+://)([^"?#]*)([^"]*)"\)',
+            lambda m: f'url("{_static_url(posixpath.normpath(f"{bundles.PREFIX}/{m.group(1)}"))}{m.group(2)}")',
+            path.read_text(encoding="utf-8"),
+        )
+        cached = _loaded[path] = (mtime, css.replace("</", "<\\/"))
+    return cached[1]
+
+
+@register.simple_tag
+def bundle_css(name):
+    entry = _entry(name)
+    if not entry or not entry.get("css"):
+        return format_html_join("\n", '<link href="{}" rel="stylesheet">',
+                                ((static(path),) for path in bundles.bundles()[name].get("css", ())))
+    href = _static_url(f"{bundles.PREFIX}/{entry['css']}")
+    critical = _critical(entry["critical"]) if entry.get("critical") else ""
+    if not critical:
+        return format_html('<link href="{}" rel="stylesheet">', href)
+    return format_html(
+        '{}<link href="{}" rel="preload" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        '<noscript><link href="{}" rel="stylesheet"></noscript>',
+        mark_safe(f"<style>{critical}</style>\n"), href, href,
+    )
+
+
+@register.simple_tag
+def bundle_js(name):
+    entry = _entry(name)
+    if not entry or not entry.get("js"):
+        return format_html_join("\n", '<script src="{}"></script>',
+                                ((static(path),) for path in bundles.bundles()[name].get("js", ())))
+    return format_html('<script src="{}"></script>', _static_url(f"{bundles.PREFIX}/{entry['js']}"))
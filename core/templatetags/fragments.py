@@ -0,0 +1,91 @@
+# core/templatetags/fragments.py
+"""
+{% fragment %}: template fragment cache keyed by content versions.
+
+    {% load fragments %}
+    {% fragment "product_card" p.pk depends="catalog" %}
+      ...
+    {% endfragment %}
+
+The key is the fragment name + vary-on values + the current counters of the
+`depends` namespaces (core.utils.versions), so admin edits invalidate by
+bumping a counter, never by deleting keys. Optional timeout=<seconds>
+(default settings.FRAGMENT_CACHE_TIMEOUT).
+
+{% csrf_token %} inside a fragment is cached as a placeholder and replaced
+with the current request's token on every render, so forms can live inside
+cached fragments.
+"""
+from django import template
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.template.base import token_kwargs
+from django.utils.safestring import mark_safe
+
+from core.utils import versions
+
+register = template.Library()
+
+CSRF_PLACEHOLDER = "__fragment_csrf_token__"
+
+
+class FragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on, depends, timeout):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+        self.depends = depends
+        self.timeout = timeout
+
+    def _versions(self, context, namespaces) -> list:
+        # One lookup per namespace per template render, not one per fragment (cards in a loop)
+        memo = context.render_context.setdefault("fragment_versions", {})
+        missing = [ns for ns in namespaces if ns not in memo]
+        if missing:
+            memo.update(versions.get_versions(*missing))
+        return [f"{ns}:{memo[ns]}" for ns in namespaces]
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        depends = self.depends.resolve(context) if self.depends else ""
+        namespaces = [ns.strip() for ns in str(depends).split(",") if ns.strip()]
+        vary_on = [var.resolve(context) for var in self.vary_on] + self._versions(context, namespaces)
+        key = make_template_fragment_key(name, vary_on)
+
+        cache = caches[getattr(settings, "FRAGMENT_CACHE_ALIAS", "default")]
+        content = cache.get(key)
+        if content is None:
+            with context.push(csrf_token=CSRF_PLACEHOLDER):
+                content = self.nodelist.render(context)
+            timeout = self.timeout.resolve(context) if self.timeout else getattr(
+                settings, "FRAGMENT_CACHE_TIMEOUT", 86400)
+            cache.add(key, content, timeout)  # a fill: the key embeds the versions
+        if CSRF_PLACEHOLDER in content:
+            content = content.replace(CSRF_PLACEHOLDER, str(context.get("csrf_token", "")))
+        return mark_safe(content)
+
+
+@register.tag("fragment")
+def do_fragment(parser, token):
+    """{% fragment name [vary_on ...] [depends="ns1,ns2"] [timeout=seconds] %}"""
+    bits = token.split_contents()
+    tag_name, bits = bits[0], bits[1:]
+    if not bits:
+        raise template.TemplateSyntaxError(f"'{tag_name}' requires a fragment name.")
+    nodelist = parser.parse(("endfragment",))
+    parser.delete_first_token()
+
+    positional = []
+    while bits and "=" not in bits[0]:
+        positional.append(parser.compile_filter(bits.pop(0)))
+    options = token_kwargs(bits, parser, support_legacy=False)
+    if bits:
+        raise template.TemplateSyntaxError(f"'{tag_name}' got unexpected arguments: {' '.join(bits)}")
+    unknown = set(options) - {"depends", "timeout"}
+    if unknown:
+        raise template.TemplateSyntaxError(f"'{tag_name}' got unknown options: {', '.join(sorted(unknown))}")
+
+    return FragmentNode(
+        nodelist, positional[0], positional[1:], options.get("depends"), options.get("timeout"),
+    )
@@ -1,3 +1,477 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from io import StringIO
+import threading
+import time
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.mail import EmailMultiAlternatives
+from django.core.management import call_command
+from django.db import transaction
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core import bundles, publish
+from core.cachewarm import hot_urls, warm
+from core.models import OutboxEmail, PromoVideo, RequestProfile
+from core.routers import ReplicaRouter, pin_primary, reset_pin
+from core.utils import metrics, swr, versions
+from core.utils.mail import LocalSMTPServer, OutboxSender, enqueue
+from core.utils.offload import Bulkhead, Saturated
+from core.utils.profiling import StackSampler, make_token
+from core.utils.queryplan import CRITICAL_QUERIES, QueryPlanMixin
+from core.utils.warmup import STEPS, warmup
+
+
+class OutboxSenderTests(TestCase):
+    def _queue(self, n):
+        for i in range(n):
+            msg = EmailMultiAlternatives(f"Order #{i}", "text", "shop@example.com", [f"c{i}@example.com"])
+            msg.attach_alternative("<p>html</p>", "text/html")
+            msg.attach(f"invoice-{i}.pdf", b"%PDF-1.4 fake", "application/pdf")
+            enqueue(msg)
+
+    def test_batch_uses_one_connection(self):
+        self._queue(5)
+        with LocalSMTPServer() as smtp:
+            sender = OutboxSender(connection=smtp.get_connection(), rate_per_minute=0)
+            stats = sender.drain()
+            sender.close()
+        self.assertEqual(stats, {"sent": 5, "failed": 0})
+        self.assertEqual(len(smtp.messages), 5)
+        self.assertEqual(smtp.connections, 1)
+        self.assertIn(b"invoice-0.pdf", smtp.messages[0]["data"])
+        self.assertFalse(OutboxEmail.objects.filter(status="pending").exists())
+
+    def test_failure_is_retried_later(self):
+        self._queue(1)
+        unreachable = mock.Mock(**{"open.side_effect": ConnectionRefusedError(111, "Connection refused")})
+        sender = OutboxSender(connection=unreachable, rate_per_minute=0)
+        stats = sender.drain()
+        row = OutboxEmail.objects.get()
+        self.assertEqual(stats["sent"], 0)
+        self.assertEqual(row.status, "pending")
+        self.assertEqual(row.attempts, 1)
+        self.assertTrue(row.last_error.startswith("ConnectionRefusedError"))
+        unreachable.send_messages.assert_not_called()
+
+    def test_permanent_refusal_is_not_resent(self):
+        self._queue(1)
+        with LocalSMTPServer(reject={"c0@example.com"}) as smtp:
+            sender = OutboxSender(connection=smtp.get_connection(), rate_per_minute=0)
+            stats = sender.drain()
+            sender.close()
+        self.assertEqual(stats, {"sent": 0, "failed": 1})
+        self.assertEqual(smtp.connections, 1)  # no reconnect-and-resend
+        self.assertTrue(OutboxEmail.objects.get().last_error.startswith("SMTPRecipientsRefused"))
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_fragment_tracks_content_version_and_keeps_csrf(self):
+        tpl = Template(
+            '{% load fragments %}{% fragment "card" 1 depends="catalog" %}'
+            '{{ name }}{% csrf_token %}{% endfragment %}'
+        )
+        first = tpl.render(Context({"name": "Drone", "csrf_token": "tok-1"}))
+        self.assertIn("Drone", first)
+        self.assertIn('value="tok-1"', first)
+
+        # cached: new context values are not rendered, but the token is per request
+        second = tpl.render(Context({"name": "Changed", "csrf_token": "tok-2"}))
+        self.assertIn("Drone", second)
+        self.assertIn('value="tok-2"', second)
+
+        versions.bump("catalog")
+        self.assertIn("Changed", tpl.render(Context({"name": "Changed", "csrf_token": "tok-3"})))
+
+    def test_model_save_bumps_namespace(self):
+        before = versions.get_version("promo")
+        PromoVideo.objects.create(title="Launch", youtube_url="https://youtu.be/abcdefghijk")
+        self.assertNotEqual(versions.get_version("promo"), before)
+
+
+class StaleWhileRevalidateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "page"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(swr.get_or_compute("k", compute, ttl=60)))
+            for _ in range(5)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, ["page"] * 5)
+        self.assertEqual(len(calls), 1)
+
+    def test_stale_value_is_served_while_one_caller_refreshes(self):
+        swr.get_or_compute("k", lambda: "v1", ttl=60, stamp=1)
+        # stamp changed: stale, and the lock is held by someone else
+        cache.add("k:lock", 1)
+        self.assertEqual(swr.get_or_compute("k", lambda: "v2", ttl=60, stamp=2, background=False), "v1")
+        cache.delete("k:lock")
+        self.assertEqual(swr.get_or_compute("k", lambda: "v2", ttl=60, stamp=2, background=False), "v2")
+        self.assertEqual(swr.get_or_compute("k", lambda: "v3", ttl=60, stamp=2), "v2")
+
+    def test_anonymous_page_is_cached_until_content_changes(self):
+        url = reverse("core:home")
+        self.client.get(url)
+        self.client.cookies.clear()
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        PromoVideo.objects.create(title="Launch", youtube_url="https://youtu.be/abcdefghijk")
+        self.client.cookies.clear()
+        self.assertContains(self.client.get(url), "Launch")
+
+    def test_tracking_parameters_share_the_cached_page(self):
+        url = reverse("core:home")
+        self.client.get(url)
+        self.client.cookies.clear()
+        with self.assertNumQueries(0):
+            self.client.get(url + "?utm_source=newsletter&fbclid=abc")
+
+        rf = RequestFactory()
+        key = swr._page_key(rf.get(url), query=("page",))
+        self.assertEqual(swr._page_key(rf.get(url, {"utm_source": "x"}), query=("page",)), key)
+        self.assertNotEqual(swr._page_key(rf.get(url, {"page": "2"}), query=("page",)), key)
+
+
+class QueryPlanTests(QueryPlanMixin, TestCase):
+    def test_critical_queries_use_indexes(self):
+        for name, factory in CRITICAL_QUERIES.items():
+            with self.subTest(name):
+                self.assertIndexedPlan(factory(), label=name)
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"], REPLICA_READ_APPS=["catalog"])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.addCleanup(reset_pin, pin_primary(False))
+
+    def test_reads_go_to_replica_until_a_write(self):
+        from catalog.models import Product
+        from orders.models import Order
+
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Order))  # not a replicated app
+        self.assertEqual(router.db_for_read(Product), "replica1")
+        router.db_for_write(Order)
+        self.assertEqual(router.db_for_read(Product), "default")  # read-your-writes
+        self.assertFalse(router.allow_migrate("replica1", "catalog"))
+
+    @override_settings(REPLICA_READ_APPS=["core"])
+    def test_outbox_is_always_read_from_the_primary(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(PromoVideo), "replica1")
+        self.assertEqual(router.db_for_read(OutboxEmail), "default")
+        self.assertEqual(router.db_for_read(RequestProfile), "default")
+
+
+class BulkheadTests(SimpleTestCase):
+    def test_rejects_calls_beyond_max_pending(self):
+        gate = threading.Event()
+        head = Bulkhead("test", max_workers=1, max_pending=2)
+        running = [head.submit(gate.wait), head.submit(gate.wait)]
+        with self.assertRaises(Saturated):
+            head.submit(gate.wait)
+        gate.set()
+        for future in running:
+            future.result(timeout=5)
+        self.assertEqual(head.snapshot()["completed"], 2)
+        self.assertEqual(head.snapshot()["rejected"], 1)
+
+
+class ProfilingTests(TestCase):
+    def test_sampler_sees_the_busy_function(self):
+        def spin():
+            end = time.perf_counter() + 0.1
+            while time.perf_counter() < end:
+                pass
+
+        with StackSampler(0.002, threads={threading.get_ident()}) as sampler:
+            spin()
+        self.assertTrue(any(stack.endswith(".spin") for stack in sampler.collapsed()))
+
+    def test_signed_header_stores_a_downloadable_profile(self):
+        self.client.get(reverse("core:soft"))
+        self.client.get(reverse("core:soft"), HTTP_X_PROFILE_TOKEN="forged")
+        self.assertFalse(RequestProfile.objects.exists())
+
+        self.client.get(reverse("core:soft"), HTTP_X_PROFILE_TOKEN=make_token())
+        profile = RequestProfile.objects.get()
+        self.assertEqual((profile.view_name, profile.trigger), ("core:soft", "header"))
+
+        self.client.force_login(User.objects.create_superuser("admin", "a@example.com", "pw"))
+        response = self.client.get(reverse("admin:core_requestprofile_speedscope", args=[profile.pk]))
+        self.assertEqual(json.loads(response.content)["profiles"][0]["type"], "sampled")
+        response = self.client.get(reverse("admin:core_requestprofile_change", args=[profile.pk]))
+        self.assertContains(response, "Hottest frames")
+
+
+class MetricsTests(TestCase):
+    def test_histogram_is_merged_with_other_workers_files(self):
+        seconds = metrics.histogram("test_call_seconds", "test", ["op", "outcome"], buckets=(0.1, 1.0))
+        with seconds.time(op="create"):
+            pass
+        other = {"test_call_seconds": {
+            "kind": "histogram", "help": "test", "labelnames": ["op", "outcome"], "buckets": [0.1, 1.0],
+            "values": [[["create", "ok"], [0, 1, 0.5, 1]], [["create", "error"], [0, 0, 3.0, 1]]],
+        }}
+        with tempfile.TemporaryDirectory() as tmp, override_settings(METRICS_DIR=tmp):
+            (Path(tmp) / "metrics-999999.json").write_text(json.dumps(other))
+            text = metrics.render_exposition()
+
+        self.assertIn('test_call_seconds_bucket{op="create",outcome="ok",le="0.1"} 1', text)
+        self.assertIn('test_call_seconds_bucket{op="create",outcome="ok",le="1.0"} 2', text)
+        self.assertIn('test_call_seconds_count{op="create",outcome="ok"} 2', text)
+        self.assertIn('test_call_seconds_bucket{op="create",outcome="error",le="+Inf"} 1', text)
+
+    def test_exiting_worker_folds_its_file_into_the_archive(self):
+        hits = metrics.counter("test_archived_total", "test")
+        hits.inc(2)
+        archived = {"test_archived_total": {"kind": "counter", "help": "test", "labelnames": [], "buckets": [],
+                                            "values": [[[], 3.0]]}}
+        with tempfile.TemporaryDirectory() as tmp, override_settings(METRICS_DIR=tmp):
+            (Path(tmp) / metrics.ARCHIVE).write_text(json.dumps(archived))
+            exporter = metrics._FileExporter()
+            exporter.pid = os.getpid()
+            exporter.flush()
+            self.assertTrue(exporter.path().exists())
+            exporter.close()
+            exporter.flush()  # a late flusher tick must not bring the file back
+            files = sorted(p.name for p in Path(tmp).glob("metrics-*.json"))
+            totals = json.loads((Path(tmp) / metrics.ARCHIVE).read_text())
+        self.assertEqual(files, [metrics.ARCHIVE])
+        self.assertEqual(totals["test_archived_total"]["values"], [[[], 5.0]])
+
+    @override_settings(METRICS_TOKEN="s3cret")
+    def test_endpoint_needs_the_scrape_token(self):
+        self.client.get(reverse("core:soft"))
+        self.assertEqual(self.client.get(reverse("core:metrics")).status_code, 403)
+        response = self.client.get(reverse("core:metrics"), HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertContains(response, 'http_request_duration_seconds_count{view="core:soft",method="GET",status="2xx"}')
+
+
+class CacheWarmingTests(TransactionTestCase):  # warm() renders on its own threads/connections
+    def setUp(self):
+        cache.clear()
+
+    def test_warmed_pages_are_served_from_the_page_cache(self):
+        from catalog.models import Category, Product
+
+        cat = Category.objects.create(name="Drones")
+        product = Product.objects.create(category=cat, name="Hawk", price=1, stock=1)
+        urls = hot_urls(top_products=5)
+        self.assertIn(reverse("catalog:category", args=[cat.slug]), urls)
+        self.assertIn(reverse("catalog:product_detail", args=[product.slug]), urls)
+
+        results = warm(urls, "http://testserver", workers=2)
+        self.assertEqual({status for _, status, _ in results}, {200})
+        fresh = swr.stats["fresh"]
+        self.client.get(reverse("catalog:product_detail", args=[product.slug]))
+        self.assertEqual(swr.stats["fresh"], fresh + 1)
+
+
+class PublishTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.enterContext(override_settings(PUBLISH_ROOT=tmp.name))
+
+    def test_published_page_is_served_without_touching_the_views(self):
+        gone = reverse("blog:detail", args=["unpublished"])
+        results = dict(publish.publish([reverse("team:list"), gone], base_url="http://testserver"))
+        self.assertEqual(results, {reverse("team:list"): "published", gone: "status 404"})
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("team:list"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual((response["X-Published"], response["Content-Encoding"]), ("1", "gzip"))
+        again = self.client.get(reverse("team:list"), HTTP_ACCEPT_ENCODING="gzip",
+                                HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+        self.client.cookies["sessionid"] = "someone"
+        self.assertFalse(self.client.get(reverse("team:list")).has_header("X-Published"))
+
+    def test_odd_paths_and_hosts_are_not_served_from_disk(self):
+        publish.publish([reverse("team:list")], base_url="http://testserver")
+        self.assertIsNone(publish.page_dir("/team/\x00/"))
+        self.assertEqual(self.client.get("/team/%00/").status_code, 404)
+        self.assertEqual(self.client.get(reverse("team:list"), HTTP_HOST="evil.example").status_code, 400)
+
+    def test_republishing_renders_the_view_not_the_old_file(self):
+        from team.models import TeamMember
+
+        publish.publish([reverse("team:list")], base_url="http://testserver")
+        TeamMember.objects.create(name="New Hire", role="Pilot", is_active=True)
+        publish.publish([reverse("team:list")], base_url="http://testserver")
+        self.assertContains(self.client.get(reverse("team:list")), "New Hire")
+
+    def _connect_signals(self):
+        from django.db.models.signals import post_delete, post_save, pre_save
+
+        publish.connect_signals()
+        for uid, signal in (("save", post_save), ("delete", post_delete), ("slug", pre_save)):
+            for label in ("blog.Post", "team.TeamMember", "customers.Customer"):
+                self.addCleanup(signal.disconnect, sender=label, dispatch_uid=f"publish:{uid}:{label}")
+
+    @override_settings(SITE_URL="http://testserver")
+    def test_renamed_post_is_unpublished_under_its_old_slug(self):
+        from blog.models import Post
+
+        self._connect_signals()
+        post = Post.objects.create(title="Old", slug="old-slug", content="x")
+        publish.publish([reverse("blog:detail", args=["old-slug"])], base_url="http://testserver")
+        old_file = publish.page_dir("/blog/old-slug/") / "index.html"
+        self.assertTrue(old_file.exists())
+
+        post.slug = "new-slug"
+        with mock.patch.object(publish, "_submit", publish._run), \
+                self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        self.assertFalse(old_file.exists())
+        self.assertTrue((publish.page_dir("/blog/new-slug/") / "index.html").exists())
+
+    def test_full_publish_bulkhead_does_not_fail_the_save(self):
+        from team.models import TeamMember
+
+        self._connect_signals()
+        full = mock.Mock()
+        full.submit.side_effect = Saturated("publish: 100 calls in flight")
+        with mock.patch("core.utils.offload.bulkhead", return_value=full), \
+                self.assertLogs("core.publish", "WARNING"), self.captureOnCommitCallbacks(execute=True):
+            TeamMember.objects.create(name="Busy", role="Pilot", is_active=True)
+
+
+class AssetBundleTests(TestCase):
+    def test_urls_are_rebased_onto_the_build_directory(self):
+        css = bundles.rewrite_urls(
+            'a{src:url("fonts/i.woff2?v=1#x")}b{background:url(data:image/png;base64,AA==)}',
+            "assets/vendor/icons/icons.css",
+        )
+        self.assertEqual(css, 'a{src:url("../assets/vendor/icons/fonts/i.woff2?v=1#x")}'
+                              'b{background:url(data:image/png;base64,AA==)}')
+        self.assertEqual(bundles.minify_css('/* c */ a > b ,\n i { content: " ; " ; }'), 'a>b,i{content:" ; "}')
+
+    def test_built_bundle_replaces_the_source_files(self):
+        login = reverse("login")
+        self.assertContains(self.client.get(login), "assets/vendor/bootstrap/css/bootstrap.min.css")
+
+        with tempfile.TemporaryDirectory() as tmp, \
+                override_settings(ASSET_BUILD_DIR=tmp, ASSET_BUNDLES_ENABLED=True):
+            bundles.build()
+            critical = (Path(tmp) / "site.critical.css").read_text()
+            html = self.client.get(login).content.decode()
+
+        self.assertIn(".header .logo img{", critical)  # in the header
+        self.assertNotIn(".footer .footer-newsletter", critical)  # below the fold
+        self.assertIn('<link href="/static/build/site.css" rel="preload" as="style"', html)
+        self.assertIn('<script src="/static/build/site.js"></script>', html)
+        self.assertNotIn("bootstrap.min.css", html)
+        self.assertIn("/static/assets/vendor/bootstrap-icons/fonts/bootstrap-icons.woff2", html)
+
+
+class SeedScaleTests(TestCase):
+    COUNTS = dict(categories=3, products=12, images_per_product=2, users=5, anon_carts=3, orders=8)
+
+    def _seed_and_snapshot(self):
+        from cart.models import CartItem
+        from catalog.models import Product, ProductImage
+        from orders.models import Order, OrderItem
+
+        class Rollback(Exception):
+            pass
+
+        # same seed into the same (empty) tables, then undone for the next run
+        try:
+            with transaction.atomic():
+                call_command("seed_scale", seed=7, stdout=StringIO(), **self.COUNTS)
+                snapshot = {
+                    "counts": [m.objects.count() for m in (Product, ProductImage, User, CartItem, Order, OrderItem)],
+                    "products": list(Product.objects.order_by("pk").values_list(
+                        "pk", "sku", "slug", "category_id", "price", "stock", "is_active", "created_at")),
+                    "users": list(User.objects.order_by("pk").values_list("pk", "username", "date_joined")),
+                    "carts": list(CartItem.objects.order_by("pk").values_list(
+                        "user_id", "session_key", "product_id", "quantity")),
+                    "orders": list(Order.objects.order_by("pk").values_list(
+                        "pk", "user_id", "status", "total", "created_at")),
+                }
+                raise Rollback
+        except Rollback:
+            pass
+        return snapshot
+
+    def test_same_seed_generates_the_same_rows(self):
+        first = self._seed_and_snapshot()
+        self.assertEqual(first["counts"][:3], [12, 24, 5])
+        self.assertEqual(first["counts"][4], 8)
+        self.assertEqual(first, self._seed_and_snapshot())
+
+
+class WarmupTests(SimpleTestCase):
+    databases = "__all__"  # warmup opens and closes connections; no test transaction
+
+    def test_every_step_runs_without_errors(self):
+        with self.assertNoLogs("core.utils.warmup", level="ERROR"):
+            timings = warmup()
+        self.assertEqual(set(timings), {name for name, _ in STEPS} | {"total"})
+
+
+def _worker_cache(name):
+    return {
+        "BACKEND": "core.cache.TwoTierCache",
+        "LOCATION": "l2",
+        "OPTIONS": {"L1_NAME": f"test-{name}", "SYNC_INTERVAL": 0},
+    }
+
+
+@override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "l2": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "two-tier-l2"},
+    "a": _worker_cache("a"),
+    "b": _worker_cache("b"),
+})
+class TwoTierCacheTests(TestCase):
+    def setUp(self):
+        caches["l2"].clear()
+        self.a, self.b = caches["a"], caches["b"]
+        for worker in (self.a, self.b):
+            worker.clear()
+            worker.reset_stats()
+
+    def test_write_in_one_worker_invalidates_the_other(self):
+        self.a.set("price", 10)
+        self.assertEqual(self.b.get("price"), 10)  # L2 hit, now in b's L1
+        self.assertEqual(self.b.get("price"), 10)  # L1 hit
+        self.a.set("price", 12)
+        self.assertEqual(self.b.get("price"), 12)
+        self.a.delete("price")
+        self.assertIsNone(self.b.get("price"))
+
+        stats = self.b.stats()
+        self.assertEqual((stats["l1_hits"], stats["l2_hits"], stats["misses"]), (1, 2, 1))
+        self.assertGreaterEqual(stats["invalidations"], 2)
+
+    def test_incr_is_seen_by_other_worker(self):
+        self.a.set("version:catalog", 1, timeout=None)
+        self.assertEqual(self.b.get("version:catalog"), 1)
+        self.b.incr("version:catalog")
+        self.assertEqual(self.a.get("version:catalog"), 2)
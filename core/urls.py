@@ -8,4 +8,6 @@ urlpatterns = [
     path("", views.home, name="home"),
     path("soft/", views.soft, name="soft"),
     path("hard/", views.hard, name="hard"),
+    path("internal/cache-stats/", views.cache_stats, name="cache_stats"),
+    path("internal/metrics/", views.metrics, name="metrics"),
 ]
@@ -0,0 +1,130 @@
+# core/utils/assets.py
+"""
+Process-level cache for branding assets (logo, fonts, inline CSS).
+
+Files are looked up through the staticfiles finders once, read once and kept
+in memory. Every access does a single os.stat() and reloads the entry only if
+the file's mtime changed, so editing the logo does not need a restart.
+
+settings.BRANDING_ASSETS names them ({"logo": "assets/img/..."}); code asks for
+branding_path("logo") rather than repeating the path.
+"""
+import base64
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_entries: Dict[str, "CachedAsset"] = {}
+
+
+class CachedAsset:
+    """One static file held in memory, with lazily derived representations."""
+
+    def __init__(self, static_path: str, fs_path: str, mtime: float, data: bytes):
+        self.static_path = static_path
+        self.fs_path = fs_path
+        self.mtime = mtime
+        self.data = data
+        self._b64 = None
+        self._image_reader = None
+
+    @property
+    def b64(self) -> str:
+        if self._b64 is None:
+            self._b64 = base64.b64encode(self.data).decode("ascii")
+        return self._b64
+
+    @property
+    def text(self) -> str:
+        return self.data.decode("utf-8")
+
+    @property
+    def file_url(self) -> str:
+        """file:// URL, so HTML->PDF engines load the file instead of parsing a data URI."""
+        return Path(self.fs_path).resolve().as_uri()
+
+    @property
+    def image_reader(self):
+        """Pre-decoded ReportLab ImageReader (ReportLab imported on first use)."""
+        if self._image_reader is None:
+            from io import BytesIO
+            from reportlab.lib.utils import ImageReader
+            self._image_reader = ImageReader(BytesIO(self.data))
+        return self._image_reader
+
+
+def _load(static_path: str, fs_path: str) -> Optional[CachedAsset]:
+    try:
+        mtime = os.stat(fs_path).st_mtime
+        with open(fs_path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        logger.warning("Failed to read asset %s: %s", static_path, e)
+        return None
+    return CachedAsset(static_path, fs_path, mtime, data)
+
+
+def get_asset(static_path: str) -> Optional[CachedAsset]:
+    """Return the cached asset for a static path, reloading it if the file changed."""
+    entry = _entries.get(static_path)
+    if entry is not None:
+        try:
+            if os.stat(entry.fs_path).st_mtime == entry.mtime:
+                return entry
+        except OSError:
+            pass  # file moved/deleted: fall through and look it up again
+
+    fs_path = finders.find(static_path)
+    if not fs_path:
+        logger.warning("Asset not found at static path: %s", static_path)
+        with _lock:
+            _entries.pop(static_path, None)
+        return None
+
+    entry = _load(static_path, fs_path)
+    with _lock:
+        if entry is None:
+            _entries.pop(static_path, None)
+        else:
+            _entries[static_path] = entry
+    return entry
+
+
+def asset_b64(static_path: str) -> Optional[str]:
+    entry = get_asset(static_path)
+    return entry.b64 if entry else None
+
+
+def asset_file_url(static_path: str) -> Optional[str]:
+    entry = get_asset(static_path)
+    return entry.file_url if entry else None
+
+
+def asset_text(static_path: str) -> Optional[str]:
+    entry = get_asset(static_path)
+    return entry.text if entry else None
+
+
+def branding_path(name: str) -> str:
+    """Static path of a named branding asset (settings.BRANDING_ASSETS)."""
+    return settings.BRANDING_ASSETS[name]
+
+
+def preload(static_paths=None) -> int:
+    """Load the branding assets into memory; called once from CoreConfig.ready()."""
+    if static_paths is None:
+        static_paths = settings.BRANDING_ASSETS.values()
+    return sum(1 for p in static_paths if get_asset(p) is not None)
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
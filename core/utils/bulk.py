@@ -0,0 +1,105 @@
+# core/utils/bulk.py
+"""
+Helpers for bulk writes: pre-allocated primary keys (so values derived from
+the pk, like Product.sku, go in with the INSERT), chunking and explicit
+timestamps for auto_now_add fields.
+"""
+from contextlib import contextmanager
+from itertools import islice
+
+from django.db import connections, router
+
+
+def chunked(iterable, size: int):
+    """Yield lists of at most `size` items."""
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def allocate_ids(model, n: int, using=None) -> list:
+    """
+    Reserve `n` primary keys for `model`.
+
+    PostgreSQL: taken from the table's sequence, safe alongside live traffic.
+    Other backends: continue from MAX(pk); only safe for a single writer
+    (batch jobs), which is what SQLite allows anyway.
+    """
+    if n <= 0:
+        return []
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    table = model._meta.db_table
+    pk_column = model._meta.pk.column
+    qn = connection.ops.quote_name
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+                [table, pk_column, n],
+            )
+            return [row[0] for row in cursor.fetchall()]
+        cursor.execute(f"SELECT MAX({qn(pk_column)}) FROM {qn(table)}")
+        start = (cursor.fetchone()[0] or 0) + 1
+    return list(range(start, start + n))
+
+
+@contextmanager
+def explicit_timestamps(model, *field_names):
+    """
+    Let bulk_create keep given values for auto_now_add/auto_now fields.
+    Flips process-wide field flags: use from batch commands, not request code.
+    """
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, (auto_now, auto_now_add) in zip(fields, saved):
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def allocate_slug(base: str, taken: set, max_length: int = 50) -> str:
+    """
+    First free slug among base, base-2, base-3, ... (truncated to max_length).
+    The result is added to `taken`, so one set can serve a whole batch.
+    """
+    base = (base or "item")[:max_length].strip("-") or "item"
+    slug, n = base, 1
+    while slug in taken:
+        n += 1
+        suffix = f"-{n}"
+        slug = f"{base[:max_length - len(suffix)].rstrip('-')}{suffix}"
+    taken.add(slug)
+    return slug
+
+
+def update_rows(model, fields, rows, using=None) -> int:
+    """
+    `UPDATE ... SET f1 = %s, ... WHERE pk = %s` via cursor.executemany() for
+    rows of (pk, value1, value2, ...). Much cheaper than bulk_update()'s CASE
+    expressions when every row gets different values. Bypasses save()/signals.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    meta = model._meta
+    columns = [meta.get_field(name) for name in fields]
+    assignments = ", ".join(f"{qn(f.column)} = %s" for f in columns)
+    sql = f"UPDATE {qn(meta.db_table)} SET {assignments} WHERE {qn(meta.pk.column)} = %s"
+    params = [
+        [f.get_db_prep_save(value, connection) for f, value in zip(columns, values)] + [pk]
+        for pk, *values in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+    return len(rows)
@@ -0,0 +1,105 @@
+# core/utils/conditional.py
+"""
+Conditional GET for public pages.
+
+    @conditional_page(lambda request, slug: Post.objects.filter(slug=slug)
+                      .values_list("updated_at", flat=True).first())
+    def post_detail(request, slug): ...
+
+The stamp function returns the page's content stamp: a datetime (row
+updated_at) or any string (e.g. a content version from core.utils.versions);
+None means "unknown" and the view renders normally (404s etc).
+
+Every page extends base.html, which shows per-visitor bits (login state, cart
+badge, flash messages, CSRF token), so the ETag mixes the content stamp with
+that visitor state. Last-Modified can't carry visitor state, so it is only
+sent to and honoured for cookie-less visitors (crawlers, first hits).
+"""
+import hashlib
+from datetime import datetime
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+SESSION_MESSAGES_KEY = "_messages"
+MESSAGES_COOKIE = "messages"
+
+
+def visitor_state(request) -> str:
+    from cart.context_processors import cart_count
+
+    user = request.user
+    session = request.session
+    return "|".join([
+        f"u{user.pk}" if user.is_authenticated else "anon",
+        f"c{cart_count(request)}",
+        request.META.get("CSRF_COOKIE", ""),  # secret the page's tokens are masked from
+        request.COOKIES.get(MESSAGES_COOKIE, ""),
+        str(session.get(SESSION_MESSAGES_KEY, "")) if session.session_key else "",
+    ])
+
+
+def page_etag(request, stamp) -> str:
+    if isinstance(stamp, datetime):
+        stamp = stamp.isoformat()
+    raw = f"{request.path}|{stamp}|{visitor_state(request)}"
+    return quote_etag(hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest())
+
+
+def conditional_page(stamp_func):
+    """
+    Like django.views.decorators.http.condition(), with the content stamp looked
+    up once and the response ETag recomputed after rendering: a first visit
+    creates the CSRF secret while rendering, and the next request carries it.
+    Works on sync and async views (stamp_func is always sync).
+    """
+    def precondition(request, *args, **kwargs):
+        """(stamp, last_modified, early response or None); stamp None = not conditional."""
+        if request.method not in ("GET", "HEAD"):
+            return None, None, None
+        stamp = stamp_func(request, *args, **kwargs)
+        if stamp is None:
+            return None, None, None
+        last_modified = None
+        if isinstance(stamp, datetime) and not request.COOKIES:
+            last_modified = int(stamp.timestamp())
+        response = get_conditional_response(
+            request, etag=page_etag(request, stamp), last_modified=last_modified,
+        )
+        return stamp, last_modified, response
+
+    def finish(request, stamp, last_modified, response, rendered):
+        if rendered:
+            if response.status_code != 200:
+                return response
+            response.headers.setdefault("ETag", page_etag(request, stamp))
+        if last_modified:
+            response.headers.setdefault("Last-Modified", http_date(last_modified))
+        return response
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def ainner(request, *args, **kwargs):
+                stamp, last_modified, response = await sync_to_async(precondition)(request, *args, **kwargs)
+                if stamp is None:
+                    return await view(request, *args, **kwargs)
+                rendered = response is None
+                if rendered:
+                    response = await view(request, *args, **kwargs)
+                return await sync_to_async(finish)(request, stamp, last_modified, response, rendered)
+            return ainner
+
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            stamp, last_modified, response = precondition(request, *args, **kwargs)
+            if stamp is None:
+                return view(request, *args, **kwargs)
+            rendered = response is None
+            if rendered:
+                response = view(request, *args, **kwargs)
+            return finish(request, stamp, last_modified, response, rendered)
+        return inner
+    return decorator
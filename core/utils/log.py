@@ -0,0 +1,122 @@
+# core/utils/log.py
+"""
+Structured logging helpers, wired up by LOGGING in shopsite/settings.py.
+
+    logger = logging.getLogger(__name__)
+    with log_context(order_id=order.id):
+        logger.info("invoice sent", extra={"ms": 12.3})
+
+- JsonFormatter      one JSON object per line, including context + extra fields
+- ContextFilter      copies request_id / order_id (from log_context) onto records
+- SamplingFilter     lets through 1 in N DEBUG records per logger
+- QueueStreamHandler formats and writes on a background thread, so the
+                     request thread never blocks on stdout
+"""
+import atexit
+import contextvars
+import copy
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from contextlib import contextmanager
+
+_context: contextvars.ContextVar = contextvars.ContextVar("log_context", default={})
+
+# Attributes every LogRecord has; anything else came in through `extra=`.
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+def get_context() -> dict:
+    return dict(_context.get())
+
+
+def bind(**fields) -> contextvars.Token:
+    """Add fields to the current context; returns a token for unbind()."""
+    return _context.set({**_context.get(), **fields})
+
+
+def unbind(token: contextvars.Token) -> None:
+    _context.reset(token)
+
+
+@contextmanager
+def log_context(**fields):
+    token = bind(**fields)
+    try:
+        yield
+    finally:
+        unbind(token)
+
+
+class ContextFilter(logging.Filter):
+    def filter(self, record):
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep every record at INFO and above; keep 1 in `rate` DEBUG records per logger."""
+
+    def __init__(self, rate=10):
+        super().__init__()
+        self.rate = max(1, int(rate))
+        self._counters = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate == 1:
+            return True
+        counter = self._counters.get(record.name)
+        if counter is None:
+            counter = self._counters.setdefault(record.name, itertools.count())
+        return next(counter) % self.rate == 0
+
+
+class JsonFormatter(logging.Formatter):
+    converter = time.gmtime
+
+    def format(self, record):
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class QueueStreamHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to a queue; a QueueListener thread does the formatting and
+    the write to `stream`. Configure `formatter` on this handler as usual.
+    """
+
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        self._target = logging.StreamHandler(stream or sys.stdout)
+        self._listener = logging.handlers.QueueListener(self.queue, self._target)
+        self._listener.start()
+        atexit.register(self._listener.stop)
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self._target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Filters (ContextFilter) already ran on this thread. Render the message
+        # now so later mutation of the args can't change it, and leave
+        # formatting (JSON, traceback) to the listener thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
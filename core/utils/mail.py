@@ -0,0 +1,304 @@
+# core/utils/mail.py
+"""
+Email outbox: queue messages in the DB and drain them over one long-lived
+SMTP connection, instead of a fresh TLS handshake per EmailMessage.send().
+
+    enqueue(msg)            -> store an EmailMultiAlternatives as an OutboxEmail row
+    send_or_enqueue(msg)    -> enqueue if settings.EMAIL_USE_OUTBOX, else send now
+    OutboxSender().drain()  -> send one batch of due rows (used by `manage.py send_outbox`)
+
+LocalSMTPServer is a tiny in-process SMTP sink for tests and local runs.
+"""
+import base64
+import smtplib
+import socketserver
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.utils import timezone
+
+from core.models import OutboxEmail
+from core.utils import tracing
+from core.utils.metrics import histogram
+
+EMAIL_SECONDS = histogram(
+    "email_send_seconds", "SMTP send time per message (inline or from the outbox)",
+    ["path", "outcome"],
+)
+
+# Errors after which the connection is re-opened and the message retried once.
+# Only a dropped connection: every SMTPException is an OSError too, and a
+# permanent refusal (550, auth) would fail the same way again.
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+# ----------------------- Outbox -----------------------
+
+def enqueue(msg: EmailMultiAlternatives) -> OutboxEmail:
+    """Store the message for the outbox sender; no network I/O happens here."""
+    html_body = ""
+    for content, mimetype in getattr(msg, "alternatives", []) or []:
+        if mimetype == "text/html":
+            html_body = content
+            break
+
+    attachments = []
+    for att in msg.attachments:
+        filename, content, mimetype = att
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        attachments.append([filename, base64.b64encode(content).decode("ascii"), mimetype])
+
+    return OutboxEmail.objects.create(
+        subject=msg.subject,
+        from_email=msg.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(msg.to),
+        cc=list(msg.cc),
+        bcc=list(msg.bcc),
+        body=msg.body or "",
+        html_body=html_body,
+        attachments=attachments,
+        traceparent=tracing.current_traceparent(),  # the sender continues this trace
+    )
+
+
+def send_or_enqueue(msg: EmailMultiAlternatives):
+    """Queue the message when the outbox is enabled, otherwise send it inline."""
+    if getattr(settings, "EMAIL_USE_OUTBOX", False):
+        return enqueue(msg)
+    with EMAIL_SECONDS.time(path="inline"), tracing.span("smtp.send", kind="client", path="inline"):
+        return msg.send(fail_silently=False)
+
+
+def build_message(row: OutboxEmail, connection=None) -> EmailMultiAlternatives:
+    msg = EmailMultiAlternatives(
+        row.subject, row.body, row.from_email, row.to,
+        cc=row.cc or None, bcc=row.bcc or None, connection=connection,
+    )
+    if row.html_body:
+        msg.attach_alternative(row.html_body, "text/html")
+    for filename, content_b64, mimetype in row.attachments or []:
+        msg.attach(filename, base64.b64decode(content_b64), mimetype)
+    return msg
+
+
+class OutboxSender:
+    """
+    Drains pending OutboxEmail rows over a single connection from get_connection().
+
+    The connection stays open between drain() calls, so a long-running
+    `send_outbox --loop` does one handshake for a whole burst of emails.
+    Sends are spaced to stay under `rate_per_minute`; a dropped connection
+    is re-opened and the message retried once before it counts as a failure.
+    Failed rows are retried with exponential backoff up to `max_attempts`.
+    Run a single sender process: rows are not locked while being sent.
+    """
+
+    def __init__(self, connection=None, batch_size=None, rate_per_minute=None, max_attempts=None):
+        self.connection = connection or get_connection(fail_silently=False)
+        self.batch_size = batch_size or getattr(settings, "EMAIL_OUTBOX_BATCH_SIZE", 50)
+        if rate_per_minute is None:
+            rate_per_minute = getattr(settings, "EMAIL_OUTBOX_RATE_PER_MINUTE", 0)
+        self.min_interval = 60.0 / rate_per_minute if rate_per_minute else 0.0
+        self.max_attempts = max_attempts or getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 5)
+        self._last_send = 0.0
+
+    # ---------- internal helpers ----------
+
+    def _throttle(self) -> None:
+        if not self.min_interval:
+            return
+        wait = self._last_send + self.min_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+    def _reconnect(self) -> None:
+        self.connection.close()
+        self.connection.open()
+
+    def _send(self, msg) -> None:
+        self._throttle()
+        try:
+            with EMAIL_SECONDS.time(path="outbox"):
+                try:
+                    self.connection.send_messages([msg])
+                except RECONNECT_ERRORS:
+                    self._reconnect()
+                    self.connection.send_messages([msg])
+        finally:
+            self._last_send = time.monotonic()
+
+    def _mark_failed(self, row: OutboxEmail, error: Exception) -> None:
+        row.attempts += 1
+        row.last_error = f"{type(error).__name__}: {error}"
+        if row.attempts >= self.max_attempts:
+            row.status = "failed"
+        else:
+            row.next_attempt_at = timezone.now() + timedelta(seconds=min(30 * 2 ** row.attempts, 3600))
+        row.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+
+    # ---------- public API ----------
+
+    def due(self):
+        return (
+            OutboxEmail.objects
+            .filter(status="pending", next_attempt_at__lte=timezone.now())
+            .order_by("created_at")[: self.batch_size]
+        )
+
+    def drain(self) -> dict:
+        """Send one batch of due messages. Returns {'sent': n, 'failed': n}."""
+        stats = {"sent": 0, "failed": 0}
+        rows = list(self.due())
+        if not rows:
+            return stats
+
+        try:
+            self.connection.open()
+        except Exception as e:
+            # Server unreachable: every row in the batch gets a retry slot.
+            for row in rows:
+                self._mark_failed(row, e)
+            stats["failed"] = len(rows)
+            return stats
+
+        for row in rows:
+            try:
+                with tracing.span("smtp.send", kind="client", traceparent=row.traceparent, path="outbox",
+                                  **{"outbox.id": row.pk, "outbox.attempt": row.attempts + 1}):
+                    self._send(build_message(row, connection=self.connection))
+            except Exception as e:
+                self._mark_failed(row, e)
+                stats["failed"] += 1
+                continue
+            row.status = "sent"
+            row.attempts += 1
+            row.sent_at = timezone.now()
+            row.last_error = ""
+            row.save(update_fields=["status", "attempts", "sent_at", "last_error"])
+            stats["sent"] += 1
+        return stats
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+# ----------------------- Local SMTP stand-in -----------------------
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough of RFC 5321 for smtplib / Django's SMTP backend (no TLS, no AUTH)."""
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self._reply("220 localhost SMTP stand-in")
+        mail_from, rcpt_to = None, []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            verb = line[:4].upper()
+            arg = line.split(":", 1)[1].strip().strip("<>") if ":" in line else ""
+
+            if verb == "EHLO":
+                self._reply("250-localhost")
+                self._reply("250 8BITMIME")
+            elif verb == "HELO":
+                self._reply("250 localhost")
+            elif verb == "MAIL":
+                mail_from, rcpt_to = arg, []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                if arg in server.reject:
+                    self._reply("550 No such user here")
+                    continue
+                rcpt_to.append(arg)
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                chunks = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b".\r\n", b".\n"):
+                        break
+                    if data_line.startswith(b".."):
+                        data_line = data_line[1:]
+                    chunks.append(data_line)
+                with server.lock:
+                    server.messages.append({
+                        "from": mail_from,
+                        "to": rcpt_to,
+                        "data": b"".join(chunks),
+                    })
+                mail_from, rcpt_to = None, []
+                self._reply("250 OK queued")
+            elif verb == "RSET":
+                mail_from, rcpt_to = None, []
+                self._reply("250 OK")
+            elif verb == "NOOP":
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    In-process SMTP sink on 127.0.0.1 (random port by default).
+
+        with LocalSMTPServer() as smtp:
+            conn = smtp.get_connection()
+            ...
+            smtp.messages     # [{'from', 'to', 'data'}, ...]
+            smtp.connections  # number of SMTP sessions opened
+
+    Recipients in `reject` are refused with a 550.
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, reject=()):
+        super().__init__((host, port), _SMTPHandler)
+        self.reject = set(reject)
+        self.lock = threading.Lock()
+        self.messages = []
+        self.connections = 0
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def get_connection(self, **kwargs):
+        params = {
+            "host": self.server_address[0], "port": self.port,
+            "username": "", "password": "", "use_tls": False, "use_ssl": False,
+            "fail_silently": False,
+        }
+        params.update(kwargs)
+        return get_connection("django.core.mail.backends.smtp.EmailBackend", **params)
+
+    def start(self) -> "LocalSMTPServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
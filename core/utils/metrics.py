@@ -0,0 +1,317 @@
+# core/utils/metrics.py
+"""
+In-process counters and histograms, exported in the Prometheus text format.
+
+    ORDERS = counter("orders_paid_total", "Orders marked paid")
+    ORDERS.inc()
+
+    PDF_SECONDS = histogram("pdf_render_seconds", "PDF engine time", ["engine", "outcome"])
+    with PDF_SECONDS.time(engine="weasyprint"):     # outcome=ok|error filled in
+        ...
+
+    render_exposition()   text for /internal/metrics/
+
+Workers are separate processes, so with METRICS_DIR set each one writes its
+values to <METRICS_DIR>/metrics-<pid>.json every METRICS_FLUSH_INTERVAL
+seconds; the endpoint sums every file it finds there with its own live
+values. A worker that exits folds its values into metrics-archived.json and
+removes its own file (as prometheus_client's multiprocess mode does), so
+totals never go backwards and the directory doesn't grow with every restart.
+A file left by a killed worker is archived by the next process given its pid.
+Without METRICS_DIR only the serving process is reported.
+"""
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: no shared METRICS_DIR in practice
+    fcntl = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = {}
+_lock = threading.Lock()
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}  # label values tuple -> float, or [bucket counts..., sum, count]
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with _lock:
+            _exporter.touch()
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with _lock:
+            _exporter.touch()
+            row = self.values.get(key)
+            if row is None:
+                row = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            row[-2] += value
+            row[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the block's duration; sets an `outcome` label (ok/error) if it has one."""
+        track_outcome = "outcome" in self.labelnames and "outcome" not in labels
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            if track_outcome:
+                labels["outcome"] = "error"
+            raise
+        else:
+            if track_outcome:
+                labels["outcome"] = "ok"
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+def _get_or_register(cls, name, *args, **kwargs):
+    with _lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, *args, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"{name} is already registered as a {metric.kind}")
+        return metric
+
+
+def counter(name: str, documentation: str, labelnames=()) -> Counter:
+    return _get_or_register(Counter, name, documentation, labelnames)
+
+
+def histogram(name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return _get_or_register(Histogram, name, documentation, labelnames, buckets)
+
+
+# ---------- cross-process export ----------
+
+ARCHIVE = "metrics-archived.json"
+
+
+@contextmanager
+def _dir_lock(directory: Path, exclusive: bool):
+    """Archiving (exclusive) vs. reading the files (shared): no scrape sees a value twice."""
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / ".lock", "a") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def _write_json(path: Path, data) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+class _FileExporter:
+    """Writes this process's values to METRICS_DIR in the background."""
+
+    def __init__(self):
+        self.pid = None
+        self.thread = None
+        self.closed = False
+        self._io = threading.Lock()
+
+    def directory(self):
+        path = getattr(settings, "METRICS_DIR", "")
+        return Path(path) if path else None
+
+    def touch(self) -> None:
+        """Called under _lock on every update: (re)start the flusher in this process."""
+        if self.pid == os.getpid():
+            return
+        if self.pid is not None:
+            # forked after recording (e.g. a preloading server): the parent's
+            # values are in the parent's file already
+            for metric in _registry.values():
+                metric.values.clear()
+        self.pid = os.getpid()
+        if self.directory() is not None:
+            if self.path().exists():  # a killed worker had this pid
+                self._archive(self.path())
+            self.thread = threading.Thread(target=self._run, name="metrics-flush", daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 5.0)
+        while True:
+            time.sleep(interval)
+            self.flush()
+
+    def path(self):
+        return self.directory() / f"metrics-{os.getpid()}.json"
+
+    def flush(self) -> None:
+        if self.directory() is None or self.pid != os.getpid():
+            return
+        data = snapshot()
+        with self._io:
+            if self.closed:
+                return
+            self.directory().mkdir(parents=True, exist_ok=True)
+            _write_json(self.path(), data)
+
+    def _archive(self, path: Path, data=None) -> None:
+        """Add `data` (default: the contents of `path`) to the archive, then remove `path`."""
+        with _dir_lock(self.directory(), exclusive=True):
+            if data is None:
+                try:
+                    data = json.loads(path.read_text())
+                except (OSError, ValueError):
+                    data = {}
+            archive = self.directory() / ARCHIVE
+            try:
+                archived = json.loads(archive.read_text())
+            except (OSError, ValueError):
+                archived = {}
+            for name, family in data.items():
+                _merge_family(archived.setdefault(name, {**family, "values": []}), family)
+            _write_json(archive, archived)
+            path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        """At exit: fold this process's values into the archive."""
+        if self.directory() is None or self.pid != os.getpid():
+            return
+        data = snapshot()
+        with self._io:
+            if not self.closed:
+                self.closed = True
+                self._archive(self.path(), data)
+
+
+_exporter = _FileExporter()
+atexit.register(_exporter.close)
+
+
+def snapshot() -> dict:
+    """{name: {"kind", "help", "labelnames", "buckets", "values": [[labels, value], ...]}}"""
+    with _lock:
+        return {
+            m.name: {
+                "kind": m.kind,
+                "help": m.documentation,
+                "labelnames": list(m.labelnames),
+                "buckets": list(getattr(m, "buckets", ())),
+                "values": [[list(k), v if m.kind == "counter" else list(v)] for k, v in m.values.items()],
+            }
+            for m in _registry.values()
+        }
+
+
+def collect() -> dict:
+    """This process's values summed with the other workers' files."""
+    merged = snapshot()
+    directory = _exporter.directory()
+    if directory is None or not directory.is_dir():
+        return merged
+    own = f"metrics-{os.getpid()}.json"
+    with _dir_lock(directory, exclusive=False):
+        for path in directory.glob("metrics-*.json"):
+            if path.name == own:
+                continue
+            try:
+                other = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue  # being replaced right now
+            for name, family in other.items():
+                _merge_family(merged.setdefault(name, {**family, "values": []}), family)
+    return merged
+
+
+def _merge_family(into: dict, family: dict) -> None:
+    if into["kind"] != family["kind"] or into["buckets"] != family["buckets"]:
+        return  # definition changed between deploys; keep the live one
+    rows = {tuple(labels): value for labels, value in into["values"]}
+    for labels, value in family["values"]:
+        key = tuple(labels)
+        if key not in rows:
+            rows[key] = value
+        elif family["kind"] == "counter":
+            rows[key] += value
+        else:
+            rows[key] = [a + b for a, b in zip(rows[key], value)]
+    into["values"] = [[list(k), v] for k, v in rows.items()]
+
+
+# ---------- text format ----------
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(str(v))}"' for n, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_exposition(families=None) -> str:
+    families = collect() if families is None else families
+    lines = []
+    for name in sorted(families):
+        family = families[name]
+        names = family["labelnames"]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+        for values, value in sorted(family["values"]):
+            if family["kind"] == "counter":
+                lines.append(f"{name}{_labels(names, values)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(family["buckets"], value):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(names, values, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(names, values, [('le', '+Inf')])} {value[-1]}")
+            lines.append(f"{name}_sum{_labels(names, values)} {_number(value[-2])}")
+            lines.append(f"{name}_count{_labels(names, values)} {value[-1]}")
+    return "\n".join(lines) + "\n"
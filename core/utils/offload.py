@@ -0,0 +1,97 @@
+# core/utils/offload.py
+"""
+Bounded thread pools ("bulkheads") for blocking calls made from async views.
+
+    order = await bulkhead("razorpay").run(client.order.create, data)
+
+Each external dependency gets its own pool (settings.BULKHEADS), so a slow
+gateway can tie up at most its own `max_workers` threads and never the
+threads that serve catalog pages. At most `max_pending` calls may be running
+or queued; beyond that run() raises Saturated straight away instead of
+queueing without bound (views answer 503).
+
+Calls run with the caller's contextvars (request_id in logs) and with stale
+DB connections closed before and after, as they may use the ORM.
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.shortcuts import render
+
+from core.utils.metrics import counter
+
+DEFAULTS = {"max_workers": 8, "max_pending": 64}
+
+REJECTED = counter("bulkhead_rejected_total", "Calls refused because a bulkhead was full", ["bulkhead"])
+
+
+class Saturated(Exception):
+    """The dependency's pool and queue are full."""
+
+
+class Bulkhead:
+    def __init__(self, name: str, max_workers: int, max_pending: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"bulkhead-{name}")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.stats = dict.fromkeys(("completed", "failed", "rejected"), 0)
+
+    def _task(self, ctx, fn, args, kwargs):
+        close_old_connections()
+        try:
+            return ctx.run(fn, *args, **kwargs)
+        finally:
+            close_old_connections()
+
+    def _done(self, future):
+        with self._lock:
+            self.pending -= 1
+            self.stats["failed" if future.exception() else "completed"] += 1
+
+    def submit(self, fn, *args, **kwargs):
+        """concurrent.futures.Future for fn(*args, **kwargs); raises Saturated when full."""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.stats["rejected"] += 1
+                REJECTED.inc(bulkhead=self.name)
+                raise Saturated(f"{self.name}: {self.pending} calls in flight")
+            self.pending += 1
+        future = self._executor.submit(self._task, contextvars.copy_context(), fn, args, kwargs)
+        future.add_done_callback(self._done)
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def snapshot(self) -> dict:
+        return {"max_workers": self.max_workers, "max_pending": self.max_pending,
+                "pending": self.pending, **self.stats}
+
+
+_bulkheads = {}
+_bulkheads_lock = threading.Lock()
+
+
+def bulkhead(name: str) -> Bulkhead:
+    with _bulkheads_lock:
+        if name not in _bulkheads:
+            options = {**DEFAULTS, **getattr(settings, "BULKHEADS", {}).get(name, {})}
+            _bulkheads[name] = Bulkhead(name, **options)
+        return _bulkheads[name]
+
+
+def bulkhead_stats() -> dict:
+    return {name: b.snapshot() for name, b in _bulkheads.items()}
+
+
+async def arender(request, template_name, context=None, **kwargs):
+    """render() for async views: context processors and lazy querysets use the sync ORM."""
+    return await sync_to_async(render)(request, template_name, context, **kwargs)
@@ -1,10 +1,23 @@
 # core/utils/pdf.py
 import os
 import base64
+import logging
+import time
 from io import BytesIO
-from django.template.loader import render_to_string, get_template
+from django.template.loader import get_template
 from django.conf import settings
 
+from core.utils import tracing
+from core.utils.assets import get_asset
+from core.utils.metrics import histogram
+
+logger = logging.getLogger(__name__)
+
+PDF_SECONDS = histogram(
+    "pdf_render_seconds", "Time spent in each PDF engine (template rendering excluded)",
+    ["engine", "outcome"],
+)
+
 
 def render_pdf_from_template(template_name: str, context: dict) -> bytes:
     """
@@ -12,55 +25,82 @@ def render_pdf_from_template(template_name: str, context: dict) -> bytes:
     Order of engines: WeasyPrint -> xhtml2pdf -> ReportLab (fallback).
     Writes a debug copy when DEBUG=True.
     """
-    # Log the resolved template path (useful during setup)
-    try:
-        t = get_template(template_name)
-        origin = getattr(t, "origin", None)
-        print(f"[PDF] Using template '{template_name}' -> {getattr(origin, 'name', 'unknown')}")
-    except Exception:
-        pass
-
-    html = render_to_string(template_name, context)
+    template = get_template(template_name)
+    logger.debug(
+        "PDF template resolved",
+        extra={"template": template_name, "origin": getattr(getattr(template, "origin", None), "name", "unknown")},
+    )
 
-    # 1) WeasyPrint
-    try:
-        from weasyprint import HTML  # type: ignore
-        pdf_io = BytesIO()
-        HTML(string=html).write_pdf(pdf_io)
-        data = pdf_io.getvalue()
-        if data:
-            _debug_save_pdf(data, "weasyprint")
-            print("[PDF] Generated with WeasyPrint.")
-            return data
-    except Exception as e:
-        print(f"[WARN] WeasyPrint failed: {e}")
+    started = time.perf_counter()
+    html = template.render(context)
+    render_ms = (time.perf_counter() - started) * 1000
 
-    # 2) xhtml2pdf
-    try:
-        from xhtml2pdf import pisa  # type: ignore
-        pdf_io = BytesIO()
-        result = pisa.CreatePDF(html, dest=pdf_io, encoding="UTF-8")
-        if result.err:
-            raise RuntimeError("xhtml2pdf reported an error")
-        data = pdf_io.getvalue()
-        if not data:
-            raise RuntimeError("xhtml2pdf returned empty PDF")
-        _debug_save_pdf(data, "xhtml2pdf")
-        print("[PDF] Generated with xhtml2pdf.")
+    # 1) WeasyPrint, 2) xhtml2pdf
+    for engine, render in HTML_ENGINES:
+        t0 = time.perf_counter()
+        try:
+            with PDF_SECONDS.time(engine=engine), tracing.span("pdf.render", engine=engine):
+                data = render(html)
+        except Exception as e:
+            logger.warning("%s failed: %s", engine, e, extra={"engine": engine})
+            continue
+        _debug_save_pdf(data, engine)
+        _log_generated(engine, data, render_ms, t0)
         return data
-    except Exception as e:
-        print(f"[WARN] xhtml2pdf failed: {e}")
 
     # 3) ReportLab fallback (no HTML)
+    t0 = time.perf_counter()
     try:
-        data = _render_reportlab_invoice(context)
+        with PDF_SECONDS.time(engine="reportlab"), tracing.span("pdf.render", engine="reportlab"):
+            data = _render_reportlab_invoice(context)
         _debug_save_pdf(data, "reportlab")
-        print("[PDF] Generated with ReportLab fallback.")
+        _log_generated("reportlab", data, render_ms, t0)
         return data
     except Exception as e:
         raise RuntimeError(f"ReportLab fallback failed: {e}") from e
 
 
+def _render_weasyprint(html: str) -> bytes:
+    from weasyprint import HTML  # type: ignore
+    pdf_io = BytesIO()
+    HTML(string=html).write_pdf(pdf_io)
+    data = pdf_io.getvalue()
+    if not data:
+        raise RuntimeError("WeasyPrint returned empty PDF")
+    return data
+
+
+def _render_xhtml2pdf(html: str) -> bytes:
+    from xhtml2pdf import pisa  # type: ignore
+    pdf_io = BytesIO()
+    result = pisa.CreatePDF(html, dest=pdf_io, encoding="UTF-8")
+    if result.err:
+        raise RuntimeError("xhtml2pdf reported an error")
+    data = pdf_io.getvalue()
+    if not data:
+        raise RuntimeError("xhtml2pdf returned empty PDF")
+    return data
+
+
+# HTML -> PDF engines, in order of preference
+HTML_ENGINES = (
+    ("weasyprint", _render_weasyprint),
+    ("xhtml2pdf", _render_xhtml2pdf),
+)
+
+
+def _log_generated(engine: str, data: bytes, render_ms: float, started: float):
+    logger.info(
+        "PDF generated with %s", engine,
+        extra={
+            "engine": engine,
+            "bytes": len(data),
+            "template_ms": round(render_ms, 1),
+            "engine_ms": round((time.perf_counter() - started) * 1000, 1),
+        },
+    )
+
+
 def _debug_save_pdf(data: bytes, engine: str):
     """Save the produced PDF to project root in DEBUG mode."""
     if not getattr(settings, "DEBUG", False):
@@ -70,9 +110,9 @@ def _debug_save_pdf(data: bytes, engine: str):
         path = os.path.join(base_dir, f"__last_invoice_{engine}.pdf")
         with open(path, "wb") as f:
             f.write(data)
-        print(f"[DEBUG] Wrote PDF to {path} ({len(data)} bytes)")
+        logger.debug("Wrote PDF to %s (%d bytes)", path, len(data))
     except Exception as e:
-        print(f"[WARN] Could not write debug PDF: {e}")
+        logger.warning("Could not write debug PDF: %s", e)
 
 
 # ----------------------- ReportLab fallback -----------------------
@@ -86,7 +126,8 @@ def _render_reportlab_invoice(ctx: dict) -> bytes:
       - subtotal_str / tax_str / shipping_str / total_str (strings)  OR
         subtotal / tax / shipping / total (Decimals)
       - tax_rate_pct (string, optional)
-      - company_logo_b64 (base64 PNG, optional)
+      - company_logo_static_path (static path served from core.utils.assets, optional)
+        or company_logo_b64 (base64 PNG, optional)
       - company_name / company_email (strings)
     """
     from reportlab.lib.pagesizes import A4
@@ -110,6 +151,7 @@ def _render_reportlab_invoice(ctx: dict) -> bytes:
     company_name = ctx.get("company_name", "Company")
     company_email = ctx.get("company_email", "")
     company_logo_b64 = ctx.get("company_logo_b64")
+    company_logo_static_path = ctx.get("company_logo_static_path")
     tax_rate_pct = str(ctx.get("tax_rate_pct", ""))  # purely display
 
     # Totals (accept *_str or Decimal)
@@ -129,11 +171,20 @@ def _render_reportlab_invoice(ctx: dict) -> bytes:
     y = height - 25 * mm
 
     # ---- Header: logo + title ----
-    if company_logo_b64:
+    logo_img = None
+    if company_logo_static_path:
+        # Pre-decoded image from the process-level asset cache
+        asset = get_asset(company_logo_static_path)
+        logo_img = asset.image_reader if asset else None
+    if logo_img is None and company_logo_b64:
+        try:
+            logo_img = ImageReader(BytesIO(base64.b64decode(company_logo_b64)))
+        except Exception:
+            logo_img = None
+    if logo_img is not None:
         try:
-            img = ImageReader(BytesIO(base64.b64decode(company_logo_b64)))
             c.drawImage(
-                img, x_margin, y - 12 * mm,
+                logo_img, x_margin, y - 12 * mm,
                 width=32 * mm, height=12 * mm,
                 preserveAspectRatio=True, mask='auto'
             )
@@ -0,0 +1,138 @@
+# core/utils/profiling.py
+"""
+Sampled request profiling (core.middleware.ProfilingMiddleware).
+
+    sampler = StackSampler(interval=0.005, threads={threading.get_ident()})
+    with sampler:
+        ...
+    sampler.collapsed()     {"mod.view;mod.helper;...": samples}
+
+A background thread reads the stacks of the request's thread every
+`interval` seconds (sys._current_frames), so the profiled code runs at full
+speed and only that one request pays the sampling cost. Stacks are kept in
+"collapsed" form (root first, ';'-separated), which flamegraph.pl reads
+directly and to_speedscope() turns into a speedscope.app file.
+
+A request is profiled when it carries a valid X-Profile-Token header
+(make_token(), or `manage.py profile_token`) or, at random, in
+PROFILE_SAMPLE_RATE of requests.
+"""
+import random
+import sys
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core import signing
+
+TOKEN_HEADER = "X-Profile-Token"
+_TOKEN_SALT = "core.profiling"
+
+
+class StackSampler:
+    def __init__(self, interval: float = 0.005, threads=None):
+        self.interval = interval
+        self.threads = threads  # thread idents to sample; None = every other thread
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (self.threads is not None and ident not in self.threads):
+                    continue
+                self.samples[_collapse(frame)] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def collapsed(self) -> dict:
+        return dict(self.samples)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}.{code.co_qualname}".replace(";", ":")
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+# ---------- output formats ----------
+
+def to_collapsed_text(stacks: dict) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+def to_speedscope(stacks: dict, name: str, interval_ms: float) -> dict:
+    frames, index, samples, weights = [], {}, [], []
+    for stack, count in stacks.items():
+        row = []
+        for frame in stack.split(";"):
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({"name": frame})
+            row.append(index[frame])
+        samples.append(row)
+        weights.append(count * interval_ms)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "shopsite",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        }],
+    }
+
+
+# ---------- triggers ----------
+
+def make_token() -> str:
+    """Signed value for the X-Profile-Token header, valid PROFILE_TOKEN_MAX_AGE seconds."""
+    return signing.TimestampSigner(salt=_TOKEN_SALT).sign("profile")
+
+
+def _valid_token(value: str) -> bool:
+    try:
+        signing.TimestampSigner(salt=_TOKEN_SALT).unsign(
+            value, max_age=getattr(settings, "PROFILE_TOKEN_MAX_AGE", 3600))
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def trigger_for(request):
+    """"header", "sample" or None."""
+    token = request.headers.get(TOKEN_HEADER)
+    if token and _valid_token(token):
+        return "header"
+    rate = getattr(settings, "PROFILE_SAMPLE_RATE", 0.0)
+    if rate and random.random() < rate:
+        return "sample"
+    return None
@@ -0,0 +1,82 @@
+# core/utils/queries.py
+"""
+Query instrumentation built on connection.execute_wrapper().
+
+    with record_queries() as rec:
+        ...
+    rec.count, rec.total_ms, rec.repeated()
+
+QueryBudgetMixin gives TestCases assertMaxQueries() / assertViewQueryBudget(),
+e.g. "checkout must stay within 7 queries".
+"""
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+# `IN (%s, %s, %s)` -> `IN (...)` so batches of different size share one shape
+_IN_LIST_RE = re.compile(r"\bIN \((?:%s, )*%s\)")
+_WS_RE = re.compile(r"\s+")
+
+
+def sql_shape(sql: str) -> str:
+    """Normalise SQL so queries that differ only by parameters compare equal."""
+    return _IN_LIST_RE.sub("IN (...)", _WS_RE.sub(" ", sql).strip())
+
+
+class QueryRecorder:
+    """execute_wrapper that counts queries, sums their time and groups them by shape."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.shapes = Counter()
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.count += 1
+            self.total_ms += elapsed
+            self.shapes[sql_shape(sql)] += 1
+            self.queries.append((sql, elapsed))
+
+    def repeated(self, threshold: int = 2):
+        """[(shape, times)] for shapes run at least `threshold` times — likely N+1."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+@contextmanager
+def record_queries(aliases=None):
+    """Record queries on the given DB aliases (default: all configured databases)."""
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for alias in aliases or settings.DATABASES:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        yield recorder
+
+
+class QueryBudgetMixin:
+    """TestCase mixin asserting upper bounds on query counts."""
+
+    @contextmanager
+    def assertMaxQueries(self, max_queries: int, label: str = "block"):
+        with record_queries() as rec:
+            yield rec
+        if rec.count > max_queries:
+            lines = "\n".join(f"  {n}x {shape}" for shape, n in rec.shapes.most_common())
+            self.fail(f"{label} ran {rec.count} queries (budget {max_queries}):\n{lines}")
+
+    def assertViewQueryBudget(self, url: str, max_queries: int, method: str = "get", data=None,
+                              status_code=None, **extra):
+        with self.assertMaxQueries(max_queries, label=f"{method.upper()} {url}"):
+            response = getattr(self.client, method)(url, data=data, **extra)
+        if status_code is not None:
+            self.assertEqual(response.status_code, status_code)
+        return response
@@ -0,0 +1,110 @@
+# core/utils/queryplan.py
+"""
+Query-plan checks for the lookups that must stay indexed.
+
+    CRITICAL_QUERIES          name -> factory returning a sample queryset
+    full_scans(qs)            tables the plan reads end to end
+    QueryPlanMixin            assertIndexedPlan(qs) for TestCase
+
+SQLite plans come from EXPLAIN QUERY PLAN ("SCAN <table>" without an index).
+On PostgreSQL the plan is taken with enable_seqscan off, so a "Seq Scan" that
+remains means no usable index exists (small test tables would otherwise be
+seq-scanned on cost alone).
+"""
+import re
+
+from django.db import connections, transaction
+
+_SQLITE_SCAN_RE = re.compile(r"\bSCAN (?:TABLE )?(\w+)(?! USING (?:COVERING )?INDEX)(?:\s|$)")
+_PG_SCAN_RE = re.compile(r"Seq Scan on (\w+)")
+
+
+def plan(qs) -> str:
+    using = qs.db
+    if connections[using].vendor == "postgresql":
+        with transaction.atomic(using=using):
+            with connections[using].cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            return qs.explain()
+    return qs.explain()
+
+
+def full_scans(qs) -> list:
+    text = plan(qs)
+    pattern = _PG_SCAN_RE if connections[qs.db].vendor == "postgresql" else _SQLITE_SCAN_RE
+    return pattern.findall(text)
+
+
+# ---------- registry ----------
+
+def _payment_verify():
+    from orders.models import Order
+    return Order.objects.filter(razorpay_order_id="order_XXXXXXXXXXXXXX")
+
+
+def _payment_pay():
+    from orders.models import Order
+    return Order.objects.filter(id=1, status="created")
+
+
+def _my_orders():
+    from orders.models import Order
+    return Order.objects.filter(user_id=1).order_by("-created_at")
+
+
+def _default_address():
+    from accounts.models import Address
+    return Address.objects.filter(user_id=1, is_default=True)
+
+
+def _home_featured():
+    from catalog.models import Product
+    return Product.objects.filter(is_active=True, is_featured=True).order_by("-created_at")[:8]
+
+
+def _product_list():
+    from catalog.models import Product
+    return Product.objects.filter(is_active=True).order_by("-created_at")
+
+
+def _product_detail():
+    from catalog.models import Product
+    return Product.objects.filter(slug="some-drone", is_active=True)
+
+
+def _feed_sku_lookup():
+    from catalog.models import Product
+    return Product.objects.filter(sku__in=["DRO-000001", "DRO-000002"])
+
+
+def _anon_cart_rows():
+    from cart.models import CartItem
+    return CartItem.objects.filter(session_key="x" * 32)
+
+
+def _user_cart_rows():
+    from cart.models import CartItem
+    return CartItem.objects.filter(user_id=1)
+
+
+CRITICAL_QUERIES = {
+    "payments.verify": _payment_verify,
+    "payments.pay": _payment_pay,
+    "orders.my_orders": _my_orders,
+    "accounts.default_address": _default_address,
+    "core.home.featured": _home_featured,
+    "catalog.product_list": _product_list,
+    "catalog.product_detail": _product_detail,
+    "catalog.feed_sku_lookup": _feed_sku_lookup,
+    "cart.anon_rows": _anon_cart_rows,
+    "cart.user_rows": _user_cart_rows,
+}
+
+
+class QueryPlanMixin:
+    """TestCase mixin: fail when a queryset's plan scans a whole table."""
+
+    def assertIndexedPlan(self, qs, label: str = "query"):
+        scans = full_scans(qs)
+        if scans:
+            self.fail(f"{label} scans {', '.join(scans)}:\n{plan(qs)}")
@@ -0,0 +1,256 @@
+# core/utils/swr.py
+"""
+Cache-aside with single-flight and stale-while-revalidate.
+
+    value = get_or_compute("home:stats", compute, ttl=60, stale_ttl=600)
+
+Entries are stored as (value, fresh_until, stamp) with a hard timeout of
+ttl + stale_ttl:
+
+- fresh (and stamp unchanged)  -> returned as is
+- stale (past ttl, or stamp changed, e.g. a content version) -> returned
+  immediately; one caller across all workers (cache.add lock) refreshes it,
+  in a background thread or inline (background=False)
+- missing -> one caller computes; others in this process wait on it, others
+  in other workers poll the cache briefly, and anyone who waited too long
+  computes for itself rather than hang
+
+@cached_page(...) applies this to whole anonymous pages (core.views.home,
+catalog product_list).
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_vary_headers
+
+from core.utils import versions
+
+logger = logging.getLogger(__name__)
+
+LOCK_TIMEOUT = 30
+POLL_INTERVAL = 0.05
+
+_flights = {}
+_flights_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+stats = dict.fromkeys(("fresh", "stale", "misses", "waits", "refreshes", "refresh_errors"), 0)
+
+
+# ---------- helpers ----------
+
+def _cache(alias=None):
+    return caches[alias or getattr(settings, "SWR_CACHE_ALIAS", "default")]
+
+
+def _background():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "SWR_REFRESH_WORKERS", 2), thread_name_prefix="swr-refresh",
+            )
+    return _executor
+
+
+def _acquire(cache, key) -> bool:
+    return cache.add(f"{key}:lock", 1, timeout=LOCK_TIMEOUT)
+
+
+def _release(cache, key) -> None:
+    cache.delete(f"{key}:lock")
+
+
+def _recompute(cache, key, compute, ttl, stale_ttl, stamp):
+    value = compute()
+    cache.set(key, (value, time.time() + ttl, stamp), timeout=ttl + stale_ttl)
+    return value
+
+
+def _refresh_job(alias, key, compute, ttl, stale_ttl, stamp):
+    from django.db import connections
+
+    cache = _cache(alias)
+    try:
+        _recompute(cache, key, compute, ttl, stale_ttl, stamp)
+        stats["refreshes"] += 1
+    except Exception:
+        stats["refresh_errors"] += 1
+        logger.exception("Background refresh failed for %s", key)
+    finally:
+        _release(cache, key)
+        connections.close_all()  # this thread's connections only
+
+
+def _fill(cache, key, compute, ttl, stale_ttl, stamp, wait):
+    with _flights_lock:
+        event = _flights.get(key)
+        leader = event is None
+        if leader:
+            event = _flights[key] = threading.Event()
+
+    if not leader:
+        stats["waits"] += 1
+        event.wait(wait)
+        envelope = cache.get(key)
+        return envelope[0] if envelope is not None else compute()
+
+    try:
+        if _acquire(cache, key):
+            try:
+                return _recompute(cache, key, compute, ttl, stale_ttl, stamp)
+            finally:
+                _release(cache, key)
+        # another worker is computing it
+        stats["waits"] += 1
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            envelope = cache.get(key)
+            if envelope is not None:
+                return envelope[0]
+        return _recompute(cache, key, compute, ttl, stale_ttl, stamp)
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        event.set()
+
+
+# ---------- public API ----------
+
+def get_or_compute(key, compute, ttl=60, stale_ttl=300, stamp=None, background=True, wait=5.0, cache_alias=None):
+    """Cached compute() with single-flight misses and stale-while-revalidate (see module doc)."""
+    cache = _cache(cache_alias)
+    envelope = cache.get(key)
+    if envelope is None:
+        stats["misses"] += 1
+        return _fill(cache, key, compute, ttl, stale_ttl, stamp, wait)
+
+    value, fresh_until, old_stamp = envelope
+    if time.time() < fresh_until and old_stamp == stamp:
+        stats["fresh"] += 1
+        return value
+
+    stats["stale"] += 1
+    if _acquire(cache, key):
+        if background:
+            _background().submit(_refresh_job, cache_alias, key, compute, ttl, stale_ttl, stamp)
+        else:
+            try:
+                return _recompute(cache, key, compute, ttl, stale_ttl, stamp)
+            finally:
+                _release(cache, key)
+    return value
+
+
+# ---------- page decorator ----------
+
+CSRF_PLACEHOLDER = "__swr_csrf_token__"
+_CSRF_INPUT_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+_KEPT_HEADERS = ("Content-Type", "Content-Language", "Vary")
+
+
+class _Uncacheable(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def shared_visitor(request) -> bool:
+    """No session/messages cookie: the page is the same for every such visitor but for the CSRF token."""
+    return not (set(request.COOKIES) - {settings.CSRF_COOKIE_NAME})
+
+
+def _freeze(response):
+    content = response.content.decode(response.charset)
+    for token in set(_CSRF_INPUT_RE.findall(content)):
+        content = content.replace(token, CSRF_PLACEHOLDER)
+    headers = {name: response[name] for name in _KEPT_HEADERS if response.has_header(name)}
+    return content, headers
+
+
+def _thaw(request, frozen):
+    content, headers = frozen
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request))  # sets the CSRF cookie if needed
+    response = HttpResponse(content, headers=headers)
+    patch_vary_headers(response, ("Cookie",))
+    return response
+
+
+def _page_key(request, query) -> str:
+    """Path plus the `query` parameters the view reads; ?utm_source= etc. share the entry."""
+    url = request.build_absolute_uri(request.path)
+    params = [(name, value) for name in sorted(query) for value in request.GET.getlist(name)]
+    if params:
+        url += "?" + urlencode(params)
+    return "page:" + hashlib.md5(url.encode(), usedforsecurity=False).hexdigest()
+
+
+def cached_page(ttl=None, stale_ttl=None, depends=(), query=()):
+    """
+    Serve a GET view from get_or_compute() for cookie-less visitors.
+
+    Pages are keyed on the path and only the GET parameters named in `query`,
+    so tracking parameters neither miss the cache nor add entries to it. A view
+    that reads request.GET must list what it reads.
+
+    The stamp is the current version of each `depends` namespace, so an admin
+    edit marks the page stale (served once more while one request re-renders
+    it) instead of making every concurrent visitor render it.
+
+    Async views are supported: the cache work (locks, polling) runs in a worker
+    thread and the view itself back on the event loop.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            sync_inner = decorator(async_to_sync(view))
+
+            @wraps(view)
+            async def ainner(request, *args, **kwargs):
+                if request.method not in ("GET", "HEAD") or not shared_visitor(request):
+                    return await view(request, *args, **kwargs)
+                return await sync_to_async(sync_inner)(request, *args, **kwargs)
+            return ainner
+
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD") or not shared_visitor(request):
+                return view(request, *args, **kwargs)
+
+            page_ttl = ttl if ttl is not None else getattr(settings, "PAGE_CACHE_TTL", 30)
+            page_stale = stale_ttl if stale_ttl is not None else getattr(settings, "PAGE_CACHE_STALE_TTL", 300)
+            stamp = ",".join(f"{ns}:{v}" for ns, v in sorted(versions.get_versions(*depends).items()))
+            key = _page_key(request, query)
+            rendered = []
+
+            def compute():
+                response = view(request, *args, **kwargs)
+                if hasattr(response, "render") and not getattr(response, "is_rendered", True):
+                    response.render()
+                if response.status_code != 200 or response.streaming:
+                    raise _Uncacheable(response)
+                rendered.append(response)
+                return _freeze(response)
+
+            try:
+                frozen = get_or_compute(key, compute, ttl=page_ttl, stale_ttl=page_stale, stamp=stamp,
+                                        background=False)
+            except _Uncacheable as e:
+                return e.response
+            if rendered:
+                return rendered[0]  # this request did the rendering: send it untouched
+            return _thaw(request, frozen)
+        return inner
+    return decorator
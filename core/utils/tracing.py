@@ -0,0 +1,336 @@
+# core/utils/tracing.py
+"""
+Lightweight distributed tracing with W3C trace context.
+
+    with span("pdf.render", engine="weasyprint") as s:
+        ...
+        if s: s.set("bytes", len(data))
+
+core.middleware.TracingMiddleware opens one server span per request,
+continuing an incoming `traceparent` header or the purchase in progress:
+checkout stores its traceparent in the session (start_journey), so pay,
+verify and the outbox email that follows all land in that trace. Inside it, span() nests:
+contextvars carry the current span into sync_to_async threads and bulkheads,
+and background jobs pass a stored traceparent explicitly.
+
+Spans are also recorded for every DB query (a connection execute wrapper)
+and every template render (TracedDjangoTemplates backend). Outside a sampled
+trace span() yields None and costs one contextvar lookup.
+
+Finished spans are queued and written by a background thread to:
+    TRACE_EXPORTER = "file"   JSON lines in TRACE_FILE
+    TRACE_EXPORTER = "otlp"   OTLP/HTTP JSON POSTs to TRACE_OTLP_ENDPOINT
+                              (`manage.py trace_collector` is a local stand-in)
+"""
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.template.exceptions import TemplateDoesNotExist
+
+from core.utils.queries import sql_shape
+
+logger = logging.getLogger(__name__)
+
+JOURNEY_SESSION_KEY = "trace_journey"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_KINDS = {"internal": 1, "server": 2, "client": 3, "producer": 4, "consumer": 5}
+
+_current = contextvars.ContextVar("trace_span", default=None)
+
+
+def enabled() -> bool:
+    return bool(getattr(settings, "TRACE_EXPORTER", ""))
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "attributes", "start_ns", "end_ns",
+                 "error")
+
+    def __init__(self, name, trace_id, parent_id, kind, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def as_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+def parse_traceparent(value):
+    """(trace_id, parent span_id, sampled) or None."""
+    match = _TRACEPARENT_RE.match((value or "").strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), int(match.group(3), 16) & 1 == 1
+
+
+def current_span():
+    return _current.get()
+
+
+def tag(**attributes) -> None:
+    """Set attributes on the current span, if there is one."""
+    active = _current.get()
+    if active is not None:
+        active.attributes.update(attributes)
+
+
+def current_traceparent() -> str:
+    active = _current.get()
+    return active.traceparent if active else ""
+
+
+@contextmanager
+def span(name: str, *, kind: str = "internal", traceparent: str = "", root: bool = False, **attributes):
+    """
+    Child of the current span; or continue `traceparent` (e.g. stored with a
+    background job); or, with root=True, start a new (sampled) trace.
+    """
+    if not enabled():
+        yield None
+        return
+    parent = parse_traceparent(traceparent) if traceparent else None
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    elif _current.get() is not None:
+        trace_id, parent_id, sampled = _current.get().trace_id, _current.get().span_id, True
+    elif root:
+        trace_id, parent_id = os.urandom(16).hex(), None
+        sampled = random.random() < getattr(settings, "TRACE_SAMPLE_RATE", 1.0)
+    else:
+        sampled = False
+    if not sampled:
+        yield None
+        return
+
+    active = Span(name, trace_id, parent_id, kind, attributes)
+    token = _current.set(active)
+    try:
+        yield active
+    except BaseException as exc:
+        active.error = f"{type(exc).__name__}: {exc}"[:500]
+        raise
+    finally:
+        _current.reset(token)
+        active.end_ns = time.time_ns()
+        _exporter.submit(active)
+
+
+# ---------- journeys (checkout -> pay -> verify) ----------
+
+def start_journey(request) -> None:
+    """Make the rest of this visitor's purchase continue the current trace."""
+    if _current.get() is not None:
+        request.session[JOURNEY_SESSION_KEY] = [current_traceparent(), time.time()]
+
+
+def end_journey(request) -> None:
+    request.session.pop(JOURNEY_SESSION_KEY, None)
+
+
+def journey_parent(stored) -> str:
+    """The stored journey traceparent, unless it is older than TRACE_JOURNEY_TTL."""
+    if not stored:
+        return ""
+    parent, started = stored
+    if time.time() - started > getattr(settings, "TRACE_JOURNEY_TTL", 1800):
+        return ""
+    return parent
+
+
+# ---------- DB and template spans ----------
+
+def db_span(execute, sql, params, many, context):
+    """connection.execute_wrapper: one span per query inside a trace."""
+    if _current.get() is None:
+        return execute(sql, params, many, context)
+    with span("db.query", kind="client", **{
+        "db.system": context["connection"].vendor,
+        "db.statement": sql_shape(sql)[:1000],
+    }):
+        return execute(sql, params, many, context)
+
+
+def install_db_tracing(sender, connection, **kwargs):
+    """connection_created receiver (connected in CoreConfig.ready when tracing is on)."""
+    if db_span not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_span)
+
+
+class TracedTemplate(Template):
+    def render(self, context=None, request=None):
+        with span("template.render", template=getattr(self.origin, "template_name", None) or "<string>"):
+            return super().render(context, request)
+
+
+class TracedDjangoTemplates(DjangoTemplates):
+    """The Django template backend with a span around each top-level render."""
+
+    def from_string(self, template_code):
+        return TracedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TracedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+# ---------- export ----------
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans) -> dict:
+    """OTLP/HTTP JSON body (ExportTraceServiceRequest) for finished span dicts."""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [
+            {"key": "service.name", "value": {"stringValue": getattr(settings, "TRACE_SERVICE_NAME", "shopsite")}},
+        ]},
+        "scopeSpans": [{
+            "scope": {"name": "core.utils.tracing"},
+            "spans": [{
+                "traceId": s["trace_id"],
+                "spanId": s["span_id"],
+                "parentSpanId": s["parent_span_id"] or "",
+                "name": s["name"],
+                "kind": _KINDS.get(s["kind"], 1),
+                "startTimeUnixNano": str(s["start_ns"]),
+                "endTimeUnixNano": str(s["end_ns"]),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s["attributes"].items()],
+                "status": {"code": 2, "message": s["error"]} if s["error"] else {"code": 1},
+            } for s in spans],
+        }],
+    }]}
+
+
+def from_otlp(body: dict) -> list:
+    """Span dicts back from an OTLP/HTTP JSON body (for the local collector)."""
+    kinds = {v: k for k, v in _KINDS.items()}
+    out = []
+    for resource in body.get("resourceSpans", []):
+        for scope in resource.get("scopeSpans", []):
+            for s in scope.get("spans", []):
+                start, end = int(s["startTimeUnixNano"]), int(s["endTimeUnixNano"])
+                status = s.get("status", {})
+                out.append({
+                    "trace_id": s["traceId"],
+                    "span_id": s["spanId"],
+                    "parent_span_id": s.get("parentSpanId") or None,
+                    "name": s["name"],
+                    "kind": kinds.get(s.get("kind"), "internal"),
+                    "start_ns": start,
+                    "end_ns": end,
+                    "duration_ms": round((end - start) / 1e6, 3),
+                    "attributes": {a["key"]: next(iter(a["value"].values())) for a in s.get("attributes", [])},
+                    "error": status.get("message") if status.get("code") == 2 else None,
+                })
+    return out
+
+
+class _Exporter:
+    """Bounded queue drained by a daemon thread; spans are dropped rather than block a request."""
+
+    def __init__(self):
+        self.queue = None
+        self.pid = None
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def submit(self, finished: Span) -> None:
+        if self.pid != os.getpid():
+            with self._lock:
+                if self.pid != os.getpid():
+                    self.queue = queue.Queue(maxsize=getattr(settings, "TRACE_QUEUE_SIZE", 10000))
+                    threading.Thread(target=self._run, name="trace-export", daemon=True).start()
+                    self.pid = os.getpid()
+        try:
+            self.queue.put_nowait(finished.as_dict())
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + 1.0
+            while len(batch) < 512:
+                try:
+                    batch.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            self._write(batch)
+            for _ in batch:
+                self.queue.task_done()
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait (up to `timeout`) until queued spans are written."""
+        if self.queue is None or self.pid != os.getpid():
+            return
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _write(self, batch) -> None:
+        exporter = getattr(settings, "TRACE_EXPORTER", "")
+        try:
+            if exporter == "otlp":
+                request = urllib.request.Request(
+                    settings.TRACE_OTLP_ENDPOINT, data=json.dumps(to_otlp(batch)).encode(),
+                    headers={"Content-Type": "application/json"}, method="POST",
+                )
+                urllib.request.urlopen(request, timeout=5).close()
+            elif exporter == "file":
+                with open(settings.TRACE_FILE, "a", encoding="utf-8") as fh:
+                    fh.writelines(json.dumps(s) + "\n" for s in batch)
+        except Exception as exc:
+            logger.warning("Dropped %d spans: %s", len(batch), exc)
+
+
+_exporter = _Exporter()
+atexit.register(_exporter.flush)
+
+
+def flush(timeout: float = 5.0) -> None:
+    _exporter.flush(timeout)
@@ -0,0 +1,89 @@
+# core/utils/versions.py
+"""
+Content version counters for cache keys.
+
+Each namespace ("catalog", "promo", "team", "blog") has a counter in the
+cache. Cached output embeds the counters it depends on in its key, so bumping
+a namespace makes every dependent entry unreachable at once; the stale
+entries simply age out. Counters are seeded from the clock, so a counter lost
+to eviction never comes back with a value an old entry was keyed on.
+
+post_save/post_delete of the models in VERSIONED_MODELS bump their namespace
+(wired up in CoreConfig.ready()), except saves that only write fields listed
+in UNVERSIONED_FIELDS.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+
+VERSIONED_MODELS = {
+    "catalog.Product": "catalog",
+    "catalog.ProductImage": "catalog",
+    "catalog.Category": "catalog",
+    "catalog.ProductAttachment": "catalog",
+    "core.PromoVideo": "promo",
+    "team.TeamMember": "team",
+    "blog.Post": "blog",
+    "customers.Customer": "customers",
+}
+
+# Stock moves with every purchase, and pages only show it as in/out of stock:
+# stock-only saves leave "catalog" (and every product card) alone and bump
+# "stock" when availability flips (catalog.signals).
+UNVERSIONED_FIELDS = {
+    "catalog.Product": {"stock", "updated_at"},
+}
+
+KEY_PREFIX = "version:"
+
+
+def _cache():
+    return caches[getattr(settings, "FRAGMENT_CACHE_ALIAS", "default")]
+
+
+def _seed() -> int:
+    return time.time_ns() // 1000
+
+
+def get_versions(*namespaces) -> dict:
+    """{namespace: counter}, one cache round trip (plus one per missing counter)."""
+    cache = _cache()
+    keys = {KEY_PREFIX + ns: ns for ns in namespaces}
+    found = cache.get_many(keys)
+    out = {}
+    for key, ns in keys.items():
+        if key not in found:
+            cache.add(key, _seed(), timeout=None)
+            found[key] = cache.get(key)
+        out[ns] = found[key]
+    return out
+
+
+def get_version(namespace: str) -> int:
+    return get_versions(namespace)[namespace]
+
+
+def bump(*namespaces) -> None:
+    cache = _cache()
+    for ns in namespaces:
+        try:
+            cache.incr(KEY_PREFIX + ns)
+        except ValueError:  # missing/evicted: any fresh seed is newer than the old value
+            cache.set(KEY_PREFIX + ns, _seed(), timeout=None)
+
+
+def _receiver(namespace, unversioned=frozenset()):
+    def receiver(sender, update_fields=None, **kwargs):
+        if update_fields and unversioned.issuperset(update_fields):
+            return
+        bump(namespace)
+    return receiver
+
+
+def connect_signals() -> None:
+    for label, namespace in VERSIONED_MODELS.items():
+        handler = _receiver(namespace, frozenset(UNVERSIONED_FIELDS.get(label, ())))
+        for name, signal in (("save", post_save), ("delete", post_delete)):
+            signal.connect(handler, sender=label, weak=False, dispatch_uid=f"versions:{name}:{label}")
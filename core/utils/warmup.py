@@ -0,0 +1,103 @@
+# core/utils/warmup.py
+"""
+Boot-time warmup: do the work a worker would otherwise do on its first
+requests, before it accepts traffic.
+
+    warmup()    {"imports": ms, "urls": ms, "templates": ms, ...}
+
+Called from shopsite/wsgi.py and asgi.py when WARMUP_ON_BOOT is set. Each step
+is best-effort: a failure is logged and the worker still boots. DB
+connections opened here are closed again, so warming up in a preloading
+master (gunicorn --preload) never hands a shared connection to its forks.
+"""
+import importlib
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+# Heavy libraries imported lazily by the code paths that need them
+DEFAULT_IMPORTS = ("razorpay", "reportlab.pdfgen.canvas", "reportlab.lib.pagesizes")
+
+DEFAULT_TEMPLATES = (
+    "base.html",
+    "index.html",
+    "catalog/product_list.html",
+    "catalog/product_detail.html",
+    "cart/view.html",
+    "orders/checkout.html",
+    "payments/pay.html",
+)
+
+
+def _imports():
+    for name in getattr(settings, "WARMUP_IMPORTS", DEFAULT_IMPORTS):
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.debug("Warmup: %s not importable: %s", name, e)
+
+
+def _urls():
+    resolver = get_resolver()
+    resolver.reverse_dict  # populates every included URLconf (imports all views)
+    for namespace in resolver.namespace_dict:
+        resolver.namespace_dict[namespace][1].reverse_dict
+
+
+def _templates():
+    # With the cached loader (DEBUG off) the compiled templates stay in memory.
+    for name in getattr(settings, "WARMUP_TEMPLATES", DEFAULT_TEMPLATES):
+        get_template(name)
+
+
+def _static():
+    from django.core.files.storage import storages
+
+    storages["staticfiles"]  # manifest storages read staticfiles.json when created
+
+
+def _caches():
+    from core.utils import versions
+
+    # Content versions every cached page / fragment key embeds; reading them
+    # fills this worker's in-process cache tier.
+    versions.get_versions(*sorted(set(versions.VERSIONED_MODELS.values()) | {"stock"}))
+
+
+def _database():
+    for alias in settings.DATABASES:
+        connections[alias].ensure_connection()
+
+
+STEPS = (
+    ("imports", _imports),
+    ("urls", _urls),
+    ("templates", _templates),
+    ("static", _static),
+    ("database", _database),
+    ("caches", _caches),
+)
+
+
+def warmup() -> dict:
+    timings = {}
+    started = time.perf_counter()
+    try:
+        for name, step in STEPS:
+            t0 = time.perf_counter()
+            try:
+                step()
+            except Exception:
+                logger.exception("Warmup step %s failed", name)
+            timings[name] = round((time.perf_counter() - t0) * 1000, 1)
+    finally:
+        connections.close_all()
+    timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info("Worker warmed up in %.0f ms", timings["total"], extra={"warmup_ms": timings})
+    return timings
@@ -1,14 +1,21 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
 from catalog.models import Product
 from core.models import PromoVideo
+from core.utils import metrics as metrics_registry, swr
+from core.utils.swr import cached_page
 from team.models import TeamMember  # ⬅️ pull team from admin
 
+@cached_page(depends=("catalog", "stock", "promo", "team"))
 def home(request):
     featured = (
         Product.objects
         .filter(is_active=True, is_featured=True)
         .select_related("category")
-        .prefetch_related("images")
         .order_by("-created_at")[:8]
     )
     videos = (
@@ -31,3 +38,26 @@ def soft(request):
 
 def hard(request):
     return render(request, "hard.html")
+
+
+@staff_member_required
+def cache_stats(request):
+    """Hit/miss counters of this worker's two-tier caches and page cache."""
+    out = {
+        alias: caches[alias].stats()
+        for alias in settings.CACHES
+        if hasattr(caches[alias], "stats")
+    }
+    out["swr"] = dict(swr.stats)
+    return JsonResponse(out)
+
+
+def metrics(request):
+    """Prometheus scrape target: every worker's counters and histograms."""
+    token = getattr(settings, "METRICS_TOKEN", "")
+    bearer = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not (token and constant_time_compare(bearer, token)) and not request.user.is_staff:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics_registry.render_exposition(), content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
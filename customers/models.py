@@ -2,6 +2,7 @@ from django.db import models
 
 class Customer(models.Model):
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["name"]
@@ -1,6 +1,15 @@
+from django.utils.decorators import method_decorator
 from django.views.generic import ListView
+
+from core.utils import versions
+from core.utils.conditional import conditional_page
 from .models import Customer
 
+
+@method_decorator(
+    conditional_page(lambda request: f"customers:{versions.get_version('customers')}"),
+    name="dispatch",
+)
 class CustomerListView(ListView):
     template_name = "customers/list.html"
     model = Customer
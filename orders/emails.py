@@ -1,31 +1,26 @@
+import logging
 from decimal import Decimal, ROUND_HALF_UP
-import base64
-from typing import List, Dict, Optional
+from typing import List, Dict
 
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
-from django.contrib.staticfiles import finders
 from django.conf import settings
 
+from core.utils import tracing
+from core.utils.assets import asset_file_url, branding_path
+from core.utils.log import log_context
+from core.utils.mail import enqueue, send_or_enqueue
 from core.utils.pdf import render_pdf_from_template
 
-
-def _read_logo_b64(static_path: str) -> Optional[str]:
-    fs_path = finders.find(static_path)
-    if not fs_path:
-        print(f"[WARN] Logo not found at static path: {static_path}")
-        return None
-    try:
-        with open(fs_path, "rb") as f:
-            return base64.b64encode(f.read()).decode("ascii")
-    except Exception as e:
-        print(f"[WARN] Failed to read logo: {e}")
-        return None
+logger = logging.getLogger(__name__)
 
 
 def _normalize_items(order) -> List[Dict[str, str]]:
     rel = getattr(order, "items", None)
-    rows = rel.all() if hasattr(rel, "all") else (rel or [])
+    if hasattr(rel, "select_related"):
+        rows = rel.select_related("product")  # avoid a product query per line
+    else:
+        rows = rel.all() if hasattr(rel, "all") else (rel or [])
     out: List[Dict[str, str]] = []
     for i in rows:
         name = getattr(getattr(i, "product", None), "name", "") or getattr(i, "name", "Item")
@@ -58,19 +53,11 @@ def _q(x) -> Decimal:
         return Decimal("0.00")
 
 
-def send_order_confirmation_with_invoice(order, to_email: str, request=None):
-    """
-    Send HTML + text confirmation and attach a PDF built from invoices/invoice_v2.html.
-    Customer + aiaero44@gmail.com both receive it.
-    """
-    subject = f"Thank you! Order #{order.id} received"
-
-    from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "info@aiaeroindia.com")
-
-    # 👇 both addresses will receive the same mail + PDF
-    to = [to_email, "aiaero44@gmail.com"]
-
-    logo_b64 = _read_logo_b64("assets/img/Aiaero_logo.png")
+def build_invoice_context(order) -> dict:
+    """Template context shared by the confirmation email and the PDF invoice."""
+    # Served from the in-process asset cache; PDF engines load the file directly.
+    logo_path = branding_path("logo")
+    logo_url = asset_file_url(logo_path)
     line_items = _normalize_items(order)
 
     subtotal = _q(getattr(order, "subtotal", 0))
@@ -79,11 +66,12 @@ def send_order_confirmation_with_invoice(order, to_email: str, request=None):
     total    = _q(getattr(order, "total", 0))
     tax_rate_pct = str(getattr(settings, "CHECKOUT_TAX_RATE_PCT", "18"))
 
-    ctx = {
+    return {
         "order": order,
         "items": line_items,
         "line_items": line_items,
-        "company_logo_b64": logo_b64,
+        "company_logo_url": logo_url,
+        "company_logo_static_path": logo_path,
         "company_name": "Ai-Aero India Pvt Ltd",
         "company_email": "info@aiaeroindia.com",
         "subtotal": subtotal, "subtotal_str": f"{subtotal:.2f}",
@@ -93,19 +81,39 @@ def send_order_confirmation_with_invoice(order, to_email: str, request=None):
         "tax_rate_pct": tax_rate_pct,
     }
 
-    html_body = render_to_string("emails/order_confirmation.html", ctx)
-    text_body = render_to_string("emails/order_confirmation.txt", ctx)
 
-    msg = EmailMultiAlternatives(subject, text_body, from_email, to)
-    msg.attach_alternative(html_body, "text/html")
+def send_order_confirmation_with_invoice(order, to_email: str, request=None, outbox: bool = False):
+    """
+    Send HTML + text confirmation and attach a PDF built from invoices/invoice_v2.html.
+    Customer + aiaero44@gmail.com both receive it. outbox=True always queues it
+    for `send_outbox` instead of sending inline.
+    """
+    with log_context(order_id=order.id), tracing.span("email.order_confirmation", **{"order.id": order.id}):
+        subject = f"Thank you! Order #{order.id} received"
 
-    try:
-        pdf_bytes = render_pdf_from_template("invoices/invoice_v2.html", ctx)
-        if pdf_bytes:
-            msg.attach(f"invoice-{order.id}.pdf", pdf_bytes, "application/pdf")
-        else:
-            print(f"[WARN] render_pdf_from_template returned empty bytes for order #{order.id}")
-    except Exception as e:
-        print(f"[WARN] PDF generation failed for order #{order.id}: {e}")
+        from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "info@aiaeroindia.com")
+
+        # 👇 both addresses will receive the same mail + PDF
+        to = [to_email, "aiaero44@gmail.com"]
+
+        ctx = build_invoice_context(order)
+
+        html_body = render_to_string("emails/order_confirmation.html", ctx)
+        text_body = render_to_string("emails/order_confirmation.txt", ctx)
 
-    msg.send(fail_silently=False)
+        msg = EmailMultiAlternatives(subject, text_body, from_email, to)
+        msg.attach_alternative(html_body, "text/html")
+
+        try:
+            pdf_bytes = render_pdf_from_template("invoices/invoice_v2.html", ctx)
+            if pdf_bytes:
+                msg.attach(f"invoice-{order.id}.pdf", pdf_bytes, "application/pdf")
+            else:
+                logger.warning("render_pdf_from_template returned empty bytes")
+        except Exception:
+            logger.exception("PDF generation failed")
+
+        if outbox:
+            enqueue(msg)
+        else:
+            send_or_enqueue(msg)
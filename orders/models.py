@@ -34,6 +34,14 @@ class Order(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="created")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # payments.verify looks orders up by Razorpay id (and status)
+            models.Index(fields=["razorpay_order_id", "status"], name="order_rzp_status_idx"),
+            # "My orders": newest first per user
+            models.Index(fields=["user", "-created_at"], name="order_user_created_idx"),
+        ]
+
     def __str__(self):
         return f"Order #{self.pk}"
 
@@ -1,3 +1,100 @@
-from django.test import TestCase
+import json
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase, modify_settings, override_settings
+from django.urls import reverse
+
+from accounts.models import Address
+from catalog.models import Category, Product
+from core.routers import ReplicaRouter
+from core.utils import tracing
+from core.utils.queries import QueryBudgetMixin
+from orders.utils import calculate_totals
+
+
+class BuyerFixture:
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("buyer", "buyer@example.com", "pw")
+        Address.objects.create(
+            user=cls.user, full_name="Buyer", phone="1", line1="Street", city="Pune",
+            state="MH", pincode="411001", is_default=True,
+        )
+        cat = Category.objects.create(name="Drones")
+        cls.products = [
+            Product.objects.create(category=cat, name=f"Drone {i}", price=Decimal("100.00"), stock=5)
+            for i in range(6)
+        ]
+
+
+class RecordingRouter(ReplicaRouter):
+    """ReplicaRouter that records its choices but keeps every query on the test database."""
+    reads = []
+
+    def db_for_read(self, model, **hints):
+        self.reads.append((model._meta.label, super().db_for_read(model, **hints)))
+        return None
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"], DATABASE_ROUTERS=["orders.tests.RecordingRouter"])
+@modify_settings(MIDDLEWARE={"prepend": "core.routers.ReplicaPinMiddleware"})
+class CheckoutReplicaTests(BuyerFixture, TransactionTestCase):  # TestCase's atomic() would pin every read
+    def setUp(self):
+        self.setUpTestData()
+        self.client.force_login(self.user)
+        self.client.post(reverse("cart:add", args=[self.products[0].id]), {"quantity": 2})
+
+    def test_checkout_reads_prices_and_stock_from_the_primary(self):
+        self.client.cookies.pop("pin_primary", None)  # as if the cart write were long ago
+        RecordingRouter.reads = []
+        self.assertEqual(self.client.post(reverse("orders:checkout")).status_code, 302)
+        catalog_reads = [db for label, db in RecordingRouter.reads if label == "catalog.Product"]
+        self.assertTrue(catalog_reads)
+        self.assertEqual(set(catalog_reads), {"default"})
+
+    def test_stock_is_decremented_from_the_current_row(self):
+        from orders import views
+
+        def concurrent_purchase(cart):
+            totals = calculate_totals(cart)  # the cart has read stock=5 by now
+            Product.objects.filter(pk=self.products[0].pk).update(stock=3)
+            return totals
+
+        with mock.patch.object(views, "calculate_totals", side_effect=concurrent_purchase):
+            self.client.post(reverse("orders:checkout"))
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 1)
+
+
+class CheckoutQueryBudgetTests(BuyerFixture, QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(self.user)
+        for p in self.products:
+            self.client.post(reverse("cart:add", args=[p.id]), {"quantity": 1})
+
+    def test_checkout_page_budget(self):
+        self.assertViewQueryBudget(reverse("orders:checkout"), 7, status_code=200)
+
+
+class CheckoutTracingTests(BuyerFixture, TestCase):
+    def test_checkout_and_pay_share_one_trace(self):
+        fake_client = mock.Mock()
+        fake_client.order.create.return_value = {"id": "order_trace_1"}
+        with tempfile.TemporaryDirectory() as tmp, \
+                override_settings(TRACE_EXPORTER="file", TRACE_FILE=str(Path(tmp) / "spans.jsonl")):
+            self.client.force_login(self.user)
+            self.client.post(reverse("cart:add", args=[self.products[0].id]), {"quantity": 1})
+            checkout = self.client.post(reverse("orders:checkout"))
+            with mock.patch("razorpay.Client", return_value=fake_client):
+                pay = self.client.get(reverse("payments:pay"))
+            tracing.flush()
+            spans = [json.loads(line) for line in (Path(tmp) / "spans.jsonl").read_text().splitlines()]
+
+        trace_id = checkout["traceresponse"].split("-")[1]
+        self.assertEqual(pay["traceresponse"].split("-")[1], trace_id)
+        names = {s["name"] for s in spans if s["trace_id"] == trace_id}
+        self.assertTrue({"orders:checkout", "payments:pay", "razorpay.order_create", "db.query",
+                         "template.render"} <= names)
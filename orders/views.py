@@ -2,10 +2,14 @@
 from decimal import Decimal
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
 from django.shortcuts import render, redirect, get_object_or_404
 
 from accounts.models import Address
 from cart.cart import Cart
+from catalog.models import Product
+from core.routers import read_from_primary
+from core.utils import tracing
 from .models import Order, OrderItem
 from .utils import calculate_totals, calculate_totals_from_items
 
@@ -32,6 +36,7 @@ def _order_totals_context(order: Order):
 
 
 @login_required
+@read_from_primary
 def checkout(request):
     cart = Cart(request)
 
@@ -52,16 +57,7 @@ def checkout(request):
         addr_id = request.POST.get("address_id") or str(default_address.id)
         address = get_object_or_404(Address, id=addr_id, user=request.user)
 
-        order = Order.objects.create(
-            user=request.user,
-            email=request.user.email,
-            address=address,
-            subtotal=totals["subtotal"],
-            shipping=totals["shipping"],
-            tax=totals["tax"],
-            total=totals["total"],
-        )
-
+        lines = []
         for row in cart:
             product = row.get("product") if isinstance(row, dict) else getattr(row, "product", None)
             if product is None:
@@ -70,19 +66,32 @@ def checkout(request):
                 qty = int(row.get("qty", 1) if isinstance(row, dict) else getattr(row, "qty", 1))
             except (TypeError, ValueError):
                 qty = 1
-            qty = max(1, qty)
-            price = getattr(product, "price", 0)
-
-            OrderItem.objects.create(order=order, product=product, price=price, quantity=qty)
-
-            if hasattr(product, "stock") and product.stock is not None:
-                try:
-                    product.stock = max(0, int(product.stock) - qty)
-                    product.save(update_fields=["stock"])
-                except (TypeError, ValueError):
-                    pass
+            lines.append((product, max(1, qty)))
+
+        with transaction.atomic():
+            order = Order.objects.create(
+                user=request.user,
+                email=request.user.email,
+                address=address,
+                subtotal=totals["subtotal"],
+                shipping=totals["shipping"],
+                tax=totals["tax"],
+                total=totals["total"],
+            )
+            # Decrement the stock as it is now, not as the cart read it: concurrent
+            # checkouts of the same product wait on the row lock instead of
+            # overwriting each other's decrement.
+            locked = Product.objects.select_for_update().in_bulk([p.pk for p, _ in lines])
+            for product, qty in lines:
+                OrderItem.objects.create(order=order, product=product, price=getattr(product, "price", 0),
+                                         quantity=qty)
+                current = locked.get(product.pk)
+                if current is not None and current.stock is not None:
+                    current.stock = max(0, current.stock - qty)
+                    current.save(update_fields=["stock"])
 
         request.session["current_order_id"] = order.id
+        tracing.start_journey(request)  # pay, verify and the invoice email join this trace
         return redirect("payments:pay")
 
     context = {
@@ -1,3 +1,63 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from core.models import OutboxEmail
+from core.utils.offload import Saturated
+from orders.models import Order
+
+
+class _FakeRazorpayClient:
+    def __init__(self, *args, **kwargs):
+        self.order = self
+
+    def create(self, data):
+        return {"id": "order_test_123", "amount": data["amount"]}
+
+    @property
+    def utility(self):
+        return mock.Mock()  # verify_payment_signature accepts anything
+
+
+class AsyncPayViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("buyer", "buyer@example.com", "pw")
+        cls.order = Order.objects.create(user=cls.user, email=cls.user.email, total=Decimal("250.00"))
+
+    async def test_pay_creates_gateway_order_off_the_event_loop(self):
+        order = self.order
+        await self.async_client.aforce_login(self.user)
+        session = await self.async_client.asession()
+        await session.aset("current_order_id", order.pk)
+        await session.asave()
+
+        with mock.patch("razorpay.Client", _FakeRazorpayClient):
+            response = await self.async_client.get(reverse("payments:pay"))
+
+        self.assertContains(response, "order_test_123")
+        await order.arefresh_from_db()
+        self.assertEqual(order.razorpay_order_id, "order_test_123")
+
+
+class VerifyEmailTests(TestCase):
+    def test_full_mail_bulkhead_falls_back_to_the_outbox(self):
+        user = User.objects.create_user("buyer", "buyer@example.com", "pw")
+        order = Order.objects.create(user=user, email=user.email, total=Decimal("250.00"),
+                                     razorpay_order_id="order_full_1")
+        full = mock.Mock()
+        full.submit.side_effect = Saturated("mail: 200 calls in flight")
+
+        with mock.patch("razorpay.Client", _FakeRazorpayClient), \
+                mock.patch("payments.views.bulkhead", return_value=full):
+            response = self.client.post(reverse("payments:verify"), {
+                "razorpay_order_id": "order_full_1", "razorpay_payment_id": "pay_1", "razorpay_signature": "sig",
+            })
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 200)
+        order.refresh_from_db()
+        self.assertEqual(order.status, "paid")
+        self.assertEqual(OutboxEmail.objects.get().to, ["buyer@example.com", "aiaero44@gmail.com"])
@@ -1,10 +1,31 @@
 # payments/views.py
-import razorpay
+import logging
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.shortcuts import render, redirect, get_object_or_404
+from django.http import HttpResponse
+from django.shortcuts import redirect, aget_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from orders.models import Order
 from orders.emails import send_order_confirmation_with_invoice
+from core.routers import read_from_primary
+from core.utils import tracing
+from core.utils.log import bind
+from core.utils.metrics import counter, histogram
+from core.utils.offload import Saturated, arender, bulkhead
+
+logger = logging.getLogger(__name__)
+
+RAZORPAY_SECONDS = histogram("razorpay_call_seconds", "Razorpay client calls", ["op", "outcome"])
+PAYMENTS = counter("payments_verified_total", "Payment verifications by result", ["result"])
+
+
+def _log_email_failure(order_id):
+    def callback(future):
+        if future.exception() is not None:
+            logger.error("Failed to send order email/invoice for order %s", order_id,
+                         exc_info=future.exception())
+    return callback
 
 
 # ---- helper: clear the cart on success --------------------------------------
@@ -28,18 +49,53 @@ def _clear_cart(request):
 # -----------------------------------------------------------------------------
 
 
-def pay(request):
-    order_id = request.session.get('current_order_id')
-    order = get_object_or_404(Order, id=order_id, status='created')
+# ---- gateway calls (run on the "razorpay" bulkhead) -----------------------------
+def _razorpay_client():
+    import razorpay  # ~120 ms of imports; deferred to the first payment (or warmup)
+    return razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+
+
+def _create_razorpay_order(amount_paise: int) -> dict:
+    with RAZORPAY_SECONDS.time(op="order_create"), \
+            tracing.span("razorpay.order_create", kind="client", amount_paise=amount_paise):
+        return _razorpay_client().order.create(dict(
+            amount=amount_paise,
+            currency='INR',
+            payment_capture=1
+        ))
+
+
+def _finish_checkout(request):
+    _clear_cart(request)
+    # no longer need the “current order” pointer
+    request.session.pop('current_order_id', None)
+    tracing.end_journey(request)
 
-    client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-    rzp_order = client.order.create(dict(
-        amount=int(order.total * 100),
-        currency='INR',
-        payment_capture=1
-    ))
+
+def _busy():
+    response = HttpResponse("Payment gateway is busy, please retry in a moment.", status=503)
+    response["Retry-After"] = "5"
+    return response
+# -----------------------------------------------------------------------------
+
+
+@read_from_primary
+async def pay(request):
+    order_id = await request.session.aget('current_order_id')
+    order = await aget_object_or_404(
+        Order.objects.select_related("address", "user"), id=order_id, status='created',
+    )
+    bind(order_id=order.id)  # request-scoped; RequestContextMiddleware resets it
+    tracing.tag(**{"order.id": order.id})
+
+    # The HTTP call to Razorpay holds a bulkhead thread, not this request's worker
+    try:
+        rzp_order = await bulkhead("razorpay").run(_create_razorpay_order, int(order.total * 100))
+    except Saturated:
+        logger.warning("Razorpay bulkhead saturated")
+        return _busy()
     order.razorpay_order_id = rzp_order['id']
-    order.save()
+    await order.asave(update_fields=['razorpay_order_id'])
 
     context = {
         'order': order,
@@ -51,11 +107,12 @@ def pay(request):
         'customer_email': getattr(order, "email", "") or getattr(getattr(order, "user", None), "email", ""),
         'customer_contact': getattr(order.address, "phone", "") if getattr(order, "address", None) else '',
     }
-    return render(request, 'payments/pay.html', context)
+    return await arender(request, 'payments/pay.html', context)
 
 
 @csrf_exempt
-def verify(request):
+@read_from_primary
+async def verify(request):
     """
     Razorpay returns POST with: razorpay_order_id, razorpay_payment_id, razorpay_signature.
     On success:
@@ -73,23 +130,28 @@ def verify(request):
         'razorpay_signature': request.POST.get('razorpay_signature'),
     }
 
-    order = get_object_or_404(Order, razorpay_order_id=params['razorpay_order_id'])
+    order = await aget_object_or_404(
+        Order.objects.select_related("address", "user"), razorpay_order_id=params['razorpay_order_id'],
+    )
+    bind(order_id=order.id)  # request-scoped; RequestContextMiddleware resets it
+    tracing.tag(**{"order.id": order.id})
+
+    from razorpay.errors import SignatureVerificationError
 
-    client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
     try:
-        # raises SignatureVerificationError if invalid
-        client.utility.verify_payment_signature(params)
+        # raises SignatureVerificationError if invalid (a local HMAC check, no network)
+        with RAZORPAY_SECONDS.time(op="verify_signature"), tracing.span("razorpay.verify_signature"):
+            _razorpay_client().utility.verify_payment_signature(params)
+        PAYMENTS.inc(result="paid")
 
         # mark paid, store payment id, clean up
         order.status = 'paid'
         order.payment_id = params['razorpay_payment_id'] or ''
-        order.save(update_fields=['status', 'payment_id'])
+        await order.asave(update_fields=['status', 'payment_id'])
+        logger.info("Payment verified", extra={"payment_id": order.payment_id})
 
         # ✅ CLEAR THE CART
-        _clear_cart(request)
-
-        # no longer need the “current order” pointer
-        request.session.pop('current_order_id', None)
+        await sync_to_async(_finish_checkout)(request)
 
         # ✅ SEND EMAIL + PDF INVOICE (best-effort, non-fatal if it fails)
         try:
@@ -100,15 +162,23 @@ def verify(request):
                 or getattr(getattr(order, "address", None), "email", None)
             )
             if customer_email:
-                send_order_confirmation_with_invoice(order, customer_email)
-        except Exception as e:
+                # PDF rendering + SMTP run on the "mail" bulkhead; the success page doesn't wait
+                try:
+                    future = bulkhead("mail").submit(send_order_confirmation_with_invoice, order, customer_email)
+                    future.add_done_callback(_log_email_failure(order.id))
+                except Saturated:
+                    # Never drop it: build it here and leave the sending to the outbox
+                    logger.warning("Mail bulkhead full; order email queued in the outbox")
+                    await sync_to_async(send_order_confirmation_with_invoice)(order, customer_email, outbox=True)
+        except Exception:
             # Don't break the success flow if email fails
-            # You may swap this for logging
-            print(f"[WARN] Failed to send order email/invoice for order #{order.id}: {e}")
+            logger.exception("Failed to send order email/invoice")
 
-        return render(request, 'payments/success.html', {'order': order})
+        return await arender(request, 'payments/success.html', {'order': order})
 
-    except razorpay.errors.SignatureVerificationError:
+    except SignatureVerificationError:
+        logger.warning("Payment signature verification failed")
+        PAYMENTS.inc(result="bad_signature")
         order.status = 'cancelled'
-        order.save(update_fields=['status'])
-        return render(request, 'payments/failed.html', {'order': order})
+        await order.asave(update_fields=['status'])
+        return await arender(request, 'payments/failed.html', {'order': order})
@@ -0,0 +1,25 @@
+# shopsite/apps.py
+from django.contrib.staticfiles.apps import StaticFilesConfig
+
+
+class ShopStaticFilesConfig(StaticFilesConfig):
+    """
+    `collectstatic` without what no page loads: the duplicate Bootslander
+    template tree, source maps and SCSS sources, and the Bootstrap/AOS builds
+    (RTL, ESM, CommonJS, partial CSS) we don't use.
+    """
+    ignore_patterns = StaticFilesConfig.ignore_patterns + [
+        "Bootslander-1.0.0",
+        "scss",
+        "*.scss",
+        "*.map",
+        "*.rtl.css",
+        "*.rtl.min.css",
+        "bootstrap-grid*",
+        "bootstrap-reboot*",
+        "bootstrap-utilities*",
+        "bootstrap.esm*",
+        "aos.cjs.js",
+        "aos.esm.js",
+        "bootstrap-icons.json",
+    ]
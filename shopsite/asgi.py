@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shopsite.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402  (configured by the line above)
+
+if settings.WARMUP_ON_BOOT:
+    from core.utils.warmup import warmup
+
+    warmup()
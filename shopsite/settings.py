@@ -18,7 +18,7 @@ INSTALLED_APPS = [
     "django.contrib.contenttypes",
     "django.contrib.sessions",
     "django.contrib.messages",
-    "django.contrib.staticfiles",
+    "shopsite.apps.ShopStaticFilesConfig",         # staticfiles, minus unused vendor files
     "django.contrib.humanize",
 
     # your apps
@@ -35,9 +35,15 @@ INSTALLED_APPS = [
 
 # --- Middleware ---
 MIDDLEWARE = [
+    "core.middleware.RequestContextMiddleware",      # request_id on every log record
+    "core.middleware.MetricsMiddleware",             # per-view latency histogram (/internal/metrics/)
+    "core.middleware.QueryCountMiddleware",          # per-view query counts / N+1 log (DEBUG)
+    "core.middleware.ProfilingMiddleware",           # sampled stack profiles -> admin (RequestProfile)
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",   # serves static files in prod after collectstatic
+    "core.middleware.StaticFilesMiddleware",        # WhiteNoise (async-capable): static files after collectstatic
+    "core.middleware.PublishedPageMiddleware",       # pre-rendered pages (core.publish) for cookie-less visitors
     "django.contrib.sessions.middleware.SessionMiddleware",
+    "core.middleware.TracingMiddleware",             # server span per request (TRACE_EXPORTER)
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -49,7 +55,7 @@ ROOT_URLCONF = "shopsite.urls"
 # --- Templates ---
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "core.utils.tracing.TracedDjangoTemplates",  # DjangoTemplates + a span per render
         "DIRS": [BASE_DIR / "templates"],  # put any project-level templates here
         "APP_DIRS": True,
         "OPTIONS": {
@@ -66,13 +72,119 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "shopsite.wsgi.application"
 
-# --- DB ---
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# --- Database ---
+# DB_ENGINE=sqlite (default) or postgres. SQLite runs in WAL mode (readers
+# never block the writer), takes the write lock up front (BEGIN IMMEDIATE) so
+# concurrent transactions queue on busy_timeout instead of failing with
+# "database is locked", and keeps connections open per worker thread.
+# PostgreSQL uses psycopg's connection pool (pip install "psycopg[pool]") with
+# health checks, or persistent connections when DB_POOL=False.
+DB_ENGINE = config("DB_ENGINE", default="sqlite")
+DB_CONN_MAX_AGE = config("DB_CONN_MAX_AGE", cast=int, default=60)
+
+if DB_ENGINE == "postgres":
+    DB_POOL = config("DB_POOL", cast=bool, default=True)
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": config("DB_NAME", default="shopsite"),
+            "USER": config("DB_USER", default="shopsite"),
+            "PASSWORD": config("DB_PASSWORD", default=""),
+            "HOST": config("DB_HOST", default="localhost"),
+            "PORT": config("DB_PORT", default="5432"),
+            # pooled connections are returned to the pool after each request
+            "CONN_MAX_AGE": 0 if DB_POOL else DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "pool": {
+                    "min_size": config("DB_POOL_MIN_SIZE", cast=int, default=2),
+                    "max_size": config("DB_POOL_MAX_SIZE", cast=int, default=10),
+                    "timeout": config("DB_POOL_TIMEOUT", cast=float, default=10),
+                },
+            } if DB_POOL else {},
+        }
+    }
+else:
+    SQLITE_BUSY_TIMEOUT_MS = config("SQLITE_BUSY_TIMEOUT_MS", cast=int, default=5000)
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",  # safe with WAL: only the last commits can be lost on power failure
+        "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+        "mmap_size": config("SQLITE_MMAP_SIZE", cast=int, default=128 * 1024 * 1024),
+        "cache_size": config("SQLITE_CACHE_SIZE", cast=int, default=-32000),  # negative = KiB
+        "temp_store": "MEMORY",
+    }
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": config("DB_NAME", default=str(BASE_DIR / "db.sqlite3")),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "init_command": "".join(f"PRAGMA {k}={v};" for k, v in SQLITE_PRAGMAS.items()),
+                "transaction_mode": "IMMEDIATE",
+                "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+            },
+        }
+    }
+
+# --- Read replicas ---
+# DB_REPLICAS: comma-separated SQLite files (a local copy made by
+# `manage.py sync_replicas` works as a stand-in) or, with DB_ENGINE=postgres,
+# replica hosts. Reads of REPLICA_READ_APPS go to a replica unless the visitor
+# wrote within REPLICA_STICKY_SECONDS (core.routers).
+DB_REPLICAS = config("DB_REPLICAS", default="", cast=lambda v: [r.strip() for r in v.split(",") if r.strip()])
+DATABASE_REPLICAS = []
+for _i, _replica in enumerate(DB_REPLICAS, 1):
+    DATABASES[f"replica{_i}"] = {
+        **DATABASES["default"],
+        "HOST" if DB_ENGINE == "postgres" else "NAME": _replica,
+        "TEST": {"MIRROR": "default"},
     }
+    DATABASE_REPLICAS.append(f"replica{_i}")
+REPLICA_READ_APPS = ["catalog", "blog", "team", "customers", "core"]
+REPLICA_STICKY_SECONDS = config("REPLICA_STICKY_SECONDS", cast=int, default=5)
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+    MIDDLEWARE.insert(MIDDLEWARE.index("django.middleware.security.SecurityMiddleware"),
+                      "core.routers.ReplicaPinMiddleware")
+
+# Two tiers (core.cache.TwoTierCache): a per-process LRU in front of the
+# "shared" cache. Writes are journalled in the shared cache so other workers
+# drop stale L1 entries within CACHE_SYNC_INTERVAL seconds. Use Redis with
+# several workers (atomic incr); the file cache is fine for one host/dev.
+REDIS_URL = config("REDIS_URL", default="")
+if REDIS_URL:
+    SHARED_CACHE = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+    }
+else:
+    SHARED_CACHE = {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": config("CACHE_LOCATION", default=str(BASE_DIR / ".cache")),
+        "OPTIONS": {"MAX_ENTRIES": config("CACHE_MAX_ENTRIES", cast=int, default=100000)},
+    }
+
+CACHES = {
+    "default": {
+        "BACKEND": "core.cache.TwoTierCache",
+        "LOCATION": "shared",
+        "OPTIONS": {
+            # one entry per product card, so keep room for a full grid
+            "L1_MAX_ENTRIES": config("CACHE_L1_MAX_ENTRIES", cast=int, default=20000),
+            "L1_TIMEOUT": config("CACHE_L1_TIMEOUT", cast=float, default=60),
+            "SYNC_INTERVAL": config("CACHE_SYNC_INTERVAL", cast=float, default=1.0),
+        },
+    },
+    "shared": SHARED_CACHE,
 }
+FRAGMENT_CACHE_ALIAS = "default"
+FRAGMENT_CACHE_TIMEOUT = config("FRAGMENT_CACHE_TIMEOUT", cast=int, default=86400)
+# Whole anonymous pages (core.utils.swr.cached_page): fresh for PAGE_CACHE_TTL,
+# then served stale for up to PAGE_CACHE_STALE_TTL while one request re-renders.
+PAGE_CACHE_TTL = config("PAGE_CACHE_TTL", cast=int, default=30)
+PAGE_CACHE_STALE_TTL = config("PAGE_CACHE_STALE_TTL", cast=int, default=300)
 
 # --- Password validators ---
 AUTH_PASSWORD_VALIDATORS = [
@@ -92,8 +204,53 @@ USE_TZ = True
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]                 # your source static
 STATIC_ROOT = BASE_DIR / "staticfiles"                   # collectstatic target
-# WhiteNoise: additionally serve compressed files
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# WhiteNoise: hashed (cache-forever) and pre-compressed files once DEBUG is off;
+# needs `collectstatic` at deploy. (STATICFILES_STORAGE is ignored since Django 5.1.)
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage" if DEBUG
+        else "shopsite.storage.StaticStorage",
+    },
+}
+
+# base.html's CSS/JS ({% bundle_css %} / {% bundle_js %}, core.bundles). `manage.py
+# build_assets` (before collectstatic) writes one minified CSS file, one JS file
+# and the critical CSS inlined into every page; until then, or with
+# ASSET_BUNDLES_ENABLED off, pages link the source files one by one.
+ASSET_BUNDLES = {
+    "site": {
+        "css": [
+            "assets/vendor/bootstrap/css/bootstrap.min.css",
+            "assets/vendor/bootstrap-icons/bootstrap-icons.min.css",
+            "assets/vendor/aos/aos.css",
+            "assets/vendor/swiper/swiper-bundle.min.css",
+            "assets/css/main.css",
+        ],
+        "js": [
+            "assets/vendor/bootstrap/js/bootstrap.bundle.min.js",
+            "assets/vendor/aos/aos.js",
+            "assets/vendor/swiper/swiper-bundle.min.js",
+            "assets/js/main.js",
+        ],
+        "critical": ["base.html", "index.html"],  # header + first section of these
+    },
+}
+ASSET_BUILD_DIR = BASE_DIR / "static" / "build"
+ASSET_BUNDLES_ENABLED = config("ASSET_BUNDLES_ENABLED", cast=bool, default=not DEBUG)
+
+# Pre-rendered pages (core.publish): `manage.py publish_pages` after collectstatic;
+# republished after admin edits of the content they show when PUBLISH_ON_SAVE.
+PUBLISH_ROOT = config("PUBLISH_ROOT", default=str(BASE_DIR / "published"))
+PUBLISHED_PAGES = {  # URL name -> content namespaces (core.utils.versions) it shows
+    "core:soft": (),
+    "core:hard": (),
+    "team:list": ("team",),
+    "customers:list": ("customers",),
+    "blog:list": ("blog",),
+}
+PUBLISH_BLOG_POSTS = True  # every published blog.Post detail page too
+PUBLISH_ON_SAVE = config("PUBLISH_ON_SAVE", cast=bool, default=not DEBUG)
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
@@ -104,6 +261,13 @@ CSRF_TRUSTED_ORIGINS = [
     "http://127.0.0.1:8000",
 ]
 SESSION_COOKIE_AGE = 60 * 60 * 24 * 7  # 1 week
+# Sessions are only written once a visitor logs in or adds to the cart.
+# "django.contrib.sessions.backends.cached_db" reads through the cache;
+# "django.contrib.sessions.backends.signed_cookies" needs no storage at all
+# (the cart is small: {"<product id>": qty}).
+SESSION_ENGINE = config("SESSION_ENGINE", default="django.contrib.sessions.backends.db")
+# Never the two-tier "default": another worker's L1 could serve a stale session (cart, login).
+SESSION_CACHE_ALIAS = "shared"
 
 # --- Auth redirects ---
 LOGIN_REDIRECT_URL = "/"
@@ -119,10 +283,119 @@ EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD", default="njwh ywko nzzl cypg
 DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL", default="Ai-Aero <aiaero44@gmail.com>")
 EMAIL_TIMEOUT = 20
 
+# Outbox: when on, order emails are queued in core.OutboxEmail and sent by
+# `python manage.py send_outbox --loop` over one SMTP connection.
+EMAIL_USE_OUTBOX = config("EMAIL_USE_OUTBOX", cast=bool, default=False)
+EMAIL_OUTBOX_BATCH_SIZE = config("EMAIL_OUTBOX_BATCH_SIZE", cast=int, default=50)
+EMAIL_OUTBOX_RATE_PER_MINUTE = config("EMAIL_OUTBOX_RATE_PER_MINUTE", cast=int, default=20)  # provider limit
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+
+# --- Logging ---
+# LOG_FORMAT=json for one JSON object per line; LOG_LEVELS overrides per module,
+# e.g. "core.utils.pdf=DEBUG,payments=WARNING". DEBUG records are sampled 1 in
+# LOG_DEBUG_SAMPLE_RATE per logger.
+LOG_LEVEL = config("LOG_LEVEL", default="INFO")
+LOG_FORMAT = config("LOG_FORMAT", default="json")
+LOG_DEBUG_SAMPLE_RATE = config("LOG_DEBUG_SAMPLE_RATE", cast=int, default=10)
+LOG_LEVELS = config(
+    "LOG_LEVELS", default="",
+    cast=lambda v: dict(item.split("=", 1) for item in v.split(",") if "=" in item),
+)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "json": {"()": "core.utils.log.JsonFormatter"},
+        "plain": {"format": "%(asctime)s %(levelname)s %(name)s %(message)s"},
+    },
+    "filters": {
+        "context": {"()": "core.utils.log.ContextFilter"},
+        "sampling": {"()": "core.utils.log.SamplingFilter", "rate": LOG_DEBUG_SAMPLE_RATE},
+    },
+    "handlers": {
+        "console": {
+            "class": "core.utils.log.QueueStreamHandler",
+            "stream": "ext://sys.stdout",
+            "formatter": "json" if LOG_FORMAT == "json" else "plain",
+            "filters": ["context", "sampling"],
+        },
+    },
+    "root": {"handlers": ["console"], "level": "WARNING"},
+    "loggers": {
+        "django": {"handlers": ["console"], "level": "INFO", "propagate": False},
+        **{
+            app: {"handlers": ["console"], "level": LOG_LEVEL, "propagate": False}
+            for app in ("core", "accounts", "catalog", "cart", "orders", "payments",
+                        "blog", "customers", "team")
+        },
+        **{
+            name: {"handlers": ["console"], "level": level.upper(), "propagate": False}
+            for name, level in LOG_LEVELS.items()
+        },
+    },
+}
+
+# --- Query instrumentation (core.middleware.QueryCountMiddleware) ---
+QUERY_INSTRUMENTATION = config("QUERY_INSTRUMENTATION", cast=bool, default=DEBUG)
+QUERY_NPLUSONE_THRESHOLD = 5
+
+# --- Worker boot (core.utils.warmup, run from wsgi.py / asgi.py) ---
+# Import the lazily-loaded libraries, compile the main templates, resolve the
+# URLconf and prime caches before the worker serves its first request.
+WARMUP_ON_BOOT = config("WARMUP_ON_BOOT", cast=bool, default=not DEBUG)
+
+# --- Metrics (core.utils.metrics, scraped from /internal/metrics/) ---
+# With several worker processes point METRICS_DIR at a directory they share;
+# each flushes its values there every METRICS_FLUSH_INTERVAL seconds and folds
+# them into metrics-archived.json when it exits. Scrapers
+# authenticate with "Authorization: Bearer <METRICS_TOKEN>" (or a staff login).
+METRICS_DIR = config("METRICS_DIR", default="")
+METRICS_FLUSH_INTERVAL = config("METRICS_FLUSH_INTERVAL", cast=float, default=5.0)
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
+# --- Tracing (core.utils.tracing) ---
+# "" (off), "file" (JSON lines in TRACE_FILE) or "otlp" (OTLP/HTTP JSON to
+# TRACE_OTLP_ENDPOINT; `manage.py trace_collector` listens there locally).
+TRACE_EXPORTER = config("TRACE_EXPORTER", default="")
+TRACE_FILE = config("TRACE_FILE", default=str(BASE_DIR / "traces.jsonl"))
+TRACE_OTLP_ENDPOINT = config("TRACE_OTLP_ENDPOINT", default="http://127.0.0.1:4318/v1/traces")
+TRACE_SAMPLE_RATE = config("TRACE_SAMPLE_RATE", cast=float, default=1.0)
+TRACE_SERVICE_NAME = "shopsite"
+TRACE_JOURNEY_TTL = 30 * 60  # a purchase left longer than this starts a new trace
+
+# --- Request profiling (core.middleware.ProfilingMiddleware) ---
+# Profile this fraction of requests at random; any request carrying a valid
+# X-Profile-Token header (`manage.py profile_token`) is profiled as well.
+PROFILE_SAMPLE_RATE = config("PROFILE_SAMPLE_RATE", cast=float, default=0.0)
+PROFILE_INTERVAL_MS = config("PROFILE_INTERVAL_MS", cast=float, default=5)
+PROFILE_TOKEN_MAX_AGE = config("PROFILE_TOKEN_MAX_AGE", cast=int, default=3600)
+
 # --- Misc ---
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 SITE_URL = config("SITE_URL", default="https://www.aiaeroindia.com")
 
+# Static files kept in memory by core.utils.assets (reloaded when their mtime changes);
+# the email and the PDF invoice both take the logo from here.
+BRANDING_ASSETS = {
+    "logo": "assets/img/Aiaero_logo.png",
+}
+
 # --- Razorpay (keep your keys in .env ideally) ---
 RAZORPAY_KEY_ID = config("RAZORPAY_KEY_ID", default="rzp_test_xc0LpuVfsigL9y")
 RAZORPAY_KEY_SECRET = config("RAZORPAY_KEY_SECRET", default="0ylEFHvHTpiGyl2j3Yx1graX")
+
+# --- Blocking calls from async views (core.utils.offload) ---
+# One bounded thread pool per external dependency: max_workers calls run at
+# once, up to max_pending may wait; beyond that the view answers 503.
+BULKHEADS = {
+    "razorpay": {
+        "max_workers": config("RAZORPAY_MAX_WORKERS", cast=int, default=64),
+        "max_pending": config("RAZORPAY_MAX_PENDING", cast=int, default=512),
+    },
+    "publish": {"max_workers": 1, "max_pending": 100},  # core.publish re-renders after admin edits
+    "mail": {  # invoice PDF + SMTP
+        "max_workers": config("MAIL_MAX_WORKERS", cast=int, default=4),
+        "max_pending": config("MAIL_MAX_PENDING", cast=int, default=200),
+    },
+}
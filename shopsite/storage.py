@@ -0,0 +1,14 @@
+# shopsite/storage.py
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticStorage(CompressedManifestStaticFilesStorage):
+    """
+    Hashed, pre-compressed static files. Source maps aren't collected
+    (shopsite.apps.ShopStaticFilesConfig), so the sourceMappingURL comments
+    pointing at them are left as they are instead of failing the build.
+    """
+    patterns = tuple(
+        (extension, tuple(p for p in patterns if "sourceMappingURL" not in (p[0] if isinstance(p, tuple) else p)))
+        for extension, patterns in CompressedManifestStaticFilesStorage.patterns
+    )
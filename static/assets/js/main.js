@@ -103,16 +103,17 @@
   window.addEventListener('load', aosInit);
 
   /**
-   * Initiate glightbox
+   * Initiate glightbox / Pure Counter (only loaded by pages that use them)
    */
-  const glightbox = GLightbox({
-    selector: '.glightbox'
-  });
+  if (window.GLightbox) {
+    GLightbox({
+      selector: '.glightbox'
+    });
+  }
 
-  /**
-   * Initiate Pure Counter
-   */
-  new PureCounter();
+  if (window.PureCounter) {
+    new PureCounter();
+  }
 
   /**
    * Init swiper sliders
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-19 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teammember',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,6 +1,11 @@
 from django.shortcuts import render
+
+from core.utils import versions
+from core.utils.conditional import conditional_page
 from .models import TeamMember
 
+
+@conditional_page(lambda request: f"team:{versions.get_version('team')}")
 def team_list(request):
     members = TeamMember.objects.filter(is_active=True)
     return render(request, "team/list.html", {"members": members})